@@ -0,0 +1,217 @@
+"""
+Пакетный запуск образов PDP-11 на пуле процессов.
+
+Берет все файлы *.pdp.o из каталога и выполняет их параллельно
+в ProcessPoolExecutor (по умолчанию по процессу на доступное ядро).
+Каждый образ выполняется в своей машине Machine до HALT, но не дольше
+лимита команд и лимита времени.
+
+Ожидаемое состояние (необязательно):
+    Рядом с образом NAME.pdp.o может лежать файл NAME.expected с парами
+    имя=значение в восьмеричном виде, разделенными пробелами или переводами
+    строк. Имена - регистры r0-r7, sp, pc или восьмеричный адрес слова памяти.
+    Формат совпадает с выводом reg_dump, поэтому его можно просто скопировать:
+
+        r0=000000 r2=000000 r4=000000 sp=000000
+        r1=000006 r3=000000 r5=000000 pc=001014
+        002000=000005
+
+Результат каждого образа - словарь:
+    image: путь к образу
+    status: 'pass' | 'fail' | 'timeout' | 'error'
+    instructions: число выполненных команд
+    cycles: оценка числа циклов шины (см. pdp_11_timing)
+    seconds: время выполнения
+    mismatches: список расхождений с ожидаемым состоянием
+    error: текст исключения для 'error'
+    output: вывод программы на консоль (DL11)
+
+Статус 'pass' означает, что машина остановилась по HALT и (если есть файл
+.expected) все значения совпали; 'timeout' - исчерпан лимит команд или времени.
+
+Запуск:
+    python batch_run.py integral_tests [--max-instructions N] [--timeout S] [--workers N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pdp_11_machine import Machine
+from pdp_11_devices import Console
+
+IMAGE_SUFFIX = ".pdp.o"
+EXPECTED_SUFFIX = ".expected"
+REGISTER_NAMES = {f"r{i}": i for i in range(8)} | {"sp": 6, "pc": 7}
+
+# Лимит времени проверяется между порциями такого размера
+CHUNK = 100_000
+
+
+def parse_expected(text):
+    """
+    Разбирает ожидаемое состояние машины.
+
+    Args:
+        text (str): пары имя=значение (см. описание модуля)
+
+    Returns:
+        tuple: (словарь номер регистра -> значение, словарь адрес -> слово)
+
+    Raises:
+        ValueError: если пара записана неверно
+    """
+    registers, memory = {}, {}
+    for item in text.split():
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Bad expected value {item}")
+        name = name.lower()
+        if name in REGISTER_NAMES:
+            registers[REGISTER_NAMES[name]] = int(value, 8)
+        else:
+            memory[int(name, 8)] = int(value, 8)
+    return registers, memory
+
+
+def expected_path(image):
+    """Путь к файлу ожидаемого состояния для образа image."""
+    base = image[:-len(IMAGE_SUFFIX)] if image.endswith(IMAGE_SUFFIX) else image
+    return base + EXPECTED_SUFFIX
+
+
+def compare_state(machine, registers, memory):
+    """Возвращает список расхождений состояния машины с ожидаемым."""
+    mismatches = []
+    for r, value in sorted(registers.items()):
+        if machine.reg[r] != value:
+            mismatches.append(f"r{r}: expected {value:06o}, got {machine.reg[r]:06o}")
+    for adr, value in sorted(memory.items()):
+        actual = machine.memory.w_read(adr)
+        if actual != value:
+            mismatches.append(f"{adr:06o}: expected {value:06o}, got {actual:06o}")
+    return mismatches
+
+
+def run_image(image, max_instructions=10_000_000, timeout=10.0):
+    """
+    Выполняет один образ и сравнивает результат с ожидаемым состоянием.
+
+    Функция выполняется в процессе пула, поэтому получает и возвращает
+    только простые значения.
+
+    Args:
+        image (str): путь к образу
+        max_instructions (int): лимит числа команд
+        timeout (float): лимит времени в секундах
+
+    Returns:
+        dict: результат (см. описание модуля)
+    """
+    result = {"image": image, "status": "error", "instructions": 0, "cycles": 0,
+              "seconds": 0.0, "mismatches": [], "error": "", "output": ""}
+    start = time.monotonic()
+    machine = Machine()
+    output = io.StringIO()
+    machine.add_device(Console(output))
+    try:
+        expected = None
+        if os.path.exists(expected_path(image)):
+            with open(expected_path(image), encoding="utf-8") as file:
+                expected = parse_expected(file.read())
+
+        machine.load(image)
+        deadline = start + timeout
+        while not machine.halted:
+            budget = min(CHUNK, max_instructions - result["instructions"])
+            if budget <= 0 or time.monotonic() > deadline:
+                break
+            result["instructions"] += machine.run(budget)
+
+        if not machine.halted:
+            result["status"] = "timeout"
+        elif expected is not None:
+            result["mismatches"] = compare_state(machine, *expected)
+            result["status"] = "fail" if result["mismatches"] else "pass"
+        else:
+            result["status"] = "pass"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        machine.close()
+    result["cycles"] = machine.cycles
+    result["output"] = output.getvalue()
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def find_images(directory):
+    """Возвращает отсортированный список образов *.pdp.o в каталоге."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(IMAGE_SUFFIX))
+
+
+def default_workers():
+    """Число доступных процессу ядер."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def run_batch(directory, max_instructions=10_000_000, timeout=10.0, workers=None):
+    """
+    Выполняет все образы каталога на пуле процессов.
+
+    Args:
+        directory (str): каталог с образами *.pdp.o
+        max_instructions (int): лимит числа команд на образ
+        timeout (float): лимит времени на образ в секундах
+        workers (int): число процессов (по умолчанию - число доступных ядер)
+
+    Returns:
+        dict: results - список результатов в порядке имен образов,
+              summary - число образов по каждому статусу
+    """
+    images = find_images(directory)
+    workers = min(workers or default_workers(), max(len(images), 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_image, images,
+                                [max_instructions] * len(images), [timeout] * len(images)))
+
+    summary = {status: 0 for status in ("pass", "fail", "timeout", "error")}
+    for result in results:
+        summary[result["status"]] += 1
+    return {"results": results, "summary": summary}
+
+
+def print_report(report):
+    for result in report["results"]:
+        print(f"{result['status']:>7}  {result['image']}  "
+              f"{result['instructions']} instr  {result['seconds']:.3f} s")
+        for mismatch in result["mismatches"]:
+            print(f"         {mismatch}")
+        if result["error"]:
+            print(f"         {result['error']}")
+    print(" ".join(f"{status}={count}" for status, count in report["summary"].items()))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Пакетный запуск образов PDP-11")
+    parser.add_argument("directory", help="каталог с образами *.pdp.o")
+    parser.add_argument("--max-instructions", type=int, default=10_000_000,
+                        help="лимит числа команд на образ")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="лимит времени на образ, секунды")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    report = run_batch(options.directory, options.max_instructions, options.timeout, options.workers)
+    print_report(report)
+    sys.exit(0 if report["summary"]["pass"] == len(report["results"]) else 1)
@@ -0,0 +1,57 @@
+import shutil
+
+import pytest
+from batch_run import parse_expected, run_image, run_batch
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+
+
+@pytest.fixture
+def images(tmp_path):
+    shutil.copy(IMAGE, tmp_path / "ok.pdp.o")
+    shutil.copy(IMAGE, tmp_path / "wrong.pdp.o")
+    (tmp_path / "wrong.expected").write_text("r1=000007 pc=001014\n")
+    # sob r0, 1 - цикл на месте, 65536 итераций
+    (tmp_path / "loop.pdp.o").write_text("0200 0002\n01\n7e\n")
+    return tmp_path
+
+
+def test_parse_expected():
+    registers, memory = parse_expected("r1=000006 sp=001000\nPC=001014 002000=000005")
+    assert registers == {1: 6, 6: 0o1000, 7: 0o1014}
+    assert memory == {0o2000: 5}
+    with pytest.raises(ValueError):
+        parse_expected("r1")
+
+
+def test_run_image_pass():
+    result = run_image(IMAGE)
+    assert result["status"] == "pass"
+    assert result["instructions"] == 9
+    assert result["mismatches"] == []
+
+
+def test_run_image_fail(images):
+    result = run_image(str(images / "wrong.pdp.o"))
+    assert result["status"] == "fail"
+    assert result["mismatches"] == ["r1: expected 000007, got 000006"]
+
+
+def test_run_image_instruction_limit(images):
+    result = run_image(str(images / "loop.pdp.o"), max_instructions=100)
+    assert result["status"] == "timeout"
+    assert result["instructions"] == 100
+
+
+def test_run_image_error(images):
+    (images / "broken.pdp.o").write_text("0200 0002\nzz\n")
+    result = run_image(str(images / "broken.pdp.o"))
+    assert result["status"] == "error"
+    assert "ValueError" in result["error"]
+
+
+def test_run_batch(images):
+    report = run_batch(str(images), max_instructions=1000, workers=2)
+    statuses = {r["image"].rsplit("/", 1)[-1]: r["status"] for r in report["results"]}
+    assert statuses == {"loop.pdp.o": "timeout", "ok.pdp.o": "pass", "wrong.pdp.o": "fail"}
+    assert report["summary"] == {"pass": 1, "fail": 1, "timeout": 1, "error": 0}
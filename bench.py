@@ -0,0 +1,213 @@
+"""
+Замеры скорости эмулятора PDP-11.
+
+Сравнивает способы выбора команды в основном цикле:
+- linear: линейный поиск по списку commands (проверка mask/opcode по очереди)
+- table: одно обращение к заранее построенной таблице decode_table
+- cached: Machine.run с кэшем декодированных команд по адресу (InstructionCache)
+
+Также сравнивает выделения памяти при разборе операндов (tracemalloc и
+число сборок мусора): новый ModeRegistrArg на каждый операнд против
+переиспользуемых ss_slot/dd_slot.
+
+И время загрузки полного образа 64Kb: построчный разбор с b_write на каждый
+байт, пакетный load_data и двоичный образ load_image.
+
+Программа 02_sob.pdp.o сама по себе делает всего несколько итераций, поэтому
+после загрузки в ней подменяется непосредственный операнд первой команды
+(mov #3, r0) - так цикл sob выполняется count раз.
+
+Запуск:
+    python bench.py [count]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pdp_11_mem import w_read, w_write, reg, Memory
+from pdp_11_commands import commands, decode_table, ArgsProcessor, Halted
+from pdp_11_machine import Machine
+from data_load import load_data, load_image, convert_to_image
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+COUNT_ADDRESS = 0o1002  # непосредственный операнд mov #3, r0
+
+
+def lookup_linear(word):
+    for cmd in commands:
+        if (word & cmd["mask"]) == cmd["opcode"]:
+            return cmd
+
+
+def lookup_table(word):
+    return decode_table[word]
+
+
+def prepare(count):
+    load_data(IMAGE)
+    w_write(COUNT_ADDRESS, count)
+    reg[:] = [0] * 8
+    reg[7] = 0o1000
+
+
+def run(lookup, count):
+    """
+    Загружает образ, выполняет его до halt без трассировки
+    и возвращает (число команд, секунды).
+    """
+    prepare(count)
+    args = ArgsProcessor()
+    executed = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            word = w_read(reg[7])
+            reg[7] += 2
+
+            cmd = lookup(word)
+            args.process(cmd["params"], word, cmd["reads_dd"])
+            executed += 1
+            cmd["handler"](args)
+    except Halted:
+        pass
+    return executed, time.perf_counter() - start
+
+
+def run_cached(count):
+    """То же, что run, но через Machine.run (кэш декодированных команд, как в main)."""
+    machine = Machine()
+    machine.load(IMAGE)
+    machine.memory.w_write(COUNT_ADDRESS, count)
+    start = time.perf_counter()
+    executed = machine.run()
+    seconds = time.perf_counter() - start
+    machine.close()
+    return executed, seconds
+
+
+def process_allocating(args, params, word):
+    """Разбор аргументов как до переиспользуемых операндов: новый объект на операнд."""
+    args.clear()
+    for param in params:
+        if param == 'ss':
+            args.ss = ArgsProcessor.get_mr(word >> 6)
+        elif param == 'dd':
+            args.dd = ArgsProcessor.get_mr(word & 0o77)
+        elif param == 'r':
+            args.r = (word >> 6) & 0o7
+        elif param == 'nn':
+            args.nn = word & 0o77
+
+
+def run_allocations(process, count):
+    """
+    Выполняет образ с заданной функцией разбора аргументов под tracemalloc.
+
+    Операнды всех команд удерживаются в списке до конца прогона, поэтому
+    снимок tracemalloc показывает все объекты, созданные в pdp_11_args,
+    а не только живые в последний момент.
+
+    Returns:
+        tuple: (число команд, число блоков и байт, выделенных в pdp_11_args,
+                число сборок мусора поколения 0)
+    """
+    prepare(count)
+    args = ArgsProcessor()
+    executed = 0
+    retained = []
+    collections = gc.get_stats()[0]['collections']
+    tracemalloc.start()
+    try:
+        while True:
+            word = w_read(reg[7])
+            reg[7] += 2
+
+            cmd = decode_table[word]
+            process(args, cmd, word)
+            retained.append(args.ss)
+            retained.append(args.dd)
+            executed += 1
+            cmd["handler"](args)
+    except Halted:
+        pass
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    collections = gc.get_stats()[0]['collections'] - collections
+    stats = snapshot.filter_traces([tracemalloc.Filter(True, "*pdp_11_args.py")]).statistics("filename")
+    blocks = sum(stat.count for stat in stats)
+    size = sum(stat.size for stat in stats)
+    return executed, blocks, size, collections
+
+
+def bench_allocations(count=20000):
+    variants = (
+        ("objects", lambda args, cmd, word: process_allocating(args, cmd["params"], word)),
+        ("slots", lambda args, cmd, word: args.process(cmd["params"], word, cmd["reads_dd"])),
+    )
+    for name, process in variants:
+        executed, blocks, size, collections = run_allocations(process, count)
+        print(f"{name:>7}: {executed} instructions, {blocks} blocks / {size} bytes allocated "
+              f"in pdp_11_args, {collections} gen0 collections")
+
+
+def bench_dispatch(count=20000):
+    results = {}
+    variants = (
+        ("linear", lambda: run(lookup_linear, count)),
+        ("table", lambda: run(lookup_table, count)),
+        ("cached", lambda: run_cached(count)),
+    )
+    for name, runner in variants:
+        executed, seconds = runner()
+        results[name] = executed / seconds
+        print(f"{name:>6}: {executed} instructions, {seconds:.3f} s, {executed / seconds:,.0f} instr/s")
+    print(f"speedup table/linear: {results['table'] / results['linear']:.2f}x, "
+          f"cached/linear: {results['cached'] / results['linear']:.2f}x")
+    return results
+
+
+def load_data_per_byte(filename, memory):
+    """Загрузка текстового файла так, как до пакетного разбора: вызов на каждый байт."""
+    with open(filename, 'r') as file:
+        while True:
+            line = file.readline().strip()
+            if not line:
+                break
+
+            address, n = map(lambda x: int(x, 16), line.split())
+            for i in range(n):
+                byte = int(file.readline().strip(), 16)
+                memory.b_write(address + i, byte)
+
+
+def bench_load(size=0xFFFF):
+    with tempfile.TemporaryDirectory() as directory:
+        text = os.path.join(directory, "image.pdp.o")
+        binary = os.path.join(directory, "image.bin")
+        with open(text, "w") as file:
+            file.write(f"0000 {size:04x}\n")
+            file.writelines(f"{i & 0xFF:02x}\n" for i in range(size))
+        convert_to_image(text, binary)
+
+        variants = (
+            ("per-byte", lambda memory: load_data_per_byte(text, memory)),
+            ("bulk", lambda memory: load_data(text, memory)),
+            ("binary", lambda memory: load_image(binary, memory)),
+        )
+        for name, load in variants:
+            memory = Memory()
+            start = time.perf_counter()
+            load(memory)
+            seconds = time.perf_counter() - start
+            print(f"{name:>8}: {size} bytes loaded in {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bench_dispatch(count)
+    bench_allocations(count)
+    bench_load()
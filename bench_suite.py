@@ -0,0 +1,247 @@
+"""
+Набор замеров производительности эмулятора PDP-11.
+
+Синтетические программы собираются прямо в память машины (слова команд
+записаны в восьмеричном виде) и нагружают разные части эмулятора:
+- sob: длинный счетный цикл из вложенных sob
+- modes: mov/add во всех режимах адресации, которые разбирает get_mr
+- copy: копирование блоков памяти через (r1)+, (r2)+
+- op_<name>: цикл из одинаковых команд для замера ns/команду по отдельным
+  командам (mov, add, clr, sob)
+
+Для каждого замера сообщается число команд, команд в секунду (MIPS)
+и ns на команду; в конце - пиковый RSS процесса. Результаты сохраняются
+в JSON, и прошлый файл можно указать для сравнения: замедление больше
+порога помечается как REGRESSION.
+
+Запуск:
+    python bench_suite.py [--output bench.json] [--compare old.json] [--repeat 3]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from pdp_11_machine import Machine
+
+START = 0o1000
+
+
+def ss_dd(opcode, ss, dd):
+    """Слово двухоперандной команды: ss и dd - 6-битные поля режим+регистр."""
+    return opcode | (ss << 6) | dd
+
+
+def mode(m, r):
+    return (m << 3) | r
+
+
+MOV, ADD = 0o010000, 0o060000
+CLR = 0o005000
+HALT = 0o000000
+PC = 7
+
+
+def sob(r, nn):
+    """sob r, nn - переход на nn слов назад от следующей команды (nn < 64)."""
+    if not 0 <= nn < 0o100:
+        raise ValueError(f"sob offset {nn} does not fit in 6 bits")
+    return 0o077000 | (r << 6) | nn
+
+
+def mov_imm(value, r):
+    """mov #value, r"""
+    return [ss_dd(MOV, mode(2, PC), mode(0, r)), value]
+
+
+def program_sob(outer=100, inner=1000):
+    """Вложенный цикл sob: outer * inner итераций внутреннего sob."""
+    return (mov_imm(outer, 1)        # 1000: mov #outer, r1
+            + mov_imm(inner, 0)      # 1004: mov #inner, r0
+            + [sob(0, 1),            # 1010: sob r0, 1010
+               sob(1, 4),            # 1012: sob r1, 1004
+               HALT]), {}
+
+
+def program_modes(iterations=5000):
+    """
+    mov/add во всех режимах адресации 0-7 (и непосредственном #n).
+
+    Указатели на данные: r2 -> 2000 (слова 1, 2, указатель на 2000, 0),
+    r3 -> 2100 (указатель на 2000). Тело цикла сохраняет r2 и r3.
+    """
+    body = [
+        ss_dd(MOV, mode(0, 1), mode(0, 0)),          # mov r1, r0
+        ss_dd(ADD, mode(2, PC), mode(0, 0)), 1,      # add #1, r0
+        ss_dd(MOV, mode(1, 2), mode(0, 0)),          # mov (r2), r0
+        ss_dd(ADD, mode(0, 0), mode(1, 2)),          # add r0, (r2)
+        ss_dd(MOV, mode(2, 2), mode(0, 0)),          # mov (r2)+, r0
+        ss_dd(MOV, mode(4, 2), mode(0, 0)),          # mov -(r2), r0
+        ss_dd(MOV, mode(3, 3), mode(0, 0)),          # mov @(r3)+, r0
+        ss_dd(MOV, mode(5, 3), mode(0, 0)),          # mov @-(r3), r0
+        ss_dd(ADD, mode(6, 2), mode(0, 0)), 2,       # add 2(r2), r0
+        ss_dd(MOV, mode(7, 2), mode(0, 0)), 4,       # mov @4(r2), r0
+        ss_dd(ADD, mode(0, 0), mode(6, 2)), 6,       # add r0, 6(r2)
+    ]
+    words = (mov_imm(iterations, 5)
+             + mov_imm(0o2000, 2)
+             + mov_imm(0o2100, 3))
+    words += body + [sob(5, len(body) + 1), HALT]
+    data = {0o2000: [1, 2, 0o2000, 0], 0o2100: [0o2000]}
+    return words, data
+
+
+def program_copy(blocks=20, size=4096):
+    """Копирование size слов из 4000 в 40000 через mov (r1)+, (r2)+, blocks раз."""
+    words = (mov_imm(blocks, 4)                              # 1000
+             + mov_imm(0o4000, 1)                            # 1004
+             + mov_imm(0o40000, 2)                           # 1010
+             + mov_imm(size, 3)                              # 1014
+             + [ss_dd(MOV, mode(2, 1), mode(2, 2)),          # 1020: mov (r1)+, (r2)+
+                sob(3, 2),                                   # 1022: sob r3, 1020
+                sob(4, 9),                                   # 1024: sob r4, 1004
+                HALT])
+    return words, {0o4000: list(range(size))}
+
+
+def program_opcode(instruction, copies=50, iterations=1000):
+    """Цикл из copies одинаковых команд instruction (список слов)."""
+    body = instruction * copies
+    return mov_imm(iterations, 5) + body + [sob(5, len(body) + 1), HALT], {}
+
+
+BENCHMARKS = {
+    "sob": program_sob,
+    "modes": program_modes,
+    "copy": program_copy,
+    "op_mov": lambda: program_opcode([ss_dd(MOV, mode(0, 1), mode(0, 0))]),
+    "op_add": lambda: program_opcode([ss_dd(ADD, mode(0, 1), mode(0, 0))]),
+    "op_clr": lambda: program_opcode([CLR | mode(0, 0)]),
+    "op_sob": lambda: program_sob(outer=50, inner=2000),
+}
+
+
+def load_words(machine, adr, words):
+    for i, word in enumerate(words):
+        machine.memory.w_write(adr + 2 * i, word)
+
+
+def run_benchmark(build, repeat=3, translate=False):
+    """
+    Выполняет программу repeat раз на свежей машине и берет лучшее время.
+
+    Args:
+        translate (bool): выполнять с трансляцией участков (Machine(translate=True))
+
+    Returns:
+        dict: instructions, seconds, mips, ns_per_instruction
+    """
+    words, data = build()
+    best = None
+    for _ in range(repeat):
+        machine = Machine(translate=translate)
+        load_words(machine, START, words)
+        for adr, values in data.items():
+            load_words(machine, adr, values)
+        machine.reg[7] = START
+        start = time.perf_counter()
+        executed = machine.run()
+        seconds = time.perf_counter() - start
+        if not machine.halted:
+            raise RuntimeError("Benchmark program did not halt")
+        if best is None or seconds < best:
+            best = seconds
+    return {
+        "instructions": executed,
+        "seconds": best,
+        "mips": executed / best / 1e6,
+        "ns_per_instruction": best / executed * 1e9,
+    }
+
+
+def peak_rss_kb():
+    """Пиковый RSS процесса в килобайтах (None, если узнать нельзя)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS - в байтах
+
+
+def run_suite(names=None, repeat=3, translate=False):
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = run_benchmark(BENCHMARKS[name], repeat, translate)
+        results[name]["peak_rss_kb"] = peak_rss_kb()
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "translate": translate,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    Сравнивает ns/команду с прошлым отчетом.
+
+    Returns:
+        list: строки сравнения; замедление больше threshold помечается REGRESSION
+    """
+    lines = []
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = result["ns_per_instruction"] / old["ns_per_instruction"] - 1
+        mark = "  REGRESSION" if change > threshold else ""
+        lines.append(f"{name:>8}: {old['ns_per_instruction']:8.1f} -> "
+                     f"{result['ns_per_instruction']:8.1f} ns/instr ({change:+.1%}){mark}")
+    return lines
+
+
+def print_report(report):
+    for name, result in report["results"].items():
+        print(f"{name:>8}: {result['instructions']:>9} instr  {result['seconds']:.3f} s  "
+              f"{result['mips']:.3f} MIPS  {result['ns_per_instruction']:8.1f} ns/instr")
+    rss = peak_rss_kb()
+    print(f"peak RSS: {rss} KB" if rss is not None else "peak RSS: n/a")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замеры производительности эмулятора PDP-11")
+    parser.add_argument("names", nargs="*",
+                        help=f"замеры для запуска: {', '.join(BENCHMARKS)} (по умолчанию все)")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов каждого замера")
+    parser.add_argument("--translate", action="store_true",
+                        help="выполнять с трансляцией линейных участков")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="допустимое замедление перед пометкой REGRESSION")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    unknown = [name for name in options.names if name not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(unknown)}")
+    report = run_suite(options.names, options.repeat, options.translate)
+    print_report(report)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as file:
+            lines = compare(report, json.load(file), options.threshold)
+        print("\n".join(lines))
+        if any(line.endswith("REGRESSION") for line in lines):
+            sys.exit(1)
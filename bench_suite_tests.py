@@ -0,0 +1,30 @@
+import pytest
+from bench_suite import program_sob, program_modes, program_copy, run_benchmark, compare, sob
+
+
+def test_sob_program():
+    result = run_benchmark(lambda: program_sob(outer=3, inner=10), repeat=1)
+    # 2 mov #, по 3 раза (mov + 10 sob + sob), halt
+    assert result["instructions"] == 1 + 3 * (1 + 10 + 1) + 1
+
+
+def test_modes_program():
+    result = run_benchmark(lambda: program_modes(iterations=4), repeat=1)
+    assert result["instructions"] == 3 + 4 * 12 + 1
+
+
+def test_copy_program():
+    result = run_benchmark(lambda: program_copy(blocks=2, size=8), repeat=1)
+    assert result["instructions"] == 1 + 2 * (3 + 8 * 2 + 1) + 1
+
+
+def test_sob_offset_limit():
+    with pytest.raises(ValueError):
+        sob(0, 64)
+
+
+def test_compare_marks_regression():
+    old = {"results": {"sob": {"ns_per_instruction": 100.0}}}
+    new = {"results": {"sob": {"ns_per_instruction": 150.0}}}
+    assert compare(new, old)[0].endswith("REGRESSION")
+    assert not compare(old, old)[0].endswith("REGRESSION")
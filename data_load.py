@@ -5,25 +5,53 @@
 и вывода дампа памяти в различных форматах.
 
 Основные функции:
-- load_data - загрузка данных из файла в память
+- load_data - загрузка данных из текстового файла в память
+- load_image - загрузка двоичного образа памяти
+- save_image - сохранение участка памяти в двоичный образ
+- load_file - загрузка файла любого из двух форматов (по сигнатуре)
 - mem_dump - вывод дампа памяти в восьмеричном и шестнадцатеричном форматах
 
 Зависимости:
-- Использует функции b_write, w_read и массив mem из модуля pdp_11_mem
+- Использует память Memory из модуля pdp_11_mem (по умолчанию default_memory)
 
 Формат входного файла для load_data:
     Каждый блок данных начинается со строки, содержащей:
     - начальный адрес (в 16-ричном формате)
     - количество байт (в 16-ричном формате)
     Далее следует указанное количество строк с байтами данных (в 16-ричном формате)
+
+Формат двоичного образа (load_image, save_image):
+    Заголовок из 12 байт (little-endian):
+    - сигнатура IMAGE_MAGIC (4 байта)
+    - адрес запуска (2 байта)
+    - адрес загрузки (2 байта)
+    - длина данных в байтах (4 байта)
+    Далее - данные, которые копируются в память с адреса загрузки
+    одной операцией (файл отображается в память через mmap).
+
+Запуск (перевод текстового образа в двоичный):
+    python data_load.py image.pdp.o image.bin [start]
 """
 
-from pdp_11_mem import b_write, mem, w_read
+import mmap
+import os
+import struct
+import sys
+
+import pdp_11_mem
+
+IMAGE_MAGIC = b'P11I'
+IMAGE_HEADER = struct.Struct('<4sHHI')
+DEFAULT_START = 0o1000
+
 
-def load_data(filename):
+def load_data(filename, memory=None):
     """
     Загружает данные в память эмулятора из текстового файла специального формата.
 
+    Строки данных каждого блока переводятся в байты разом (bytes.fromhex)
+    и копируются в память одной операцией.
+
     Формат файла:
         Каждый блок данных состоит из:
         1. Строки с начальным адресом и количеством байт (в 16-ричном формате)
@@ -31,6 +59,11 @@ def load_data(filename):
 
     Args:
         filename (str): Путь к файлу с данными для загрузки
+        memory (Memory): Память, в которую загружаются данные
+            (по умолчанию pdp_11_mem.default_memory)
+
+    Returns:
+        list: блоки (адрес, количество байт) в порядке загрузки
 
     Пример файла:
         40 4       # Записать 4 байта начиная с адреса 0x40
@@ -39,19 +72,117 @@ def load_data(filename):
         56         # Байт 0x56 по адресу 0x42
         78         # Байт 0x78 по адресу 0x43
     """
+    memory = memory if memory is not None else pdp_11_mem.default_memory
     with open(filename, 'r') as file:
-        while True:
-            line = file.readline().strip()
-            if not line:
-                break
+        lines = file.read().splitlines()
+
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            break
+
+        address, n = map(lambda x: int(x, 16), line.split())
+        chunk = lines[i + 1:i + 1 + n]
+        if len(chunk) < n:
+            raise ValueError(f"Block at {address:04x} expects {n} bytes, file has {len(chunk)}")
+        try:
+            data = bytes.fromhex(''.join(chunk))
+        except ValueError:
+            data = b''
+        if len(data) != n:
+            # Байты, записанные одной цифрой, или ошибка в файле - разбираем построчно
+            data = bytes(int(x.strip(), 16) for x in chunk)
+        memory.write_bytes(address, data)
+        blocks.append((address, n))
+        i += 1 + n
+    return blocks
+
+
+def save_image(filename, address, size, start=DEFAULT_START, memory=None):
+    """
+    Сохраняет участок памяти в двоичный образ.
+
+    Args:
+        filename (str): Путь к файлу образа
+        address (int): Адрес начала участка
+        size (int): Размер участка в байтах
+        start (int): Адрес запуска, записываемый в заголовок
+        memory (Memory): Память (по умолчанию pdp_11_mem.default_memory)
+    """
+    memory = memory if memory is not None else pdp_11_mem.default_memory
+    with open(filename, 'wb') as file:
+        file.write(IMAGE_HEADER.pack(IMAGE_MAGIC, start, address, size))
+        file.write(memory.mem[address:address + size])
+
+
+def load_image(filename, memory=None):
+    """
+    Загружает двоичный образ: данные копируются в память одной операцией
+    прямо из отображенного в память файла.
 
-            address, n = map(lambda x: int(x, 16), line.split())
-            for i in range(n):
-                byte = int(file.readline().strip(), 16)
-                b_write(address + i, byte)
+    Args:
+        filename (str): Путь к файлу образа
+        memory (Memory): Память (по умолчанию pdp_11_mem.default_memory)
+
+    Returns:
+        int: адрес запуска из заголовка
+
+    Raises:
+        ValueError: если файл не является образом или обрезан
+    """
+    memory = memory if memory is not None else pdp_11_mem.default_memory
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < IMAGE_HEADER.size:
+            raise ValueError(f"{filename} is not a PDP-11 image")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, start, address, size = IMAGE_HEADER.unpack_from(mapped)
+            if magic != IMAGE_MAGIC:
+                raise ValueError(f"{filename} is not a PDP-11 image")
+            if IMAGE_HEADER.size + size > len(mapped):
+                raise ValueError(f"{filename} is truncated")
+            with memoryview(mapped) as view, view[IMAGE_HEADER.size:IMAGE_HEADER.size + size] as data:
+                memory.write_bytes(address, data)
+    return start
+
+
+def is_image(filename):
+    """Проверяет, начинается ли файл с сигнатуры двоичного образа."""
+    with open(filename, 'rb') as file:
+        return file.read(len(IMAGE_MAGIC)) == IMAGE_MAGIC
+
+
+def load_file(filename, memory=None):
+    """
+    Загружает файл в двоичном или текстовом формате (определяется по сигнатуре).
+
+    Returns:
+        int | None: адрес запуска из двоичного образа, None для текстового файла
+    """
+    if is_image(filename):
+        return load_image(filename, memory)
+    load_data(filename, memory)
+    return None
+
+
+def convert_to_image(text_filename, image_filename, start=DEFAULT_START):
+    """
+    Переводит текстовый файл в двоичный образ.
+
+    Все блоки сохраняются одним участком от наименьшего до наибольшего
+    адреса; промежутки между блоками заполняются нулями.
+    """
+    memory = pdp_11_mem.Memory()
+    blocks = [(address, n) for address, n in load_data(text_filename, memory) if n]
+    if not blocks:
+        raise ValueError(f"{text_filename} has no data")
+    low = min(address for address, _ in blocks)
+    high = max(address + n for address, n in blocks)
+    save_image(image_filename, low, high - low, start, memory)
 
 
-def mem_dump(address, size):
+def mem_dump(address, size, memory=None):
     """
     Выводит дамп памяти в терминал в восьмеричном и шестнадцатеричном форматах.
 
@@ -63,19 +194,20 @@ def mem_dump(address, size):
     Args:
         address (int): Начальный адрес для дампа (в байтах)
         size (int): Количество байт для вывода (дамп будет выровнен по словам)
+        memory (Memory): Память для дампа (по умолчанию pdp_11_mem.default_memory)
 
     Пример вывода:
         000040: 012345 1234  # Адрес 040o, значение 012345o (1234h)
         000042: 056701 5671  # Адрес 042o, значение 056701o (5671h)
     """
+    w_read = (memory if memory is not None else pdp_11_mem.default_memory).w_read
     for i in range(0, size, 2):
         print(f"{address + i:06o}: ", end='')
         print(f"{w_read(address + i):06o}", end=' ')
         print(f"{w_read(address + i):04x}", end='\n')
 
 
-# if __name__ == "__main__":
-#     load_data("tests.txt")
-#     mem_dump(0x40, 20)
-#     print()
-#     mem_dump(0x200, 0x26)
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit("usage: python data_load.py image.pdp.o image.bin [start]")
+    convert_to_image(sys.argv[1], sys.argv[2], int(sys.argv[3], 8) if len(sys.argv) == 4 else DEFAULT_START)
\ No newline at end of file
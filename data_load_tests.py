@@ -1,6 +1,8 @@
 import pytest
-from data_load import load_data
-from pdp_11_mem import w_read
+from data_load import (load_data, load_image, save_image, load_file, convert_to_image,
+                       IMAGE_HEADER, IMAGE_MAGIC)
+from pdp_11_mem import w_read, Memory
+
 
 def test_load_data_single_block(tmp_path):
     # Создаем временный файл с тестовыми данными
@@ -17,6 +19,7 @@ def test_load_data_single_block(tmp_path):
     assert w_read(0x1000) == 0xBBAA
     assert w_read(0x1002) == 0x00CC
 
+
 def test_load_data_multiple_blocks(tmp_path):
     # Создаем временный файл с несколькими блоками данных
     test_data = """1000 3
@@ -34,4 +37,59 @@ def test_load_data_multiple_blocks(tmp_path):
 
     assert w_read(0x1000) == 0xBBAA
     assert w_read(0x1002) == 0x00CC
-    assert w_read(0x2000) == 0xEEDD
\ No newline at end of file
+    assert w_read(0x2000) == 0xEEDD
+
+
+def test_load_data_single_digit_bytes(tmp_path):
+    # Байты, записанные одной цифрой, тоже должны читаться
+    test_file = tmp_path / "test_file.txt"
+    test_file.write_text("1000 4\na\nb\ncc\n0\n")
+
+    assert load_data(str(test_file)) == [(0x1000, 4)]
+
+    assert w_read(0x1000) == 0x0B0A
+    assert w_read(0x1002) == 0x00CC
+
+
+def test_load_data_truncated_block(tmp_path):
+    test_file = tmp_path / "test_file.txt"
+    test_file.write_text("1000 3\nAA\n")
+
+    with pytest.raises(ValueError):
+        load_data(str(test_file))
+
+
+def test_binary_image_round_trip(tmp_path):
+    source = Memory()
+    source.write_bytes(0o1000, bytes(range(200)))
+    image = tmp_path / "image.bin"
+    save_image(str(image), 0o1000, 200, start=0o1004, memory=source)
+
+    memory = Memory()
+    assert load_image(str(image), memory) == 0o1004
+    assert memory.mem[0o1000:0o1000 + 200] == bytes(range(200))
+    assert memory.mem[0o1000 + 200] == 0
+
+
+def test_load_file_detects_format(tmp_path):
+    text = tmp_path / "image.pdp.o"
+    text.write_text("0200 0002\nc0\n15\n")
+    binary = tmp_path / "image.bin"
+    convert_to_image(str(text), str(binary))
+
+    memory = Memory()
+    assert load_file(str(text), memory) is None
+    assert load_file(str(binary), memory) == 0o1000
+    assert memory.w_read(0o1000) == 0o012700
+
+
+def test_load_image_rejects_bad_files(tmp_path):
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"XXXX" + bytes(20))
+    with pytest.raises(ValueError):
+        load_image(str(bad), Memory())
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(IMAGE_HEADER.pack(IMAGE_MAGIC, 0o1000, 0o1000, 100) + bytes(10))
+    with pytest.raises(ValueError):
+        load_image(str(truncated), Memory())
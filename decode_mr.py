@@ -1,36 +1,31 @@
-import pyparsing as pp
+"""
+Разбор операнда PDP-11 (режим и регистр) грамматикой pyparsing.
 
+Модуль можно импортировать без побочных эффектов: pyparsing загружается
+при первом вызове mode_reg(). Запуск модуля проверяет грамматику на примерах
+(runTests).
+"""
 
-# .venv\Scripts\activate
-def to3bit(x):
-    res = str(bin(int(x))[2:])
-    while len(res) < 3:
-        res = '0' + res
-    return res
-
+from pdp_11_asm import mr_code
 
-def to_four_digit_hex_number(x):
-    res = str(hex(int(x)))[2:]
-    while len(res) < 4:
-        res = '0' + res
-    return res
 
+# .venv\Scripts\activate
 
 # Пока без label (лейблы могут быть, но они никак не обрабатываются и не записываются в машинный код)
 
 command_description = {
     # Однобайтовые команды
     'halt': {
-        'opcode': '0' * 16,  # Код операции MOV (в hex)
+        'opcode': 0o000000,  # код операции HALT
         'args': []
     },
     # Двухадресные команды
     'mov': {
-        'opcode': '0001',
+        'opcode': 0o010000,
         'args': ['mr', 'mr']  # ss = mr, dd = mr - mode, register
     },
     'add': {
-        'opcode': '0110',
+        'opcode': 0o060000,
         'args': ['mr', 'mr']
     },
 }
@@ -40,44 +35,40 @@ def get_command_by_name(name):
     return command_description[name]
 
 
-def to16bit(x):
-    res = bin(x)[2:]
-    while len(res) < 16:
-        res = '0' + res
-    return res
-
-
-def from8to10(s):
-    x = 0
-    s = s[::-1]
-    for i in range(len(s)):
-        x += int(s[i]) * 8 ** i
-    return x
-
-
-def from8to16bit(s):
-    return to16bit(from8to10(s))
-
-
-mode_reg = (
-        pp.Regex(r'^R[1-7]$').setParseAction(lambda t: f'000{to3bit(t[0][1])}')('code') |  # R3, mode = '000'
-        pp.Regex(r'^\(R[1-7]\)$').setParseAction(lambda t: f'001{to3bit(t[0][2])}')('code') |  # (R3), mode = '001'
-        pp.Regex(r'^\(R[1-7]\)\+$').setParseAction(lambda t: f'010{to3bit(t[0][2])}')('code') |  # (R3)+, mode = '010'
-        pp.Regex(r'^@\(R[1-7]\)\+$').setParseAction(lambda t: f'011{to3bit(t[0][3])}')('code') |  # @(R3)+, mode = '011'
-        pp.Regex(r'^-\(R[1-7]\)$').setParseAction(lambda t: f'100{to3bit(t[0][3])}')('code') |  # -(R3), mode = '100'
-        pp.Regex(r'^@-\(R[1-7]\)$').setParseAction(lambda t: f'101{to3bit(t[0][4])}')('code') |  # @-(R3), mode = '101',
-        pp.Regex(r'^[1-7]+\(R[1-7]\)$').setParseAction(lambda t: f'110{to3bit(t[0][-2]) + from8to16bit(t[0][:-4])}')('code') |  # 2(R3), mode = '110'
-        pp.Regex(r'^@[1-7]+\(R[1-7]\)$').setParseAction(lambda t: f'111{to3bit(t[0][-2]) + from8to16bit(t[0][1:-4])}')('code') |  # @2(R3), mode = '111'
-        pp.Regex(r'^#[0-7]+$').setParseAction(lambda t: f'010111{from8to16bit(t[0][1:])}')('code') |  # #3, mode = '010'
-        pp.Regex(r'^@#[0-7]+').setParseAction(lambda t: f'011111{from8to16bit(t[0][2:])}')('code') |  # @#100, mode = '011'
-        pp.Regex(r'^[0-7]+').setParseAction(lambda t: f'110111{from8to16bit(t[0])}')('code') |  # 100, mode = '110'
-        pp.Regex(r'^@[0-7]+').setParseAction(lambda t: f'111111{from8to16bit(t[0][1:])}')('code')  # @100, mode = '111'
-
-)
-# runtests!
-
-
-mode_reg.runTests('''
+_mode_reg = None
+
+
+def mode_reg():
+    """
+    Правило разбора операнда (строится при первом вызове, тогда же импортируется pyparsing).
+
+    Результат разбора - список целых: [mode << 3 | register]
+    или [mode << 3 | register, дополнительное слово].
+    """
+    global _mode_reg
+    if _mode_reg is None:
+        import pyparsing as pp
+
+        _mode_reg = (
+            pp.Regex(r'^R[1-7]$').setParseAction(lambda t: [mr_code(0, int(t[0][1]))])('code') |  # R3, mode = 0
+            pp.Regex(r'^\(R[1-7]\)$').setParseAction(lambda t: [mr_code(1, int(t[0][2]))])('code') |  # (R3), mode = 1
+            pp.Regex(r'^\(R[1-7]\)\+$').setParseAction(lambda t: [mr_code(2, int(t[0][2]))])('code') |  # (R3)+, mode = 2
+            pp.Regex(r'^@\(R[1-7]\)\+$').setParseAction(lambda t: [mr_code(3, int(t[0][3]))])('code') |  # @(R3)+, mode = 3
+            pp.Regex(r'^-\(R[1-7]\)$').setParseAction(lambda t: [mr_code(4, int(t[0][3]))])('code') |  # -(R3), mode = 4
+            pp.Regex(r'^@-\(R[1-7]\)$').setParseAction(lambda t: [mr_code(5, int(t[0][4]))])('code') |  # @-(R3), mode = 5
+            pp.Regex(r'^[1-7]+\(R[1-7]\)$').setParseAction(lambda t: [mr_code(6, int(t[0][-2])), int(t[0][:-4], 8)])('code') |  # 2(R3), mode = 6
+            pp.Regex(r'^@[1-7]+\(R[1-7]\)$').setParseAction(lambda t: [mr_code(7, int(t[0][-2])), int(t[0][1:-4], 8)])('code') |  # @2(R3), mode = 7
+            pp.Regex(r'^#[0-7]+$').setParseAction(lambda t: [mr_code(2, 7), int(t[0][1:], 8)])('code') |  # #3, mode = 2
+            pp.Regex(r'^@#[0-7]+').setParseAction(lambda t: [mr_code(3, 7), int(t[0][2:], 8)])('code') |  # @#100, mode = 3
+            pp.Regex(r'^[0-7]+').setParseAction(lambda t: [mr_code(6, 7), int(t[0], 8)])('code') |  # 100, mode = 6
+            pp.Regex(r'^@[0-7]+').setParseAction(lambda t: [mr_code(7, 7), int(t[0][1:], 8)])('code')  # @100, mode = 7
+        )
+    return _mode_reg
+
+
+def main():
+    rule = mode_reg()
+    rule.runTests('''
 R7
 (R3)
 (R3)+
@@ -91,7 +82,11 @@ R7
 100
 @100
 ''')
-print()
-print("Отдельно для #100 - потому что в runtests это считывается как комментарий из-за значка # в начале строки")
-res = mode_reg.parseString('#100')
-print(res)
+    print()
+    print("Отдельно для #100 - потому что в runtests это считывается как комментарий из-за значка # в начале строки")
+    res = rule.parseString('#100')
+    print(res)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,67 @@
-import pyparsing as pp
+"""
+Простой ассемблер PDP-11 на грамматике pyparsing (mov, add, halt; без меток).
 
-# Улучшенные определения элементов
-identifier = pp.Word(pp.alphas, pp.alphanums + "_")
-mnemonic = pp.oneOf("mov add sub halt", caseless=True)  # Список команд
-command_name = mnemonic("command")
+Модуль можно импортировать без побочных эффектов: pyparsing загружается
+и грамматика строится при первом разборе строки (grammar). Полный
+двухпроходный ассемблер с метками - pdp_11_asm.
 
-# Числа: #10 или 10 (целые)
-number = pp.Combine(pp.Optional('#') + pp.Word(pp.nums))
-# Регистры: r0, r1, ..., r15
-register = pp.Combine(pp.CaselessLiteral('r') + pp.Word(pp.nums, max=2))
-argument = number | register | identifier
-arguments = pp.Group(pp.delimitedList(argument, delim=pp.Suppress(',')))("args")
+Функции:
+- grammar: правило разбора строки (строится один раз).
+- parse_line: разбор строки в словарь.
+- parse_source: разбор текста программы.
+- decode_mr_arg, cmd_to_raw_machine_code: кодирование операнда и команды.
+- asm_to_binary_code: участки памяти [адрес, bytearray].
 
-label = (identifier + pp.Suppress(":"))("label")
-comment = (pp.Suppress(';') + pp.restOfLine.setParseAction(lambda t: t[0].strip()))("comment")
+Запуск:
+    python from_asm_to_machine_code_2.py [asm_code.txt] [-v]
+"""
 
-# Основное правило
-rule = (
-    pp.Optional(label, default='')
-    + pp.Optional(command_name, default='')
-    + pp.Optional(arguments, default=[])
-    + pp.Optional(comment, default='')
-)
+import argparse
+import struct
 
-debug_mode = False
+from pdp_11_asm import mr_code
+
+WORD = struct.Struct('<H')
+
+_rule = None
+
+
+def grammar():
+    """Строит правило разбора строки при первом вызове (и импортирует pyparsing)."""
+    global _rule
+    if _rule is None:
+        import pyparsing as pp
+
+        # Улучшенные определения элементов
+        identifier = pp.Word(pp.alphas, pp.alphanums + "_")
+        mnemonic = pp.oneOf("mov add sub halt", caseless=True)  # Список команд
+        command_name = mnemonic("command")
+
+        # Числа: #10 или 10 (целые)
+        number = pp.Combine(pp.Optional('#') + pp.Word(pp.nums))
+        # Регистры: r0, r1, ..., r15
+        register = pp.Combine(pp.CaselessLiteral('r') + pp.Word(pp.nums, max=2))
+        argument = number | register | identifier
+        arguments = pp.Group(pp.delimitedList(argument, delim=pp.Suppress(',')))("args")
+
+        label = (identifier + pp.Suppress(":"))("label")
+        comment = (pp.Suppress(';') + pp.restOfLine.setParseAction(lambda t: t[0].strip()))("comment")
+
+        # Основное правило
+        _rule = (
+            pp.Optional(label, default='')
+            + pp.Optional(command_name, default='')
+            + pp.Optional(arguments, default=[])
+            + pp.Optional(comment, default='')
+        )
+    return _rule
 
 def parse_line(s):
     s = s.lower().strip()
     if s[0] == '.':
         s = s.replace(" ", "")
         return {'label': '', 'command_name': 'start_from_address', 'arguments': [ s[2:] ], 'comment': ''}
-    parsed = rule.parseString(s, parseAll=True)
+    parsed = grammar().parseString(s, parseAll=True)
     args = []
     if len(parsed.args) != 0:
         args = parsed.args.asList()
@@ -48,45 +79,26 @@ def parse_line(s):
     }
     return result
 
-assembler_code = []
-blocks = []
-dict_machine_code = {'start': '', 'data': []}
-
-filename = 'asm_code.txt'
-with open(filename, 'r', encoding='utf-8') as file:
-    for line in file:
-        line = line.lower().strip()
-        assembler_code.append(parse_line(line))
-
-print("assembler_code:", assembler_code)
-
-def to3bit(x):
-    res = str(bin(int(x))[2:])
-    while len(res) < 3:
-        res = '0' + res
-    return res
-
-def to_four_digit_hex_number(x):
-    res = str(hex(int(x)))[2:]
-    while len(res) < 4:
-        res = '0' + res
-    return res
+def parse_source(text):
+    """Разбирает непустые строки текста программы (список словарей parse_line)."""
+    return [parse_line(line) for line in text.splitlines() if line.strip()]
 
 #Пока без label (лейблы могут быть, но они никак не обрабатываются и не записываются в машинный код)
+# (двухпроходный ассемблер с метками - pdp_11_asm.assemble)
 
 command_description = {
     # Однобайтовые команды
     'halt': {
-        'opcode': '0' * 16,  #Код операции MOV (в hex)
+        'opcode': 0o000000,  # код операции HALT
         'args': []
     },
     # Двухадресные команды
     'mov': {
-        'opcode': '0001',
+        'opcode': 0o010000,
         'args': ['mr', 'mr']  #ss = mr, dd = mr - mode, register
     },
     'add': {
-        'opcode': '0110',
+        'opcode': 0o060000,
         'args': ['mr', 'mr']
     },
 }
@@ -94,158 +106,89 @@ command_description = {
 def get_command_by_name(name):
     return command_description[name]
 
-def to16bit(x):
-    res = bin(x)[2:]
-    while len(res) < 16:
-        res = '0' + res
-    return res
-
-def from8to10(s):
-    x = 0
-    s = s[::-1]
-    for i in range(len(s)):
-        x += int(s[i]) * 8**i
-    return x
-
-def from8to16bit(s):
-    return  to16bit(from8to10(s))
-
 def decode_mr_arg(arg):
     """
-    :param arg:
-    :return:
-    только для ss и dd: mode, register
+    Кодирует операнд ss или dd целыми числами.
+
+    :param arg: текст операнда ('r3', '#100', '2(r3)' и т.д.)
+    :return: (6 бит mode << 3 | register, дополнительное слово или None)
     """
-    additional_word = ''
-    mode = ''
-    register = ''
     if arg[0] == 'r': # R3
-        mode = '000'
-        register = to3bit(arg[1])
-    elif  arg[0] == '(' and arg[-1] == ')': # (R3)
-        mode = '001'
-        register = to3bit(arg[2])
-    elif arg[0] == '(' and arg[-1] == '+': # (R3)+
-        mode = '010'
-        register = to3bit(arg[2])
-    elif arg[0] == '@' and arg[-1] == '+': # @(R3)+
-        mode = '011'
-        register = to3bit(arg[3])
-    elif arg[0] == '-':  # -(R3)
-        mode = '100'
-        register = to3bit(arg[3])
-    elif arg[0] == '@' and arg[1] == '-': # @-(R3)
-        mode = '101'
-        register = to3bit(arg[4])
-    elif arg[0] == '@' and arg[-1] == ')': # @2(R3)
-        mode = '111'
-        register = to3bit(arg[-2])
-        additional_word = from8to16bit(arg[1:-4])
-    elif arg[0] in '01234567' and arg[-1] == ')': # 2(R3)
-        mode = '110'
-        register = to3bit(arg[-2])
-        additional_word = from8to16bit(arg[:-4])
-    elif arg[0] == '#': # #3
-        mode = '010'
-        register = '111'
-        additional_word = from8to16bit(arg[1:])
-    elif arg[0] == '@' and arg[1] == '#': # @#100
-        mode = '011'
-        register = '111'
-        additional_word = from8to16bit(arg[2:])
-    elif arg[0] == '@' and arg[1] != '#': # @100
-        mode = '111'
-        register = '111'
-        additional_word = from8to16bit(arg[1:])
-    elif arg[0] in '01234567': # 100
-        mode = '110'
-        register = '111'
-        additional_word = from8to16bit(arg)
-    code_arg = mode + register
-    return code_arg, additional_word
-
-#на случай # у нас есть переменные additional...
-def cmd_to_raw_machine_code(command, start_address=None):
+        return mr_code(0, int(arg[1])), None
+    if arg[0] == '(' and arg[-1] == ')': # (R3)
+        return mr_code(1, int(arg[2])), None
+    if arg[0] == '(' and arg[-1] == '+': # (R3)+
+        return mr_code(2, int(arg[2])), None
+    if arg[0] == '@' and arg[-1] == '+': # @(R3)+
+        return mr_code(3, int(arg[3])), None
+    if arg[0] == '-':  # -(R3)
+        return mr_code(4, int(arg[3])), None
+    if arg[0] == '@' and arg[1] == '-': # @-(R3)
+        return mr_code(5, int(arg[4])), None
+    if arg[0] == '@' and arg[-1] == ')': # @2(R3)
+        return mr_code(7, int(arg[-2])), int(arg[1:-4], 8)
+    if arg[0] in '01234567' and arg[-1] == ')': # 2(R3)
+        return mr_code(6, int(arg[-2])), int(arg[:-4], 8)
+    if arg[0] == '#': # #3
+        return mr_code(2, 7), int(arg[1:], 8)
+    if arg[0] == '@' and arg[1] == '#': # @#100
+        return mr_code(3, 7), int(arg[2:], 8)
+    if arg[0] == '@': # @100
+        return mr_code(7, 7), int(arg[1:], 8)
+    if arg[0] in '01234567': # 100
+        return mr_code(6, 7), int(arg, 8)
+    raise ValueError(f"Bad operand {arg}")
+
+def cmd_to_raw_machine_code(command):
     """
-    Перевод {'label': 'label1', 'command_name': 'mov', 'arguments': ['#3', 'r1'], 'comment': 'comment2'}
-     в ['0001010111000001', '0003'], только вмсто 0003 тавим 16 бит которые соответствуют 0003 или как? в принципеможно просто
-     0003 оставить и потом просто на длину смотртеь? было бы прощ
+    Перевод {'label': 'label1', 'command_name': 'mov', 'arguments': ['#2', 'r0'], 'comment': 'comment2'}
+    в слова [0o012700, 2]: код операции | (ss << 6) | dd и дополнительные слова.
     """
-
-    """
-        Перевод ['mov', '#2', 'r0'] в [0o012700, 2]
-        """
-    # по имени команды записываешь в результирующее слово опкод команды
-    print("command:", command)
-    command_name = command['command_name']
-    if command_name == 'start_from_address':
-        return [command['arguments'][0], 'num_of_bytes_in_file']
-
-    cmd = get_command_by_name(command_name)
-    """return {
-        'opcode': '1000',
-        'args': ['ss', 'dd'],  # source, destination
-    }"""
-    parse_args = command['arguments'] #['#2', 'r1']
-    command_code = cmd['opcode']
+    cmd = get_command_by_name(command['command_name'])
+    word = cmd['opcode']
     additional_words = []
-    for arg, parse_arg in zip(cmd['args'], parse_args):
-        # arg='mr', parse_arg='#2'
-        code_arg = ''
-        additional_word = ''
-        match arg:
-            case 'mr':
-                code_arg, additional_word = decode_mr_arg(parse_arg)
-                command_code += code_arg
-                if additional_word != '':
-                    additional_words.append(additional_word)
-            # code_arg = '010111'  27
-            # additional_word = '...'   2  вот тут может быть использование лейбла и его посчитаем во второй проход
-            # code_arg добавляем в кодировку текущей команды
-            # если дополнительное слово есть, его присоедняем к списку слов
-    res = [command_code]
-    for w in additional_words:
-        res.append(w)
-    print("return:", res)
-    return res
+    shift = 6 * (len(cmd['args']) - 1)  # первый операнд - ss (биты 6-11), второй - dd
+    for arg, parse_arg in zip(cmd['args'], command['arguments']):
+        if arg == 'mr':
+            code, additional_word = decode_mr_arg(parse_arg)
+            word |= code << shift
+            if additional_word is not None:
+                additional_words.append(additional_word & 0xFFFF)
+        shift -= 6
+    return [word] + additional_words
 
 def asm_to_binary_code(asm_code):
-    res = []
+    """
+    Кодирует строки в участки памяти: пары [адрес, bytearray].
+    Директива '. = адрес' начинает новый участок.
+    """
+    segments = []
     for line in asm_code:
-        bin_numbers = cmd_to_raw_machine_code(line)
-        for bin_num in bin_numbers:
-            res.append(bin_num)
-    return res
-
-binary_code = asm_to_binary_code(assembler_code)
-print("binary_code:", binary_code)
-
-def from2to10(s):
-    s = s[::-1]
-    x = 0
-    for i in range(len(s)):
-        x += int(s[i]) * 2**i
-    return x
-
-def bits_to_bytes(bin_command_code):
-    piece1 = bin_command_code[:4]
-    piece2 = bin_command_code[4:8]
-    piece3 = bin_command_code[8:12]
-    piece4 = bin_command_code[12:]
-    # print("pieces", piece1, piece2, piece3, piece4)
-    num1 = hex(int(piece1, 2))[2:] + hex(int(piece2, 2))[2:]
-    num2 = hex(int(piece3, 2))[2:] + hex(int(piece4, 2))[2:]
-    machine_command = [num2, num1]
-    return machine_command
-
-
-machine_code = []
-for line in binary_code:
-    if len(line) != 16:
-        machine_code.append(line)
-        continue
-    byte1, byte2 = bits_to_bytes(line)
-    machine_code.append(byte1)
-    machine_code.append(byte2)
-print("machine_code:", machine_code)
-
+        if line['command_name'] == 'start_from_address':
+            segments.append([int(line['arguments'][0], 8), bytearray()])
+            continue
+        if line['command_name'] == '':
+            continue
+        if not segments:
+            segments.append([0, bytearray()])
+        data = segments[-1][1]
+        for word in cmd_to_raw_machine_code(line):
+            data += WORD.pack(word)
+    return segments
+
+def main():
+    parser = argparse.ArgumentParser(description="Простой ассемблер PDP-11 (pyparsing)")
+    parser.add_argument("source", nargs="?", default="asm_code.txt", help="файл с текстом программы")
+    parser.add_argument("-v", "--verbose", action="store_true", help="вывести разобранные строки")
+    options = parser.parse_args()
+
+    with open(options.source, 'r', encoding='utf-8') as file:
+        assembler_code = parse_source(file.read())
+    if options.verbose:
+        print("assembler_code:", assembler_code)
+    segments = asm_to_binary_code(assembler_code)
+    print("segments:", [(f"{address:06o}", data.hex(" ")) for address, data in segments])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,133 @@
-from pdp_11_mem import w_read, reg
-from pdp_11_commands import commands, ArgsProcessor
-from data_load import load_data
+import argparse
 
+from pdp_11_mem import Memory, AccessCounts
+from pdp_11_machine import Machine
+from pdp_11_commands import reg_dump
+from pdp_11_devices import Console
+from pdp_11_profile import Profiler
+from pdp_11_debug import Debugger
+from pdp_11_trace import TRACE_MODES, make_tracer
 
-def main():
-    load_data("integral_tests/02_sob.pdp.o")
 
-    reg[7] = 0o1000
+def main(filename="integral_tests/02_sob.pdp.o", tracer=None, show_stats=False,
+         restore=None, save_snapshot=None, max_instructions=None, console_input=None,
+         profile=None, translate=False, breakpoints=(), watchpoints=(), heatmap=None):
+    memory = Memory()
+    counts = memory.count_accesses(AccessCounts()) if heatmap else None
+    machine = Machine(memory, translate=translate)
+    console = machine.add_device(Console())
+    if console_input is not None:
+        console.load_input(console_input)
+    if restore is not None:
+        machine.load_snapshot(restore)
+    else:
+        machine.load(filename)
+    machine.tracer = tracer
+    if tracer is not None:
+        tracer.bind(machine)
+    if profile or heatmap:
+        machine.profiler = Profiler()  # для карты обращений - выборки команд
+    if breakpoints or watchpoints:
+        machine.debugger = Debugger(machine)
+        for pc in breakpoints:
+            machine.debugger.add_breakpoint(pc)
+        for adr, size in watchpoints:
+            machine.debugger.add_watchpoint(adr, size)
+
     print("---------------- running --------------")
+    try:
+        if heatmap:
+            run_windows(machine, counts, heatmap, max_instructions)
+        else:
+            machine.run(max_instructions)
+    finally:
+        if tracer is not None:
+            tracer.close()
+
+    if machine.halted:
+        print("---------------- halted ---------------")
+    elif machine.debugger is not None and machine.debugger.hit is not None:
+        print(f"---------------- {machine.debugger.describe()}")
+    else:
+        print("---------------- stopped --------------")
+    reg_dump(machine.reg)
+    if save_snapshot is not None:
+        machine.save_snapshot(save_snapshot)
+    if show_stats:
+        print(f"executed: {machine.instructions} instructions, {machine.cycles} bus cycles")
+        print("icache:", machine.icache.stats())
+        if machine.translator is not None:
+            print("translator:", machine.translator.stats())
+    if profile:
+        print(machine.profiler.report(machine.memory.fetch, profile))
+    if heatmap:
+        print(counts.report())
+
+
+def run_windows(machine, counts, window, max_instructions=None):
+    """
+    Выполняет программу окнами по window команд и после каждого окна
+    запоминает размер рабочего набора (AccessCounts.sample).
+    """
+    remaining = max_instructions
+    while remaining is None or remaining > 0:
+        done = machine.run(window if remaining is None else min(window, remaining))
+        counts.sample(machine.profiler.counts)
+        if remaining is not None:
+            remaining -= done
+        if machine.status != 'budget':
+            break
 
-    args = ArgsProcessor()
-    while True:
-        word = w_read(reg[7])
-        print(f"{reg[7]:06o}:", end=" ")
-        reg[7] += 2
 
-        for cmd in commands:
-            if (word & cmd["mask"]) == cmd["opcode"]:
-                print(cmd["name"], end=" ")
+def parse_watchpoint(text):
+    """Разбирает точку наблюдения АДРЕС[:РАЗМЕР] (восьмеричные числа)."""
+    adr, _, size = text.partition(":")
+    return int(adr, 8), int(size, 8) if size else 2
 
-                args.process(cmd["params"], word)
 
-                cmd["handler"](args)
-                print()
-                break
+def parse_args():
+    parser = argparse.ArgumentParser(description="Эмулятор PDP-11")
+    parser.add_argument("image", nargs="?", default="integral_tests/02_sob.pdp.o",
+                        help="файл с образом памяти или с текстом программы на ассемблере (.s, .asm, .mac)")
+    parser.add_argument("--trace", choices=TRACE_MODES, default="text",
+                        help="трассировка: off - только итоговые регистры, text - в stdout, file - в файл, "
+                             "ring - последние команды в двоичный файл (см. pdp_11_trace.py)")
+    parser.add_argument("--trace-file", default=None,
+                        help="файл для --trace file (trace.txt) и --trace ring (trace.bin)")
+    parser.add_argument("--trace-size", type=int, default=1 << 20,
+                        help="число последних команд для --trace ring")
+    parser.add_argument("--stats", action="store_true",
+                        help="вывести статистику кэша декодированных команд")
+    parser.add_argument("--max-instructions", type=int, default=None,
+                        help="остановиться после указанного числа команд")
+    parser.add_argument("--save-snapshot", metavar="FILE",
+                        help="сохранить состояние машины после остановки")
+    parser.add_argument("--restore", metavar="FILE",
+                        help="начать с сохраненного состояния вместо образа")
+    parser.add_argument("--input", metavar="FILE",
+                        help="входные данные для консоли (DL11)")
+    parser.add_argument("--profile", metavar="N", type=int, nargs="?", const=10, default=None,
+                        help="профилировать выполнение и показать N горячих мест (по умолчанию 10)")
+    parser.add_argument("--translate", action="store_true",
+                        help="транслировать линейные участки кода в функции Python "
+                             "(работает при --trace off и без --profile)")
+    parser.add_argument("--break", dest="breakpoints", metavar="ADDR", action="append",
+                        type=lambda text: int(text, 8), default=[],
+                        help="остановиться перед командой по восьмеричному адресу (можно несколько раз)")
+    parser.add_argument("--watch", dest="watchpoints", metavar="ADDR[:SIZE]", action="append",
+                        type=parse_watchpoint, default=[],
+                        help="остановиться после записи в память по адресу (размер в байтах, "
+                             "восьмеричный, по умолчанию 2)")
+    parser.add_argument("--heatmap", metavar="N", type=int, nargs="?", const=10000, default=None,
+                        help="считать обращения к памяти по страницам и рабочий набор по окнам "
+                             "из N команд (по умолчанию 10000)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    options = parse_args()
+    trace_file = options.trace_file or ("trace.bin" if options.trace == "ring" else "trace.txt")
+    main(options.image, make_tracer(options.trace, trace_file, options.trace_size), options.stats,
+         options.restore, options.save_snapshot, options.max_instructions, options.input,
+         options.profile, options.translate, options.breakpoints, options.watchpoints,
+         options.heatmap)
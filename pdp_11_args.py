@@ -13,7 +13,12 @@
 
 Основные функции:
 - get_mr: Разбирает режим адресации и возвращает объект ModeRegistrArg.
+- make_resolvers: Функции вычисления операнда по номеру режима для регистров
+  и памяти одной машины; заполняют переиспользуемый ModeRegistrArg без
+  создания новых объектов (MODE_RESOLVERS - для машины по умолчанию).
 - process: Обрабатывает слово команды и извлекает аргументы.
+- format_mr, format_args: Текст операндов для дизассемблера и трассировки
+  (разбор аргументов сам ничего не форматирует и не печатает).
 
 Режимы адресации:
 - 0: Регистровый (R)
@@ -26,7 +31,10 @@
 - 7: Индексный косвенный @X(R)
 """
 
-from pdp_11_mem import reg, w_write, b_write, w_read
+import pdp_11_mem
+from pdp_11_mem import w_read
+from pdp_11_psw import PSW
+
 
 class ModeNotIplementedError(Exception):
     """Исключение, вызываемое при использовании неподдерживаемого режима адресации."""
@@ -34,32 +42,143 @@ class ModeNotIplementedError(Exception):
 
 
 class ModeRegistrArg:
-    """Класс для представления аргумента команды с учетом режима адресации."""
+    """
+    Класс для представления аргумента команды с учетом режима адресации.
+
+    Аргумент знает регистры и память своей машины (по умолчанию - машины
+    по умолчанию из pdp_11_mem), поэтому write пишет именно в них.
+    """
 
-    def __init__(self, address: int, value: int, is_register: bool = False):
+    __slots__ = ('address', 'value', 'is_register', 'reg', 'memory')
+
+    def __init__(self, address: int, value: int, is_register: bool = False, reg=None, memory=None):
         self.address = address
         self.value = value
         self.is_register = is_register
+        self.reg = reg if reg is not None else pdp_11_mem.reg
+        self.memory = memory if memory is not None else pdp_11_mem.default_memory
 
     def write(self, value: int, is_word: bool = True):
         """Записывает значение по адресу с учетом типа (регистр/память) и размера (слово/байт)."""
         if self.is_register:
-            reg[self.address] = value & 0xFFFF
+            self.reg[self.address] = value & 0xFFFF
         else:
             if is_word:
-                w_write(self.address, value)
+                self.memory.w_write(self.address, value)
             else:
-                b_write(self.address, value)
+                self.memory.b_write(self.address, value)
+
+
+def make_resolvers(reg, memory):
+    """
+    Создает функции вычисления операнда, по одной на режим адресации,
+    привязанные к регистрам reg и памяти memory одной машины.
+
+    Каждая функция resolver(arg, r, need_value) заполняет переданный объект
+    arg на месте и возвращает его. Если need_value ложно (приемник только
+    записывается, как в mov и clr), значение из памяти не читается
+    и arg.value остается None.
+
+    Returns:
+        tuple: функции для режимов 0-7 (индекс - номер режима)
+    """
+    w_read = memory.w_read
+
+    def mode0(arg, r, need_value):  # Регистровый
+        arg.address = r
+        arg.value = reg[r]
+        arg.is_register = True
+        return arg
+
+    def mode1(arg, r, need_value):  # Косвенный регистровый
+        addr = reg[r]
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode2(arg, r, need_value):  # Автоинкрементный (для PC - непосредственный)
+        addr = reg[r]
+        reg[r] = addr + 2
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode3(arg, r, need_value):  # Автоинкрементный косвенный
+        ptr = reg[r]
+        reg[r] = ptr + 2
+        addr = w_read(ptr)
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode4(arg, r, need_value):  # Автодекрементный
+        addr = reg[r] - 2
+        reg[r] = addr
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode5(arg, r, need_value):  # Автодекрементный косвенный
+        ptr = reg[r] - 2
+        reg[r] = ptr
+        addr = w_read(ptr)
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode6(arg, r, need_value):  # Индексный
+        offset = w_read(reg[7])
+        reg[7] += 2
+        addr = (reg[r] + offset) & 0xFFFF
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    def mode7(arg, r, need_value):  # Индексный косвенный
+        offset = w_read(reg[7])
+        reg[7] += 2
+        addr = w_read((reg[r] + offset) & 0xFFFF)
+        arg.address = addr
+        arg.value = w_read(addr) if need_value else None
+        arg.is_register = False
+        return arg
+
+    return mode0, mode1, mode2, mode3, mode4, mode5, mode6, mode7
+
+
+MODE_RESOLVERS = make_resolvers(pdp_11_mem.reg, pdp_11_mem.default_memory)
 
 
 class ArgsProcessor:
-    """Класс для обработки аргументов команд и режимов адресации."""
-    def __init__(self):
+    """
+    Класс для обработки аргументов команд и режимов адресации.
+
+    Операнды ss и dd не создаются заново для каждой команды: process и
+    process_decoded заполняют два постоянных объекта ss_slot и dd_slot.
+    Обработчик команды не должен сохранять их между командами.
+
+    Через поля reg, memory, psw и machine обработчики команд получают доступ
+    к состоянию своей машины.
+    """
+    def __init__(self, reg=None, memory=None, machine=None, psw=None):
         self.ss = None
         self.dd = None
         self.nn = None
         self.xx = None
         self.r = None
+        self.reg = reg if reg is not None else pdp_11_mem.reg
+        self.memory = memory if memory is not None else pdp_11_mem.default_memory
+        self.machine = machine
+        self.psw = psw if psw is not None else PSW()
+        self.resolvers = make_resolvers(self.reg, self.memory)
+        self.ss_slot = ModeRegistrArg(0, 0, False, self.reg, self.memory)
+        self.dd_slot = ModeRegistrArg(0, 0, False, self.reg, self.memory)
 
     def clear(self):
         self.ss = None
@@ -71,7 +190,7 @@ class ArgsProcessor:
     @staticmethod
     def get_mr(w) -> ModeRegistrArg:
         """
-        Разбирает режим адресации и возвращает объект ModeRegistrArg.
+        Разбирает режим адресации и возвращает новый объект ModeRegistrArg.
 
         Args:
             w (int): Слово, содержащее номер регистра (младшие 3 бита)
@@ -79,99 +198,142 @@ class ArgsProcessor:
 
         Returns:
             ModeRegistrArg: объект, содержащий адрес и значение
+        """
+        return ArgsProcessor.resolve((w >> 3) & 7, w & 7)
+
+    @staticmethod
+    def resolve(mode, r) -> ModeRegistrArg:
+        """
+        Вычисляет операнд по уже разобранным режиму и номеру регистра.
+
+        Args:
+            mode (int): режим адресации (0-7)
+            r (int): номер регистра (0-7)
+
+        Returns:
+            ModeRegistrArg: новый объект, содержащий адрес и значение
 
         Raises:
             ModeNotIplementedError: если указан неподдерживаемый режим адресации
         """
-        r = w & 7
-        mode = (w >> 3) & 7
-        addr, value = 0, 0
-        is_register = False
-
-        if mode == 0:  # Регистровый
-            addr = r
-            value = reg[r]
-            is_register = True
-            print(f'r{r}', end=' ')
-
-        elif mode == 1:  # Косвенный регистровый
-            addr = reg[r]
-            if addr % 2 != 0:
-                raise ValueError(f"Unaligned word address {addr:06o}")
-            value = w_read(addr)
-            print(f'(r{r})', end=' ')
-
-        elif mode == 2:  # Автоинкрементный
-            addr = reg[r]
-            if r == 7:  # Непосредственная адресация для PC
-                value = w_read(addr)
-                print(f'#{value:06o}', end=' ')
-            else:
-                value = w_read(addr)
-                print(f'(r{r})+', end=' ')
-            reg[r] += 2
-
-        elif mode == 3:  # Автоинкрементный косвенный
-            addr = reg[r]
-            ptr = w_read(addr)
-            value = w_read(ptr)
-            reg[r] += 2
-            print(f'@(r{r})+', end=' ')
-
-        elif mode == 4:  # Автодекрементный
-            reg[r] -= 2
-            addr = reg[r]
-            value = w_read(addr)
-            print(f'-(r{r})', end=' ')
-
-        elif mode == 5:  # Автодекрементный косвенный
-            reg[r] -= 2
-            addr = reg[r]
-            ptr = w_read(addr)
-            value = w_read(ptr)
-            print(f'@-(r{r})', end=' ')
-
-        elif mode == 6:  # Индексный
-            offset = w_read(reg[7])
-            reg[7] += 2
-            addr = reg[r] + offset
-            value = w_read(addr)
-            print(f'{offset}(r{r})', end=' ')
-
-        elif mode == 7:  # Индексный косвенный
-            offset = w_read(reg[7])
-            reg[7] += 2
-            ptr = reg[r] + offset
-            addr = w_read(ptr)
-            value = w_read(addr)
-            print(f'@{offset}(r{r})', end=' ')
-
-        else:
+        if not 0 <= mode < len(MODE_RESOLVERS):
             raise ModeNotIplementedError(f"Unsupported mode {mode}")
+        return MODE_RESOLVERS[mode](ModeRegistrArg(0, 0), r, True)
 
-        return ModeRegistrArg(addr, value, is_register)
-
-    def process(self, params: tuple, word: int):
+    def process(self, params: tuple, word: int, reads_dd: bool = True):
         """
-        Обрабатывает слово команды, извлекая аргументы в глобальный словарь args.
+        Обрабатывает слово команды, извлекая аргументы в поля ss, dd, r, nn.
 
         Args:
             params (tuple): кортеж с типами параметров ('ss', 'dd' и т.д.)
             word (int): слово команды
+            reads_dd (bool): нужно ли читать значение приемника
+                (ложно для команд, которые только пишут в dd)
         """
         self.clear()
         for param in params:
             if param == 'ss':
-                self.ss = ArgsProcessor.get_mr(word >> 6)
+                self.ss = self.resolvers[(word >> 9) & 7](self.ss_slot, (word >> 6) & 7, True)
             elif param == 'dd':
-                self.dd = ArgsProcessor.get_mr(word & 0o77)
+                self.dd = self.resolvers[(word >> 3) & 7](self.dd_slot, word & 7, reads_dd)
             elif param == 'r':
                 self.r = (word >> 6) & 0o7
-                print(f'r{self.r}', end=' ')
             elif param == 'nn':
                 self.nn = word & 0o77
-                print(f'{self.nn:o}', end=' ')
+            elif param == 'xx':
+                self.xx = ((word & 0o377) ^ 0o200) - 0o200
             else:
                 raise ValueError(f'Unknown argument type {param}')
 
-        return self.ss, self.dd
\ No newline at end of file
+        return self.ss, self.dd
+
+    def process_decoded(self, decoded):
+        """
+        Вычисляет аргументы заранее декодированной команды.
+
+        В отличие от process, поля режимов и регистров уже выделены из слова
+        команды, а функции режимов (из self.resolvers) выбраны при
+        декодировании (см. DecodedInstruction в pdp_11_icache).
+
+        Args:
+            decoded (DecodedInstruction): декодированная команда
+        """
+        resolver = decoded.ss_resolver
+        self.ss = None if resolver is None else resolver(self.ss_slot, decoded.ss_reg, True)
+        resolver = decoded.dd_resolver
+        self.dd = None if resolver is None else resolver(self.dd_slot, decoded.dd_reg, decoded.reads_dd)
+        self.r = decoded.r
+        self.nn = decoded.nn
+        self.xx = decoded.xx
+
+        return self.ss, self.dd
+
+
+def format_mr(w, adr, read=w_read):
+    """
+    Форматирует операнд (режим + регистр) в текст дизассемблера.
+
+    Дополнительное слово операнда (непосредственное значение или смещение)
+    читается из потока команд по адресу adr. Никаких побочных эффектов:
+    регистры и память не меняются.
+
+    Args:
+        w (int): Слово, содержащее номер регистра (младшие 3 бита)
+                и режим адресации (биты 3-5)
+        adr (int): Адрес следующего слова в потоке команд
+        read (callable): Функция чтения слова по адресу
+
+    Returns:
+        tuple: (текст операнда, адрес слова после операнда)
+    """
+    r = w & 7
+    mode = (w >> 3) & 7
+
+    if mode == 0:
+        return f'r{r}', adr
+    if mode == 1:
+        return f'(r{r})', adr
+    if mode == 2:
+        if r == 7:
+            return f'#{read(adr):06o}', adr + 2
+        return f'(r{r})+', adr
+    if mode == 3:
+        return f'@(r{r})+', adr
+    if mode == 4:
+        return f'-(r{r})', adr
+    if mode == 5:
+        return f'@-(r{r})', adr
+    if mode == 6:
+        return f'{read(adr)}(r{r})', adr + 2
+    return f'@{read(adr)}(r{r})', adr + 2
+
+
+def format_args(params, word, adr, read=w_read):
+    """
+    Форматирует аргументы команды так же, как их разбирает ArgsProcessor.process.
+
+    Args:
+        params (tuple): кортеж с типами параметров ('ss', 'dd' и т.д.)
+        word (int): слово команды
+        adr (int): адрес слова, следующего за словом команды
+        read (callable): функция чтения слова по адресу
+
+    Returns:
+        tuple: (список текстов аргументов, адрес следующей команды)
+    """
+    parts = []
+    for param in params:
+        if param == 'ss':
+            text, adr = format_mr(word >> 6, adr, read)
+        elif param == 'dd':
+            text, adr = format_mr(word & 0o77, adr, read)
+        elif param == 'r':
+            text = f'r{(word >> 6) & 0o7}'
+        elif param == 'nn':
+            text = f'{word & 0o77:o}'
+        elif param == 'xx':
+            text = f'{(adr + 2 * (((word & 0o377) ^ 0o200) - 0o200)) & 0xFFFF:06o}'
+        else:
+            raise ValueError(f'Unknown argument type {param}')
+        parts.append(text)
+    return parts, adr
@@ -0,0 +1,67 @@
+import pytest
+from pdp_11_mem import reg, w_write, w_read, mem_clear
+from pdp_11_args import ArgsProcessor
+
+
+@pytest.fixture(autouse=True)
+def clear_state():
+    mem_clear()
+    reg[:] = [0] * 8
+    yield
+
+
+def test_register_mode():
+    reg[3] = 0o1234
+    arg = ArgsProcessor.get_mr(0o03)
+    assert (arg.address, arg.value, arg.is_register) == (3, 0o1234, True)
+
+
+def test_autoincrement_and_autodecrement():
+    reg[1] = 0o2000
+    w_write(0o2000, 11)
+    arg = ArgsProcessor.get_mr(0o21)  # (r1)+
+    assert (arg.address, arg.value) == (0o2000, 11)
+    assert reg[1] == 0o2002
+
+    arg = ArgsProcessor.get_mr(0o41)  # -(r1)
+    assert (arg.address, arg.value) == (0o2000, 11)
+    assert reg[1] == 0o2000
+
+
+def test_deferred_modes_address_is_target():
+    reg[2] = 0o2000
+    w_write(0o2000, 0o3000)
+    w_write(0o3000, 77)
+    arg = ArgsProcessor.get_mr(0o32)  # @(r2)+
+    assert (arg.address, arg.value) == (0o3000, 77)
+    arg = ArgsProcessor.get_mr(0o52)  # @-(r2)
+    assert (arg.address, arg.value) == (0o3000, 77)
+
+
+def test_index_mode():
+    reg[7] = 0o1000
+    w_write(0o1000, 4)
+    reg[4] = 0o2000
+    w_write(0o2004, 5)
+    arg = ArgsProcessor.get_mr(0o64)  # 4(r4)
+    assert (arg.address, arg.value) == (0o2004, 5)
+    assert reg[7] == 0o1002
+
+
+def test_process_reuses_operand_objects():
+    args = ArgsProcessor()
+    args.process(('ss', 'dd'), 0o060102)  # add r1, r2
+    ss, dd = args.ss, args.dd
+    args.process(('ss', 'dd'), 0o060304)  # add r3, r4
+    assert args.ss is ss and args.dd is dd
+    assert (args.ss.address, args.dd.address) == (3, 4)
+
+
+def test_write_only_destination_is_not_read():
+    reg[1] = 0o177776  # последнее слово памяти
+    args = ArgsProcessor()
+    args.process(('dd',), 0o005011, reads_dd=False)  # clr (r1)
+    assert args.dd.address == 0o177776
+    assert args.dd.value is None
+    args.dd.write(0o123)
+    assert w_read(0o177776) == 0o123
@@ -0,0 +1,576 @@
+"""
+Модуль ассемблера PDP-11.
+
+Двухпроходный ассемблер для команд, которые выполняет эмулятор (таблица
+commands из pdp_11_commands):
+- первый проход разбирает строки, вычисляет адрес и длину каждой строки
+  и строит таблицу символов (метки и присваивания);
+- второй проход кодирует команды и данные, подставляя значения меток:
+  адреса операндов, смещения ветвлений и SOB.
+
+Строки разбираются заранее скомпилированными регулярными выражениями:
+одно выражение делит строку на метку, оператор и операнды, второе
+определяет режим адресации операнда.
+
+Синтаксис (как в MACRO-11, без учета регистра):
+    метка: команда операнд, операнд ; комментарий
+    . = 1000            ; адрес следующей строки
+    имя = выражение     ; символ
+    .word 1, метка      ; слова данных
+    .blkw 10            ; 10 (восьмеричное) нулевых слов
+    .end метка          ; адрес запуска (по умолчанию - первое слово программы)
+
+Числа восьмеричные, с точкой в конце - десятичные (10.). Выражение -
+числа и символы, соединенные знаками + и -; символ . - адрес текущей
+строки. Операнды: r0-r7 (sp, pc),
+(r), (r)+, @(r)+, -(r), @-(r), x(r), @x(r), #x, @#x, x и @x (относительно PC).
+Операнд ветвлений и SOB - адрес перехода.
+
+Классы:
+- AsmError: ошибка в исходном тексте (с номером строки).
+- Program: результат ассемблирования.
+- Assembler: ассемблер с кэшем разобранных строк: при повторном
+  ассемблировании измененного текста разбираются только измененные строки.
+
+Функции:
+- assemble: ассемблирование текста программы.
+- assemble_file: ассемблирование файла.
+- mr_code: код операнда (режим и регистр) для слова команды.
+
+Команды кодируются целыми числами (код операции | поля операндов, сдвинутые
+на свои места) и записываются сразу в bytearray участка памяти.
+
+Модуль импортируется без побочных эффектов и не зависит от pyparsing.
+
+Запуск (перевод текста программы в образ для main.py и data_load):
+    python pdp_11_asm.py program.s [-o program.pdp.o] [--binary] [--symbols]
+
+Пример:
+    program = assemble(". = 1000\\nmov #3, r0\\nloop: add r0, r1\\nsob r0, loop\\nhalt\\n")
+    program.segments  # [(512, bytearray(b'\\xc0\\x15\\x03\\x00\\x01`\\x02~\\x00\\x00'))]
+    machine.load_program(program)  # без промежуточного текстового образа
+"""
+
+import argparse
+import re
+import struct
+import sys
+
+from pdp_11_commands import commands
+from data_load import IMAGE_HEADER, IMAGE_MAGIC
+
+INSTRUCTIONS = {cmd['name']: cmd for cmd in commands if cmd['name'] != 'unknown'}
+REGISTERS = {f'r{i}': i for i in range(8)}
+REGISTERS.update(sp=6, pc=7)
+
+_LINE = re.compile(r"""
+    \s*(?:(?P<label>[a-z_$][\w$.]*)\s*:)?     # метка
+    \s*(?P<name>[.a-z_$][\w$.]*)?             # команда, директива или символ
+    \s*(?P<args>[^;]*)                        # операнды
+    (?:;.*)?                                  # комментарий
+""", re.X)
+
+_REG = r'(?:r[0-7]|sp|pc)'
+_EXPR = r'-?[\w$.]+(?:\s*[-+]\s*[\w$.]+)*'
+_OPERAND = re.compile(rf"""
+      (?P<m0>{_REG})
+    | \((?P<m1>{_REG})\)
+    | \((?P<m2>{_REG})\)\+
+    | @\((?P<m3>{_REG})\)\+
+    | -\((?P<m4>{_REG})\)
+    | @-\((?P<m5>{_REG})\)
+    | (?P<x6>{_EXPR})\((?P<m6>{_REG})\)
+    | @(?P<x7>{_EXPR})\((?P<m7>{_REG})\)
+    | \#(?P<imm>{_EXPR})
+    | @\#(?P<abs>{_EXPR})
+    | @(?P<rel7>{_EXPR})
+    | (?P<rel6>{_EXPR})
+""", re.X)
+_TERM = re.compile(r'\s*([-+]?)\s*([\w$.]+)\s*')
+_OCTAL = re.compile(r'[0-7]+')
+_DECIMAL = re.compile(r'[0-9]+\.')
+
+# lastgroup совпадения _OPERAND -> (режим, регистр или None - из группы, выражение или None)
+_OPERAND_KINDS = {
+    'm0': (0, None, None), 'm1': (1, None, None), 'm2': (2, None, None),
+    'm3': (3, None, None), 'm4': (4, None, None), 'm5': (5, None, None),
+    'm6': (6, None, 'x6'), 'm7': (7, None, 'x7'),
+    'imm': (2, 7, 'imm'), 'abs': (3, 7, 'abs'), 'rel7': (7, 7, 'rel7'), 'rel6': (6, 7, 'rel6'),
+}
+_RELATIVE = ('rel6', 'rel7')
+_WORD = struct.Struct('<H')
+
+
+class AsmError(ValueError):
+    """Ошибка в исходном тексте программы."""
+
+    def __init__(self, message, line=None):
+        """
+        Args:
+            message (str): описание ошибки
+            line (int): номер строки (с 1) или None
+        """
+        super().__init__(f"line {line}: {message}" if line is not None else message)
+        self.line = line
+
+
+class Program:
+    """
+    Результат ассемблирования.
+
+    Поля:
+        segments: список пар (адрес, bytearray) - непрерывные участки
+            памяти (слова little-endian, как в памяти PDP-11) в порядке
+            адресов в исходном тексте
+        start: адрес запуска
+        symbols: таблица символов, имя -> значение
+    """
+
+    def __init__(self, segments, start, symbols):
+        self.segments = segments
+        self.start = start
+        self.symbols = symbols
+
+    def load(self, memory):
+        """
+        Копирует участки в память (каждый - одной операцией write_bytes).
+
+        Args:
+            memory (Memory): память машины
+
+        Returns:
+            int: адрес запуска
+        """
+        for address, data in self.segments:
+            memory.write_bytes(address, data)
+        return self.start
+
+    def size(self):
+        """Общий размер участков в байтах."""
+        return sum(len(data) for _, data in self.segments)
+
+    def to_text(self):
+        """
+        Текстовый образ в формате data_load.load_data: для каждого участка
+        строка "адрес длина" и по байту в строке (все числа 16-ричные).
+        """
+        lines = []
+        for address, data in self.segments:
+            lines.append(f"{address:04x} {len(data):04x}")
+            lines.extend(f"{byte:02x}" for byte in data)
+        return "\n".join(lines) + "\n"
+
+    def to_image(self):
+        """
+        Двоичный образ в формате data_load.load_image: один участок от
+        наименьшего до наибольшего адреса, промежутки заполнены нулями.
+        """
+        segments = [(address, data) for address, data in self.segments if data]
+        low = min((address for address, _ in segments), default=0)
+        high = max((address + len(data) for address, data in segments), default=0)
+        image = bytearray(high - low)
+        for address, data in segments:
+            image[address - low:address - low + len(data)] = data
+        return IMAGE_HEADER.pack(IMAGE_MAGIC, self.start, low, len(image)) + image
+
+    def save(self, filename, binary=False):
+        """Сохраняет программу в файл образа (текстовый или двоичный)."""
+        if binary:
+            with open(filename, 'wb') as file:
+                file.write(self.to_image())
+        else:
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write(self.to_text())
+
+    def __repr__(self):
+        return (f"Program(start={self.start:06o}, segments="
+                f"{[(f'{adr:06o}', len(data)) for adr, data in self.segments]})")
+
+
+class _Line:
+    """
+    Разобранная строка без привязки к адресу. Зависит только от текста
+    строки, поэтому кэшируется по нему (см. Assembler).
+
+    Слово команды с полями операндов собирается при разборе; то, что
+    зависит от символов и адреса строки, - поправки: пары (вид, выражение),
+    где вид - 'abs' (слово со значением выражения), 'rel' (слово со смещением
+    относительно PC), 'nn' (смещение SOB) или 'xx' (смещение ветвления).
+
+    Поля:
+        label: метка или None
+        name: команда, директива или символ присваивания (None - пустая строка)
+        args: текст операндов
+        size: длина в словах или None, если она зависит от символов (.blkw)
+            или строка не занимает памяти (присваивание, .end)
+        word: слово команды без поправок (None для .word и .blkw)
+        fixups: поправки в порядке слов строки
+        code: код строки (bytes), если он не зависит от адреса и символов
+    """
+
+    __slots__ = ('label', 'name', 'args', 'size', 'word', 'fixups', 'code')
+
+    def __init__(self, label, name, args, size=None, word=None, fixups=()):
+        self.label = label
+        self.name = name
+        self.args = args
+        self.size = size
+        self.word = word
+        self.fixups = fixups
+        self.code = None
+        if size is not None and all(kind == 'abs' and _is_number(expr) for kind, expr in fixups):
+            words = [] if word is None else [word]
+            words.extend(_value(expr, {}, None) & 0xFFFF for _, expr in fixups)
+            self.code = struct.pack(f'<{len(words)}H', *words)
+
+
+def _value(text, symbols, line):
+    """Значение выражения: числа и символы, соединенные + и -."""
+    if text in symbols:
+        return symbols[text]
+    if _OCTAL.fullmatch(text):
+        return int(text, 8)
+    total = 0
+    pos = 0
+    for match in _TERM.finditer(text):
+        if match.start() != pos:
+            break
+        sign, term = match.groups()
+        pos = match.end()
+        if _OCTAL.fullmatch(term):
+            number = int(term, 8)
+        elif _DECIMAL.fullmatch(term):
+            number = int(term[:-1])
+        elif term in symbols:
+            number = symbols[term]
+        elif term[0].isdigit():
+            raise AsmError(f"Bad number '{term}'", line)
+        else:
+            raise AsmError(f"Undefined symbol '{term}'", line)
+        total = total - number if sign == '-' else total + number
+    if pos != len(text) or not text:
+        raise AsmError(f"Bad expression '{text}'", line)
+    return total
+
+
+def _operand(text, line, cache):
+    """
+    Разбирает операнд; разобранные операнды запоминаются в cache по тексту.
+
+    Returns:
+        tuple: (режим, регистр, выражение или None, относительный ли адрес)
+    """
+    parsed = cache.get(text)
+    if parsed is not None:
+        return parsed
+    match = _OPERAND.fullmatch(text)
+    if match is None:
+        raise AsmError(f"Bad operand '{text}'", line)
+    kind = match.lastgroup
+    mode, reg, expr = _OPERAND_KINDS[kind]
+    if reg is None:
+        reg = REGISTERS[match.group(kind)]
+    parsed = cache[text] = (mode, reg, match.group(expr) if expr is not None else None,
+                            kind in _RELATIVE)
+    return parsed
+
+
+def _is_number(text):
+    return _OCTAL.fullmatch(text) is not None or _DECIMAL.fullmatch(text) is not None
+
+
+def mr_code(mode, reg):
+    """Шесть бит операнда в слове команды: режим (биты 3-5) и регистр (биты 0-2)."""
+    return (mode << 3) | reg
+
+
+def _parse_line(text, number, cache):
+    """
+    Разбирает строку (текст в нижнем регистре).
+
+    Args:
+        text (str): строка
+        number (int): номер строки (для сообщений об ошибках)
+        cache (dict): кэш разобранных операндов
+
+    Returns:
+        _Line: разобранная строка
+
+    Raises:
+        AsmError: при синтаксической ошибке
+    """
+    match = _LINE.fullmatch(text)
+    if match is None:
+        raise AsmError(f"Syntax error: {text.strip()}", number)
+    label, name, args = match.group('label', 'name', 'args')
+    args = args.rstrip()
+    if name is None:
+        if args:
+            raise AsmError(f"Syntax error: {text.strip()}", number)
+        return _Line(label, None, args)
+    if args.startswith('=') or name in ('.end', '.blkw'):
+        return _Line(label, name, args)
+
+    operands = [arg.strip() for arg in args.split(',')] if args else []
+    if name == '.word':
+        return _Line(label, name, args, len(operands), None,
+                     tuple(('abs', operand) for operand in operands))
+    if name not in INSTRUCTIONS:
+        raise AsmError(f"Unknown instruction '{name}'", number)
+    cmd = INSTRUCTIONS[name]
+    params = cmd['params']
+    if len(operands) != len(params):
+        raise AsmError(f"'{name}' takes {len(params)} operand(s)", number)
+    word = cmd['opcode']
+    fixups = []
+    for param, operand in zip(params, operands):
+        if param in ('ss', 'dd'):
+            mode, reg, expr, relative = _operand(operand, number, cache)
+            word |= mr_code(mode, reg) << (6 if param == 'ss' else 0)
+            if expr is not None:
+                fixups.append(('rel' if relative else 'abs', expr))
+        elif param == 'r':
+            if operand not in REGISTERS:
+                raise AsmError(f"Register expected, got '{operand}'", number)
+            word |= REGISTERS[operand] << 6
+        else:
+            fixups.append((param, operand))
+    size = 1 + sum(1 for kind, _ in fixups if kind in ('abs', 'rel'))
+    return _Line(label, name, args, size, word, tuple(fixups))
+
+
+def _layout(lines):
+    """
+    Первый проход: раскладывает разобранные строки по адресам и собирает символы.
+
+    Участки - подряд идущие строки; их размер известен после первого прохода,
+    и второй проход записывает слова прямо в массив участка.
+
+    Args:
+        lines (list): _Line в порядке строк текста
+
+    Returns:
+        tuple: (участки - списки [адрес, строки, конец], где строки - тройки
+            (номер строки, _Line, адрес); таблица символов; выражение .end
+            или None)
+    """
+    segments = []
+    symbols = {}
+    location = 0
+    next_address = None
+    end = None
+    for number, parsed in enumerate(lines, 1):
+        label, name = parsed.label, parsed.name
+        if label is not None:
+            if label in symbols:
+                raise AsmError(f"Duplicate label '{label}'", number)
+            symbols[label] = location
+        if name is None:
+            continue
+        size = parsed.size
+        if size is None:
+            args = parsed.args
+            symbols['.'] = location
+            if name == '.end':
+                end = args or None
+                break
+            if name == '.blkw':
+                size = _value(args, symbols, number) if args else 1
+            else:
+                value = _value(args[1:].strip(), symbols, number)
+                if name == '.':
+                    if value & 1 or not 0 <= value <= 0xFFFF:
+                        raise AsmError(f"Bad location {value:o}", number)
+                    location = value
+                else:
+                    symbols[name] = value
+                continue
+        if location != next_address:
+            segment = [location, [], location]
+            segments.append(segment)
+        segment[1].append((number, parsed, location))
+        location += 2 * size
+        if location > 0x10000:
+            raise AsmError("Program does not fit in memory", number)
+        segment[2] = next_address = location
+    symbols.pop('.', None)
+    return segments, symbols, end
+
+
+def _encode(number, parsed, address, symbols, data, offset):
+    """Кодирует строку с поправками и записывает ее слова в data начиная с offset."""
+    pack_into = _WORD.pack_into
+    word = parsed.word
+    pos = offset if word is None else offset + 2
+    for kind, expr in parsed.fixups:
+        value = _value(expr, symbols, number)
+        if kind == 'abs':
+            pack_into(data, pos, value & 0xFFFF)
+            pos += 2
+        elif kind == 'rel':
+            # Относительный адрес считается от PC после слова операнда
+            pack_into(data, pos, (value - (address + pos - offset + 2)) & 0xFFFF)
+            pos += 2
+        elif kind == 'nn':
+            distance = address + 2 - value
+            if distance & 1 or not 0 <= distance <= 0o176:
+                raise AsmError(f"SOB target out of range: {expr}", number)
+            word |= distance >> 1
+        else:
+            distance = value - address - 2
+            if distance & 1 or not -0o400 <= distance <= 0o376:
+                raise AsmError(f"Branch target out of range: {expr}", number)
+            word |= (distance >> 1) & 0o377
+    if word is not None:
+        pack_into(data, offset, word)
+
+
+class Assembler:
+    """
+    Ассемблер с кэшем строк для повторного ассемблирования измененного текста.
+
+    Разбор строки зависит только от ее текста, поэтому он хранится в кэше
+    по тексту строки: при повторном вызове assemble разбираются только
+    новые и измененные строки. Для строки в кэше уже собрано слово команды,
+    а код строк, не зависящих от адреса и символов (mov #3, r0; add r0, r1),
+    готов целиком. Заново выполняются только раскладка по адресам, таблица
+    символов и поправки строк с метками и относительными адресами.
+
+    В кэше остаются только строки последнего ассемблированного текста.
+
+    Поля:
+        parsed, reused: число разобранных и взятых из кэша строк
+            за последний вызов assemble
+    """
+
+    def __init__(self):
+        self.lines = {}  # текст строки -> _Line
+        self.operands = {}  # текст операнда -> разобранный операнд
+        self.parsed = 0
+        self.reused = 0
+
+    def _parse(self, texts):
+        """Разобранные строки текста: из кэша или разобранные заново."""
+        cache = self.lines
+        lines = [cache.get(text) for text in texts]
+        parsed_count = 0
+        for i in [i for i, parsed in enumerate(lines) if parsed is None]:
+            text = texts[i]
+            parsed = cache.get(text)  # та же строка могла встретиться выше
+            if parsed is None:
+                try:
+                    parsed = cache[text] = _parse_line(text, i + 1, self.operands)
+                except AsmError:
+                    # Текст после .end не ассемблируется
+                    if any(line.name == '.end' for line in lines[:i]):
+                        del lines[i:], texts[i:]
+                        break
+                    raise
+                parsed_count += 1
+            lines[i] = parsed
+        self.lines = dict(zip(texts, lines))
+        if len(self.operands) > 4 * len(self.lines) + 1024:
+            self.operands = {}
+        self.parsed = parsed_count
+        self.reused = len(lines) - parsed_count
+        return lines
+
+    def assemble(self, source):
+        """
+        Ассемблирует текст программы (см. модульную функцию assemble).
+
+        Raises:
+            AsmError: при ошибке в тексте (номер строки - в поле line)
+        """
+        layout, symbols, end = _layout(self._parse(source.lower().splitlines()))
+
+        segments = []
+        for base, items, stop in layout:
+            data = bytearray(stop - base)
+            for number, parsed, address in items:
+                code = parsed.code
+                if code is not None:
+                    offset = address - base
+                    data[offset:offset + len(code)] = code
+                elif parsed.fixups:
+                    symbols['.'] = address
+                    _encode(number, parsed, address, symbols, data, address - base)
+            segments.append((base, data))
+        symbols.pop('.', None)
+
+        if end is not None:
+            start = _value(end, symbols, None)
+        else:
+            start = segments[0][0] if segments else 0
+        return Program(segments, start, symbols)
+
+    def assemble_file(self, filename):
+        """Ассемблирует файл с текстом программы (см. assemble)."""
+        with open(filename, encoding='utf-8') as file:
+            return self.assemble(file.read())
+
+
+def assemble(source):
+    """
+    Ассемблирует текст программы.
+
+    Args:
+        source (str): исходный текст
+
+    Returns:
+        Program: участки памяти, адрес запуска и таблица символов
+
+    Raises:
+        AsmError: при ошибке в тексте (номер строки - в поле line)
+    """
+    return Assembler().assemble(source)
+
+
+def assemble_file(filename):
+    """
+    Ассемблирует файл с текстом программы.
+
+    Raises:
+        AsmError: при ошибке в тексте
+        OSError: если файл нельзя прочитать
+    """
+    return Assembler().assemble_file(filename)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ассемблер PDP-11")
+    parser.add_argument("source", help="файл с текстом программы")
+    parser.add_argument("-o", "--output", default=None,
+                        help="файл образа (по умолчанию - имя исходного файла с .pdp.o или .bin)")
+    parser.add_argument("--binary", action="store_true",
+                        help="записать двоичный образ (data_load.load_image) вместо текстового")
+    parser.add_argument("--symbols", action="store_true", help="вывести таблицу символов")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Ассемблирует файл и записывает образ.
+
+    Returns:
+        int: код завершения (0 - успешно, 1 - ошибка в тексте программы)
+    """
+    options = parse_args(argv)
+    try:
+        program = assemble_file(options.source)
+    except AsmError as error:
+        print(f"{options.source}: {error}", file=sys.stderr)
+        return 1
+    output = options.output
+    if output is None:
+        stem = options.source.rsplit('.', 1)[0] if '.' in options.source else options.source
+        output = stem + ('.bin' if options.binary else '.pdp.o')
+    program.save(output, options.binary)
+    if options.symbols:
+        for name, value in sorted(program.symbols.items(), key=lambda item: (item[1], item[0])):
+            print(f"{value:06o} {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
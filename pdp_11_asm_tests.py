@@ -0,0 +1,202 @@
+import struct
+
+import pytest
+
+from pdp_11_asm import assemble, mr_code, Assembler, AsmError
+from pdp_11_machine import Machine
+
+def words(data):
+    return list(struct.unpack(f"<{len(data) // 2}H", data))
+
+
+SOB = """
+        . = 1000
+start:  mov #3, r0      ; счетчик
+        clr r1
+loop:   add r0, r1
+        sob r0, loop
+        halt
+"""
+
+
+def test_matches_integral_image():
+    machine = Machine()
+    machine.load("integral_tests/02_sob.pdp.o")
+    program = assemble(SOB)
+    (address, data), = program.segments
+    assert address == 0o1000 and program.start == 0o1000
+    assert data == machine.memory.mem[0o1000:0o1000 + len(data)]
+    assert program.symbols == {'start': 0o1000, 'loop': 0o1006}
+
+
+def test_forward_labels_and_relative_operands():
+    program = assemble("""
+        . = 1000
+        mov r1, @#result
+        mov r1, result
+        mov value, r2
+        beq done
+        br .
+done:   halt
+value:  .word 5, done+2, 10.
+result: .blkw 2
+        .end done
+    """)
+    code = words(program.segments[0][1])
+    assert code[:2] == [0o010137, 0o1030]
+    assert code[2:4] == [0o010167, 0o1030 - 0o1010]  # относительно PC после слова
+    assert code[4:6] == [0o016702, 0o1022 - 0o1014]
+    assert code[6:9] == [0o001401, 0o000777, 0]
+    assert code[9:12] == [5, 0o1022, 10]
+    assert program.start == 0o1020
+    assert program.symbols['result'] == 0o1030
+
+
+def test_segments_and_symbols():
+    program = assemble(". = 1000\nhalt\n. = 2000\nn = 7\n.word n, N + 1\n")
+    assert [(address, words(data)) for address, data in program.segments] == \
+        [(0o1000, [0]), (0o2000, [7, 8])]
+
+
+@pytest.mark.parametrize("source, message", [
+    ("mov r0", "takes 2 operand"),
+    ("foo r0", "Unknown instruction"),
+    ("mov (r9), r0", "Bad operand"),
+    ("mov #x, r0", "Undefined symbol"),
+    ("a: halt\na: halt", "Duplicate label"),
+    ("br 2000", "out of range"),
+    ("l: halt\nsob r0, 2000", "out of range"),
+    ("mov #8, r0", "Bad number"),
+])
+def test_errors(source, message):
+    with pytest.raises(AsmError, match=message) as error:
+        assemble(source)
+    assert error.value.line == source.count("\n") + 1
+
+
+def test_assembled_program_runs():
+    program = assemble(SOB)
+    machine = Machine()
+    for address, data in program.segments:
+        machine.memory.write_bytes(address, data)
+    machine.reg[7] = program.start
+    machine.run()
+    assert machine.halted and machine.reg[1] == 6
+
+
+def test_mr_code():
+    assert mr_code(2, 7) == 0o27
+    assert mr_code(0, 1) == 0o01
+
+
+def test_incremental_reassembly():
+    assembler = Assembler()
+    assembler.assemble(SOB)
+    assert assembler.parsed == SOB.count("\n")
+
+    # Вставка строки сдвигает метку loop: ветвление и SOB кодируются заново
+    edited = SOB.replace("clr r1\n", "clr r1\n        mov #10., r2\n")
+    program = assembler.assemble(edited)
+    assert (assembler.parsed, assembler.reused) == (1, SOB.count("\n"))
+    assert program.segments == assemble(edited).segments
+    assert program.symbols['loop'] == 0o1012
+
+    assembler.assemble(". = 1000\nhalt\n")
+    assert set(assembler.lines) == {". = 1000", "halt"}
+
+
+def test_incremental_errors_and_end():
+    assembler = Assembler()
+    assembler.assemble(SOB)
+    with pytest.raises(AsmError, match="Undefined symbol") as error:
+        assembler.assemble(SOB.replace("loop:", "next:"))
+    assert error.value.line == 6
+    # Текст после .end не разбирается
+    program = assembler.assemble(SOB + ".end start\n@@@\n")
+    assert program.segments == assemble(SOB).segments
+
+
+def test_load_source_and_rerun():
+    machine = Machine()
+    for n in (3, 5):
+        machine.reset()
+        program = machine.load_source(SOB.replace("#3", f"#{n}"))
+        assert machine.reg[7] == program.start
+        machine.run()
+        assert machine.reg[1] == n * (n + 1) // 2
+
+
+def test_program_load_segments():
+    program = assemble(". = 2000\n.word 1, 2\n. = 1000\n.end 1000\n")
+    machine = Machine()
+    machine.load_program(program)
+    assert program.size() == 4
+    assert machine.memory.w_read(0o2002) == 2
+    assert machine.reg[7] == 0o1000
+
+
+def test_load_assembly_file(tmp_path):
+    source = tmp_path / "sob.s"
+    source.write_text(SOB, encoding="utf-8")
+    machine = Machine()
+    machine.load(str(source))
+    machine.run()
+    assert machine.halted and machine.reg[1] == 6
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_cli_writes_loadable_image(tmp_path, capsys, binary):
+    from pdp_11_asm import main
+
+    source = tmp_path / "sob.s"
+    source.write_text(SOB, encoding="utf-8")
+    argv = [str(source), "--symbols"] + (["--binary"] if binary else [])
+    assert main(argv) == 0
+    assert "001006 loop" in capsys.readouterr().out
+    machine = Machine()
+    machine.load(str(tmp_path / ("sob.bin" if binary else "sob.pdp.o")))
+    machine.run()
+    assert machine.halted and machine.reg[1] == 6
+
+
+def test_cli_reports_errors(tmp_path, capsys):
+    from pdp_11_asm import main
+
+    source = tmp_path / "bad.s"
+    source.write_text("halt\nfoo r0\n", encoding="utf-8")
+    assert main([str(source)]) == 1
+    assert "line 2" in capsys.readouterr().err
+
+
+def test_legacy_modules_import_without_side_effects():
+    import subprocess
+    import sys
+
+    code = ("import sys, decode_mr, from_asm_to_machine_code_2, from_assembler_code_to_machine_code_1; "
+            "assert 'pyparsing' not in sys.modules")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+
+
+def test_legacy_encoder():
+    from from_asm_to_machine_code_2 import asm_to_binary_code
+
+    segments = asm_to_binary_code([
+        {'command_name': 'start_from_address', 'arguments': ['1000']},
+        {'command_name': 'mov', 'arguments': ['#2', 'r0']},
+        {'command_name': 'mov', 'arguments': ['@2(r3)', '-(r4)']},
+        {'command_name': 'halt', 'arguments': []},
+    ])
+    assert segments == [[0o1000, bytearray(struct.pack("<5H", 0o012700, 2, 0o017344, 2, 0))]]
+
+
+def test_first_legacy_encoder():
+    from from_assembler_code_to_machine_code_1 import to_raw_machine_code, to_machine_code
+
+    mov = {'command_name': 'mov', 'arguments': ['#10', 'r0']}
+    assert to_raw_machine_code(mov) == [0o012700, 10]
+    assert to_raw_machine_code({'command_name': 'add', 'arguments': ['r0', 'r1']}) == [0o060001]
+    assert to_machine_code(mov) == ["c0", "15", "0a", "00"]
+    assert to_machine_code({'command_name': 'halt', 'arguments': []}) == ["00", "00"]
+    assert to_machine_code({'command_name': 'start_from_address', 'arguments': ['1000']})[0] == "0200"
@@ -7,10 +7,21 @@
 - HALT (остановка процессора)
 - SOB (вычитание с ветвлением)
 - CLR (очистка)
+- BR и условные ветвления (BNE, BEQ, BPL, BMI, BVC, BVS, BCC, BCS)
+
+MOV, ADD и CLR устанавливают признаки N, Z, V, C лениво: они только
+записывают операнды в PSW машины (_args.psw), а признаки вычисляются
+при ветвлении (см. pdp_11_psw).
 
 Основные компоненты:
 - commands: Список поддерживаемых команд с их масками, кодами операций и обработчиками.
-- Функции-обработчики команд (do_mov, do_add, do_halt, do_sob, do_clr, do_unknown).
+- decode_table: Таблица декодирования, слово команды -> описание команды.
+- disassemble: Текст команды по адресу (для трассировки и отчетов).
+- Функции-обработчики команд (do_mov, do_add, do_halt, do_sob, do_clr, do_br, ...,
+  do_unknown).
+  Обработчик получает ArgsProcessor своей машины и работает с ее регистрами
+  и памятью через него (_args.reg, _args.dd.write и т.д.).
+- Halted: исключение, которым HALT останавливает выполнение.
 - Вспомогательные функции (reg_dump для вывода состояния регистров).
 
 Формат команд:
@@ -20,23 +31,18 @@
 - name: Мнемоника команды.
 - handler: Функция-обработчик команды.
 - params: Параметры команды (ss, dd, r, nn и т.д.).
+- reads_dd: Читает ли команда значение приемника dd (mov и clr только пишут).
 
 """
 
-from pdp_11_mem import w_read, w_write, reg, b_write
-from pdp_11_args import ArgsProcessor
-import sys
-
+from pdp_11_mem import w_read
+from pdp_11_args import ArgsProcessor, format_args
+from pdp_11_psw import N, Z, V, C, MOV, ADD, CLR_FLAGS, nzv_bits, c_bit
 
 
-commands = [
-    {'mask': 0o177777, 'opcode': 0o000000, 'name': 'halt', 'handler': lambda _args: do_halt(_args), 'params': ()},
-    {'mask': 0o170000, 'opcode': 0o010000, 'name': 'mov', 'handler': lambda _args: do_mov(_args), 'params': ('ss', 'dd')},
-    {'mask': 0o170000, 'opcode': 0o060000, 'name': 'add', 'handler': lambda _args: do_add(_args), 'params': ('ss', 'dd')},
-    {'mask': 0o177000, 'opcode': 0o077000, 'name': 'sob', 'handler': lambda _args: do_sob(_args), 'params': ('r', 'nn')},
-    {'mask': 0o177000, 'opcode': 0o005000, 'name': 'clr', 'handler': lambda _args: do_clr(_args), 'params': ('dd',)},
-    {'mask': 0o177777, 'opcode': 0o177777, 'name': 'unknown', 'handler': lambda _args: do_unknown(_args), 'params': ()}
-]
+class Halted(Exception):
+    """Исключение, которым команда HALT останавливает основной цикл машины."""
+    pass
 
 
 def do_mov(_args):
@@ -44,11 +50,14 @@ def do_mov(_args):
     Обработчик команды MOV (перемещение данных).
 
     Переносит значение из источника в приемник.
+    Признаки: N, Z по значению, V = 0, C не меняется.
 
     Args:
         w (int): Слово команды
     """
-    _args.dd.write(_args.ss.value)
+    value = _args.ss.value
+    _args.dd.write(value)
+    _args.psw.nzv = (MOV, value)
 
 
 def do_add(_args):
@@ -56,23 +65,25 @@ def do_add(_args):
     Обработчик команды ADD (сложение).
 
     Складывает значения источника и приемника, результат сохраняет в приемник.
+    Признаки: N, Z, V, C по сумме.
 
     Args:
         w (int): Слово команды
     """
-    result = _args.ss.value + _args.dd.value
-    _args.dd.write(result)
+    src, dst = _args.ss.value, _args.dd.value
+    _args.dd.write(src + dst)
+    psw = _args.psw
+    psw.nzv = psw.c = (ADD, src, dst)
 
 
 def do_halt(_args):
     """
     Обработчик команды HALT (остановка процессора).
 
-    Выводит содержимое регистров и завершает работу программы.
+    Останавливает основной цикл машины исключением Halted. Процесс при этом
+    не завершается: вывод регистров и дальнейшие действия - дело вызывающего.
     """
-    print("\n---------------- halted ---------------")
-    reg_dump(reg)
-    sys.exit(0)
+    raise Halted()
 
 
 def do_unknown(_args):
@@ -94,6 +105,7 @@ def do_sob(_args):
         Формат команды: SOB r, NN
         PC = PC - 2 * NN
     """
+    reg = _args.reg
     reg[_args.r] = (reg[_args.r] - 1) & 0xFFFF
     if reg[_args.r] != 0:
         reg[7] = (reg[7] - 2 * _args.nn) & 0xFFFF
@@ -102,9 +114,142 @@ def do_clr(_args):
     """
         Обработчик команды CLR (очистка).
         Обнуляет указанный регистр или ячейку памяти.
+        Признаки: Z = 1, N, V, C = 0.
         """
     _args.dd.write(0)
+    psw = _args.psw
+    psw.nzv = psw.c = CLR_FLAGS
+
+
+def _branch(_args):
+    """Переход на xx слов от следующей команды: PC = PC + 2 * xx."""
+    reg = _args.reg
+    reg[7] = (reg[7] + 2 * _args.xx) & 0xFFFF
+
+
+def do_br(_args):
+    """Обработчик команды BR (безусловный переход)."""
+    _branch(_args)
+
+
+def do_bne(_args):
+    """Обработчик команды BNE: переход, если Z = 0."""
+    if not nzv_bits(_args.psw.nzv) & Z:
+        _branch(_args)
+
+
+def do_beq(_args):
+    """Обработчик команды BEQ: переход, если Z = 1."""
+    if nzv_bits(_args.psw.nzv) & Z:
+        _branch(_args)
+
+
+def do_bpl(_args):
+    """Обработчик команды BPL: переход, если N = 0."""
+    if not nzv_bits(_args.psw.nzv) & N:
+        _branch(_args)
+
+
+def do_bmi(_args):
+    """Обработчик команды BMI: переход, если N = 1."""
+    if nzv_bits(_args.psw.nzv) & N:
+        _branch(_args)
+
+
+def do_bvc(_args):
+    """Обработчик команды BVC: переход, если V = 0."""
+    if not nzv_bits(_args.psw.nzv) & V:
+        _branch(_args)
+
+
+def do_bvs(_args):
+    """Обработчик команды BVS: переход, если V = 1."""
+    if nzv_bits(_args.psw.nzv) & V:
+        _branch(_args)
+
+
+def do_bcc(_args):
+    """Обработчик команды BCC: переход, если C = 0."""
+    if not c_bit(_args.psw.c):
+        _branch(_args)
+
+
+def do_bcs(_args):
+    """Обработчик команды BCS: переход, если C = 1."""
+    if c_bit(_args.psw.c):
+        _branch(_args)
 
 def reg_dump(reg):
     print(f"r0={reg[0]:06o} r2={reg[2]:06o} r4={reg[4]:06o} sp={reg[6]:06o}")
-    print(f"r1={reg[1]:06o} r3={reg[3]:06o} r5={reg[5]:06o} pc={reg[7]:06o}")
\ No newline at end of file
+    print(f"r1={reg[1]:06o} r3={reg[3]:06o} r5={reg[5]:06o} pc={reg[7]:06o}")
+
+
+commands = [
+    {'mask': 0o177777, 'opcode': 0o000000, 'name': 'halt', 'handler': do_halt, 'params': (), 'reads_dd': False},
+    {'mask': 0o170000, 'opcode': 0o010000, 'name': 'mov', 'handler': do_mov, 'params': ('ss', 'dd'), 'reads_dd': False},
+    {'mask': 0o170000, 'opcode': 0o060000, 'name': 'add', 'handler': do_add, 'params': ('ss', 'dd'), 'reads_dd': True},
+    {'mask': 0o177000, 'opcode': 0o077000, 'name': 'sob', 'handler': do_sob, 'params': ('r', 'nn'), 'reads_dd': False},
+    {'mask': 0o177000, 'opcode': 0o005000, 'name': 'clr', 'handler': do_clr, 'params': ('dd',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o000400, 'name': 'br', 'handler': do_br, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o001000, 'name': 'bne', 'handler': do_bne, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o001400, 'name': 'beq', 'handler': do_beq, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o100000, 'name': 'bpl', 'handler': do_bpl, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o100400, 'name': 'bmi', 'handler': do_bmi, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o102000, 'name': 'bvc', 'handler': do_bvc, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o102400, 'name': 'bvs', 'handler': do_bvs, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o103000, 'name': 'bcc', 'handler': do_bcc, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177400, 'opcode': 0o103400, 'name': 'bcs', 'handler': do_bcs, 'params': ('xx',), 'reads_dd': False},
+    {'mask': 0o177777, 'opcode': 0o177777, 'name': 'unknown', 'handler': do_unknown, 'params': (), 'reads_dd': False}
+]
+
+
+def build_decode_table(cmds):
+    """
+    Строит таблицу декодирования на все 65536 возможных слов команды.
+
+    Элемент таблицы с индексом word - описание команды из cmds, которой
+    соответствует это слово. Если подходят несколько команд, побеждает
+    стоящая раньше в списке (как при линейном поиске). Слова, не подходящие
+    ни под одну маску, отображаются на команду 'unknown'.
+
+    Args:
+        cmds (list): список описаний команд (см. commands)
+
+    Returns:
+        list: таблица из 0o200000 элементов
+    """
+    unknown = next(cmd for cmd in cmds if cmd['name'] == 'unknown')
+    table = [unknown] * 0o200000
+
+    # Идем с конца, чтобы команды из начала списка перезаписали остальные
+    for cmd in reversed(cmds):
+        opcode = cmd['opcode']
+        free = ~cmd['mask'] & 0o177777
+        sub = free
+        while True:  # перебор всех подмасок свободных битов
+            table[opcode | sub] = cmd
+            if sub == 0:
+                break
+            sub = (sub - 1) & free
+
+    return table
+
+
+decode_table = build_decode_table(commands)
+
+
+def disassemble(adr, read=w_read):
+    """
+    Дизассемблирует одну команду по адресу adr.
+
+    Args:
+        adr (int): адрес слова команды
+        read (callable): функция чтения слова по адресу
+
+    Returns:
+        tuple: (текст команды, адрес следующей команды)
+    """
+    word = read(adr)
+    cmd = decode_table[word]
+    parts, next_adr = format_args(cmd['params'], word, adr + 2, read)
+    return ' '.join([cmd['name']] + parts), next_adr
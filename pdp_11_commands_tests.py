@@ -0,0 +1,30 @@
+from pdp_11_commands import commands, decode_table
+
+
+def linear_lookup(word):
+    for cmd in commands:
+        if (word & cmd["mask"]) == cmd["opcode"]:
+            return cmd
+    return None
+
+
+def test_decode_table_size():
+    assert len(decode_table) == 0o200000
+
+
+def test_decode_table_matches_linear_scan():
+    # Таблица должна давать тот же результат, что и линейный поиск
+    for word in range(0o200000):
+        expected = linear_lookup(word)
+        if expected is None:
+            assert decode_table[word]["name"] == "unknown"
+        else:
+            assert decode_table[word] is expected
+
+
+def test_decode_table_known_words():
+    assert decode_table[0o000000]["name"] == "halt"
+    assert decode_table[0o012700]["name"] == "mov"
+    assert decode_table[0o060001]["name"] == "add"
+    assert decode_table[0o077002]["name"] == "sob"
+    assert decode_table[0o005001]["name"] == "clr"
@@ -0,0 +1,120 @@
+"""
+Модуль точек останова и наблюдения PDP-11.
+
+Debugger подключается к машине (machine.debugger) и хранит:
+- точки останова по адресам команд: выполнение останавливается перед
+  командой, PC указывает на нее;
+- точки наблюдения за записью в диапазоны адресов памяти: выполнение
+  останавливается сразу после команды, которая записала в диапазон.
+
+Пока не задано ни одной точки, Machine.run выполняет обычный цикл без
+проверок. Запись в память проверяется только для страниц, на которых есть
+точки наблюдения: они ставятся под наблюдение тем же механизмом, что и кэш
+команд (Memory.watch_page), и запись на остальные страницы стоит как раньше.
+
+Запись в регистры устройств страницы ввода-вывода точками наблюдения
+не отслеживается.
+
+Классы:
+- Debugger: точки останова и наблюдения одной машины.
+
+Пример:
+    machine.debugger = Debugger(machine)
+    machine.debugger.add_breakpoint(0o1010)
+    machine.debugger.add_watchpoint(0o2000, 2)
+    machine.run()
+    print(machine.debugger.hit)  # {'kind': 'breakpoint', 'pc': 520}
+"""
+
+from pdp_11_icache import _pages
+
+
+class Debugger:
+    """
+    Точки останова и наблюдения одной машины.
+
+    После остановки в поле hit лежит словарь с описанием события:
+    kind ('breakpoint' или 'watchpoint'), pc (адрес команды), для точки
+    наблюдения - address и size записи. Перед каждым запуском hit
+    сбрасывается.
+    """
+
+    def __init__(self, machine):
+        """
+        Args:
+            machine (Machine): машина, к памяти которой подключается отладчик
+        """
+        self.memory = machine.memory
+        self.breakpoints = set()
+        self.watchpoints = []  # пары (начало, конец) диапазонов адресов
+        self.hit = None
+        self.pc = None  # адрес выполняемой команды (для событий записи)
+        self.listening = False
+
+    @property
+    def armed(self):
+        """Задана ли хотя бы одна точка останова или наблюдения."""
+        return bool(self.breakpoints or self.watchpoints)
+
+    def add_breakpoint(self, pc):
+        """Добавляет точку останова перед командой по адресу pc."""
+        self.breakpoints.add(pc)
+
+    def remove_breakpoint(self, pc):
+        """Удаляет точку останова (если ее нет - ничего не делает)."""
+        self.breakpoints.discard(pc)
+
+    def add_watchpoint(self, adr, size=2):
+        """
+        Добавляет точку наблюдения за записью в байты [adr, adr + size).
+
+        Raises:
+            ValueError: если диапазон пустой
+        """
+        if size <= 0:
+            raise ValueError("Watchpoint size must be positive")
+        self.watchpoints.append((adr, adr + size))
+        for page in _pages(adr, size):
+            self.memory.watch_page(page)
+        if not self.listening:
+            self.memory.write_listeners.append(self.on_write)
+            self.listening = True
+
+    def remove_watchpoint(self, adr, size=2):
+        """
+        Удаляет точку наблюдения, добавленную с теми же adr и size.
+
+        Raises:
+            ValueError: если такой точки нет
+        """
+        self.watchpoints.remove((adr, adr + size))
+        for page in _pages(adr, size):
+            self.memory.unwatch_page(page)
+        if not self.watchpoints and self.listening:
+            self.memory.write_listeners.remove(self.on_write)
+            self.listening = False
+
+    def clear(self):
+        """Удаляет все точки останова и наблюдения."""
+        self.breakpoints.clear()
+        for start, end in list(self.watchpoints):
+            self.remove_watchpoint(start, end - start)
+
+    def on_write(self, adr, size):
+        """Отмечает событие, если запись [adr, adr + size) задела точку наблюдения."""
+        if self.hit is not None:
+            return
+        end = adr + size
+        for start, stop in self.watchpoints:
+            if adr < stop and start < end:
+                self.hit = {'kind': 'watchpoint', 'pc': self.pc, 'address': adr, 'size': size}
+                return
+
+    def describe(self):
+        """Текст последнего события (или пустая строка, если остановки не было)."""
+        if self.hit is None:
+            return ""
+        if self.hit['kind'] == 'breakpoint':
+            return f"breakpoint at {self.hit['pc']:06o}"
+        return (f"watchpoint: {self.hit['pc']:06o} wrote {self.hit['size']} "
+                f"byte(s) at {self.hit['address']:06o}")
@@ -0,0 +1,67 @@
+import pytest
+from pdp_11_machine import Machine
+from pdp_11_debug import Debugger
+from pdp_11_mem import PAGE_SHIFT
+from bench_suite import START, load_words
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+
+
+def debugged(words=None):
+    machine = Machine()
+    if words is None:
+        machine.load(IMAGE)
+    else:
+        load_words(machine, START, words)
+        machine.reg[7] = START
+    machine.debugger = Debugger(machine)
+    return machine
+
+
+def test_breakpoint_and_resume():
+    machine = debugged()
+    machine.debugger.add_breakpoint(0o1010)  # sob
+    assert machine.run() == 3
+    assert machine.debugger.hit == {'kind': 'breakpoint', 'pc': 0o1010}
+    assert not machine.halted
+    assert machine.reg[1] == 3 and machine.reg[7] == 0o1010
+    # Продолжение выполняет sob и останавливается на следующем проходе
+    assert machine.run() == 2
+    assert machine.reg[1] == 3 + 2
+    machine.debugger.remove_breakpoint(0o1010)
+    machine.run()
+    assert machine.halted and machine.reg[1] == 6
+
+
+WRITE_PROGRAM = [0o012700, 5,               # 1000: mov #5, r0
+                 0o010037, 0o002000,        # 1004: mov r0, @#2000
+                 0o000000]                  # 1010: halt
+
+
+def test_watchpoint_stops_after_write():
+    machine = debugged(WRITE_PROGRAM)
+    machine.debugger.add_watchpoint(0o2000, 2)
+    assert machine.run() == 2
+    assert machine.debugger.hit == {'kind': 'watchpoint', 'pc': 0o1004, 'address': 0o2000, 'size': 2}
+    assert machine.reg[7] == 0o1010
+    assert "001004 wrote 2 byte(s) at 002000" in machine.debugger.describe()
+
+
+def test_watchpoint_outside_range():
+    machine = debugged(WRITE_PROGRAM)
+    machine.debugger.add_watchpoint(0o2002, 4)
+    machine.run()
+    assert machine.halted and machine.debugger.hit is None
+
+
+def test_clear_releases_pages():
+    machine = debugged(WRITE_PROGRAM)
+    debugger = machine.debugger
+    debugger.add_watchpoint(0o30000, 0o1000)
+    assert machine.memory.write_watch[0o30000 >> PAGE_SHIFT]
+    debugger.clear()
+    assert not debugger.armed
+    assert not machine.memory.write_watch[0o30000 >> PAGE_SHIFT]
+    assert debugger.on_write not in machine.memory.write_listeners
+    with pytest.raises(ValueError):
+        debugger.remove_watchpoint(0o30000, 2)
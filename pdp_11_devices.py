@@ -0,0 +1,196 @@
+"""
+Модуль устройств PDP-11.
+
+Устройства подключаются к адресам страницы ввода-вывода (160000-177777)
+через Memory.map_device или Machine.add_device. Обращения команд к этим
+адресам вызывают методы устройства вместо чтения/записи памяти.
+
+Классы:
+- Device: базовый класс устройства с набором 16-битных регистров.
+- Console: консольный терминал (DL11) с буферизованным выводом.
+"""
+
+import copy
+import struct
+import sys
+
+
+class Device:
+    """
+    Базовый класс устройства на шине.
+
+    Устройство занимает size байт начиная с адреса base. По умолчанию это
+    просто набор 16-битных регистров в regs; наследники переопределяют
+    read и write, чтобы реагировать на обращения.
+    """
+
+    base = None
+    size = 2
+
+    def __init__(self):
+        self.regs = [0] * (self.size // 2)
+
+    def read(self, adr):
+        """
+        Читает регистр устройства.
+
+        Args:
+            adr (int): четный адрес регистра
+
+        Returns:
+            int: значение регистра (16 бит)
+        """
+        return self.regs[(adr - self.base) >> 1]
+
+    def write(self, adr, value, is_byte):
+        """
+        Записывает регистр устройства.
+
+        Args:
+            adr (int): адрес (для байта может быть нечетным)
+            value (int): слово или байт
+            is_byte (bool): запись байта
+        """
+        i = (adr - self.base) >> 1
+        if is_byte:
+            shift = 8 * (adr & 1)
+            value = (self.regs[i] & ~(0xFF << shift)) | (value << shift)
+        self.regs[i] = value & 0xFFFF
+
+    def reset(self):
+        """Приводит устройство в начальное состояние."""
+        self.regs = [0] * (self.size // 2)
+
+    def state(self):
+        """
+        Состояние устройства для снимка машины (Machine.snapshot).
+        По умолчанию - регистры regs (слова little-endian).
+
+        Returns:
+            bytes: состояние
+        """
+        return struct.pack(f'<{len(self.regs)}H', *self.regs)
+
+    def restore_state(self, data):
+        """
+        Восстанавливает состояние, сохраненное state.
+
+        Raises:
+            ValueError: если данные не подходят устройству
+        """
+        if len(data) != 2 * len(self.regs):
+            raise ValueError(f"Bad state for device at {self.base:06o}")
+        self.regs = list(struct.unpack(f'<{len(self.regs)}H', data))
+
+    def clone(self):
+        """
+        Возвращает новое устройство в том же состоянии - для копии машины
+        (Machine.fork). Наследники, у которых кроме regs есть изменяемое
+        состояние, переопределяют этот метод.
+        """
+        device = copy.copy(self)
+        device.regs = list(self.regs)
+        return device
+
+    def stop(self):
+        """
+        Вызывается, когда Machine.run возвращает управление (HALT, лимит
+        команд или ошибка) - например, для сброса буферов.
+        """
+        pass
+
+
+class Console(Device):
+    """
+    Консольный терминал в стиле DL11.
+
+    Регистры:
+    - 177560 RCSR: бит 7 (DONE) - во входном буфере есть символ
+    - 177562 RBUF: очередной входной символ (чтение забирает его)
+    - 177564 XCSR: бит 7 (READY) - передатчик всегда готов
+    - 177566 XBUF: запись выводит символ
+
+    Выводимые символы копятся в буфере и передаются в поток хоста одной
+    записью: по переводу строки, при заполнении буфера и при остановке
+    машины (выходе из Machine.run). Ввод берется из заранее загруженных данных.
+    """
+
+    base = 0o177560
+    size = 8
+
+    RCSR, RBUF, XCSR, XBUF = 0o177560, 0o177562, 0o177564, 0o177566
+    DONE = READY = 0o200
+
+    def __init__(self, output=None, input_data=b'', buffer_size=4096, flush_on_newline=True):
+        """
+        Args:
+            output: текстовый поток для вывода (по умолчанию sys.stdout)
+            input_data (bytes | str): входные символы
+            buffer_size (int): размер буфера вывода
+            flush_on_newline (bool): сбрасывать буфер на каждом переводе строки
+        """
+        super().__init__()
+        self.output = output
+        self.buffer_size = buffer_size
+        self.flush_on_newline = flush_on_newline
+        self.out_buffer = bytearray()
+        self.set_input(input_data)
+
+    def set_input(self, data):
+        """Задает входные данные (bytes или str в latin-1)."""
+        self.input_data = data.encode('latin-1') if isinstance(data, str) else bytes(data)
+        self.input_pos = 0
+
+    def load_input(self, filename):
+        """Загружает входные данные из файла."""
+        with open(filename, 'rb') as file:
+            self.set_input(file.read())
+
+    def read(self, adr):
+        if adr == self.RCSR:
+            return self.DONE if self.input_pos < len(self.input_data) else 0
+        if adr == self.RBUF:
+            if self.input_pos < len(self.input_data):
+                self.input_pos += 1
+                return self.input_data[self.input_pos - 1]
+            return 0
+        if adr == self.XCSR:
+            return self.READY
+        return 0
+
+    def write(self, adr, value, is_byte):
+        if adr != self.XBUF:
+            return  # биты разрешения прерываний в CSR пока не поддерживаются
+        char = value & 0xFF
+        self.out_buffer.append(char)
+        if len(self.out_buffer) >= self.buffer_size or (char == 0o12 and self.flush_on_newline):
+            self.flush()
+
+    def flush(self):
+        """Передает накопленный вывод в поток хоста одной записью."""
+        if not self.out_buffer:
+            return
+        output = self.output if self.output is not None else sys.stdout
+        output.write(self.out_buffer.decode('latin-1'))
+        output.flush()
+        self.out_buffer.clear()
+
+    def state(self):
+        # RCSR и XCSR вычисляются по входным данным, поэтому состояние -
+        # еще не прочитанный ввод
+        return self.input_data[self.input_pos:]
+
+    def restore_state(self, data):
+        self.set_input(data)
+
+    def clone(self):
+        device = super().clone()
+        device.out_buffer = bytearray()  # накопленный вывод остается у исходной консоли
+        return device
+
+    def reset(self):
+        self.flush()
+        self.input_pos = 0
+
+    def stop(self):
+        self.flush()
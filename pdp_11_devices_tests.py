@@ -0,0 +1,72 @@
+import io
+
+from pdp_11_devices import Device, Console
+from pdp_11_machine import Machine
+
+
+def load_words(machine, adr, words):
+    for i, word in enumerate(words):
+        machine.memory.w_write(adr + 2 * i, word)
+
+
+class Stream(io.StringIO):
+    """Текстовый поток, считающий записи."""
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+def test_device_byte_write():
+    class Registers(Device):
+        base = 0o177700
+        size = 2
+
+    device = Registers()
+    device.write(0o177700, 0o1234, False)
+    device.write(0o177701, 0o377, True)
+    assert device.read(0o177700) == 0o177634
+
+
+def test_console_batches_output():
+    stream = Stream()
+    console = Console(stream)
+    for char in b"hello\nworld":
+        console.write(Console.XBUF, char, True)
+    assert stream.getvalue() == "hello\n"
+    assert stream.writes == 1
+    console.stop()
+    assert stream.getvalue() == "hello\nworld"
+    assert stream.writes == 2
+
+
+def test_console_buffer_full():
+    stream = Stream()
+    console = Console(stream, buffer_size=4, flush_on_newline=False)
+    for char in b"abcdefghi\n":
+        console.write(Console.XBUF, char, False)
+    assert stream.getvalue() == "abcdefgh"
+
+
+def test_console_input():
+    console = Console(Stream(), input_data="ok")
+    assert console.read(Console.XCSR) == Console.READY
+    assert console.read(Console.RCSR) == Console.DONE
+    assert console.read(Console.RBUF) == ord("o")
+    assert console.read(Console.RBUF) == ord("k")
+    assert console.read(Console.RCSR) == 0
+
+
+def test_guest_echoes_input():
+    stream = Stream()
+    machine = Machine()
+    machine.add_device(Console(stream, input_data="PDP\n"))
+    # 4 раза mov @#177562, @#177566, затем halt
+    load_words(machine, 0o1000, [0o013737, 0o177562, 0o177566] * 4 + [0])
+    machine.reg[7] = 0o1000
+    machine.run()
+    assert stream.getvalue() == "PDP\n"
+    assert stream.writes == 1
@@ -0,0 +1,175 @@
+"""
+Модуль кэша декодированных команд PDP-11.
+
+Команда, декодированная один раз, сохраняется по своему адресу: обработчик,
+разобранные поля режимов/регистров и длина команды в байтах. При повторном
+выполнении (например, в цикле sob) слово команды не читается и не
+разбирается заново.
+
+Корректность при самомодифицирующемся коде: страницы памяти, на которых лежат
+закэшированные команды, ставятся под наблюдение (Memory.watch_page).
+Запись в такую страницу удаляет из кэша все команды, чьи байты она задела.
+
+Классы:
+- DecodedInstruction: декодированная команда.
+- InstructionCache: кэш декодированных команд с учетом попаданий и промахов.
+"""
+
+import pdp_11_mem
+from pdp_11_mem import PAGE_SHIFT, MEMSIZE
+from pdp_11_commands import decode_table
+from pdp_11_args import MODE_RESOLVERS
+from pdp_11_timing import instruction_cycles
+
+
+def operand_words(mode, r):
+    """Возвращает число дополнительных слов операнда (0 или 1)."""
+    if mode >= 6 or (r == 7 and mode in (2, 3)):
+        return 1
+    return 0
+
+
+def _pages(adr, size):
+    """Номера страниц, которые задевают байты [adr, adr + size)."""
+    return range(adr >> PAGE_SHIFT, ((min(adr + size, MEMSIZE) - 1) >> PAGE_SHIFT) + 1)
+
+
+class DecodedInstruction:
+    """Команда с заранее выделенными полями аргументов."""
+
+    __slots__ = ('pc', 'word', 'cmd', 'handler', 'ss_mode', 'ss_reg', 'ss_resolver',
+                 'dd_mode', 'dd_reg', 'dd_resolver', 'reads_dd', 'r', 'nn', 'xx', 'length', 'cycles', 'execute')
+
+    def __init__(self, pc, word, resolvers=MODE_RESOLVERS):
+        cmd = decode_table[word]
+        params = cmd['params']
+        self.pc = pc
+        self.word = word
+        self.cmd = cmd
+        self.handler = cmd['handler']
+        self.ss_mode = self.ss_reg = self.ss_resolver = None
+        self.dd_mode = self.dd_reg = self.dd_resolver = None
+        self.reads_dd = cmd['reads_dd']
+        self.r = self.nn = self.xx = None
+        length = 2
+        for param in params:
+            if param == 'ss':
+                self.ss_mode, self.ss_reg = (word >> 9) & 7, (word >> 6) & 7
+                self.ss_resolver = resolvers[self.ss_mode]
+                length += 2 * operand_words(self.ss_mode, self.ss_reg)
+            elif param == 'dd':
+                self.dd_mode, self.dd_reg = (word >> 3) & 7, word & 7
+                self.dd_resolver = resolvers[self.dd_mode]
+                length += 2 * operand_words(self.dd_mode, self.dd_reg)
+            elif param == 'r':
+                self.r = (word >> 6) & 0o7
+            elif param == 'nn':
+                self.nn = word & 0o77
+            elif param == 'xx':
+                self.xx = ((word & 0o377) ^ 0o200) - 0o200
+            else:
+                raise ValueError(f'Unknown argument type {param}')
+        self.length = length
+        self.cycles = instruction_cycles(word)
+        self.execute = None  # функция выполнения (см. pdp_11_specialize)
+
+
+class InstructionCache:
+    """
+    Кэш декодированных команд, ключ - адрес команды.
+
+    Основной цикл обращается к entries напрямую:
+
+        decoded = icache.entries.get(pc)
+        if decoded is None:
+            decoded = icache.fill(pc)
+        else:
+            icache.hits += 1
+    """
+
+    def __init__(self, memory=None, resolvers=MODE_RESOLVERS, specializer=None):
+        """
+        Args:
+            memory (Memory): память, из которой читаются команды
+                (по умолчанию pdp_11_mem.default_memory)
+            resolvers (tuple): функции режимов адресации машины
+                (см. make_resolvers в pdp_11_args)
+            specializer (Specializer): если задан, каждая команда получает
+                функцию выполнения execute (см. pdp_11_specialize)
+        """
+        self.memory = memory if memory is not None else pdp_11_mem.default_memory
+        self.resolvers = resolvers
+        self.specializer = specializer
+        self.entries = {}
+        self.pages = {}  # страница -> множество адресов команд, задевающих ее
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.memory.write_listeners.append(self.on_write)
+
+    def fill(self, pc):
+        """
+        Декодирует команду по адресу pc и кладет ее в кэш (промах кэша).
+
+        Returns:
+            DecodedInstruction: декодированная команда
+        """
+        self.misses += 1
+        decoded = DecodedInstruction(pc, self.memory.fetch(pc), self.resolvers)
+        if self.specializer is not None:
+            decoded.execute = self.specializer.execute_for(decoded)
+        self.entries[pc] = decoded
+        for page in _pages(pc, decoded.length):
+            pcs = self.pages.get(page)
+            if pcs is None:
+                pcs = self.pages[page] = set()
+                self.memory.watch_page(page)
+            pcs.add(pc)
+        return decoded
+
+    def on_write(self, adr, size):
+        """Удаляет из кэша команды, пересекающиеся с записанными байтами [adr, adr + size)."""
+        end = adr + size
+        for page in _pages(adr, size):
+            pcs = self.pages.get(page)
+            if not pcs:
+                continue
+            for pc in [pc for pc in pcs if pc < end and adr < pc + self.entries[pc].length]:
+                self.invalidate(pc)
+
+    def invalidate(self, pc):
+        """Удаляет из кэша команду по адресу pc."""
+        decoded = self.entries.pop(pc)
+        self.invalidations += 1
+        for page in _pages(pc, decoded.length):
+            pcs = self.pages[page]
+            pcs.discard(pc)
+            if not pcs:
+                del self.pages[page]
+                self.memory.unwatch_page(page)
+
+    def clear(self):
+        """Очищает кэш (счетчики попаданий и промахов сохраняются)."""
+        for pc in list(self.entries):
+            self.invalidate(pc)
+
+    def close(self):
+        """Очищает кэш и отключает его от наблюдения за записью в память."""
+        self.clear()
+        self.memory.write_listeners.remove(self.on_write)
+
+    def stats(self):
+        """
+        Возвращает статистику кэша.
+
+        Returns:
+            dict: hits, misses, invalidations, entries и hit_rate (доля попаданий)
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'entries': len(self.entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,65 @@
+import pytest
+from pdp_11_mem import w_write, b_write, mem_clear, write_watch, PAGE_SHIFT
+from pdp_11_icache import InstructionCache
+
+
+@pytest.fixture
+def icache():
+    mem_clear()
+    w_write(0o1000, 0o012700)  # mov #3, r0
+    w_write(0o1002, 0o000003)
+    w_write(0o1004, 0o060001)  # add r0, r1
+    cache = InstructionCache()
+    yield cache
+    cache.close()
+
+
+def test_decoded_fields(icache):
+    decoded = icache.fill(0o1000)
+    assert decoded.cmd['name'] == 'mov'
+    assert (decoded.ss_mode, decoded.ss_reg) == (2, 7)
+    assert (decoded.dd_mode, decoded.dd_reg) == (0, 0)
+    assert decoded.length == 4
+    assert icache.fill(0o1004).length == 2
+
+
+def test_fill_watches_page(icache):
+    icache.fill(0o1000)
+    assert write_watch[0o1000 >> PAGE_SHIFT]
+    icache.clear()
+    assert not write_watch[0o1000 >> PAGE_SHIFT]
+
+
+def test_write_invalidates_instruction(icache):
+    icache.fill(0o1000)
+    icache.fill(0o1004)
+    # Запись в непосредственный операнд mov задевает только mov
+    w_write(0o1002, 5)
+    assert 0o1000 not in icache.entries
+    assert 0o1004 in icache.entries
+    # Побайтовая запись тоже сбрасывает команду
+    b_write(0o1005, 0o5)
+    assert 0o1004 not in icache.entries
+    assert icache.stats()['invalidations'] == 2
+
+
+def test_write_near_code_keeps_cache(icache):
+    icache.fill(0o1004)
+    w_write(0o1006, 7)
+    assert 0o1004 in icache.entries
+
+
+def test_self_modified_code_is_redecoded(icache):
+    assert icache.fill(0o1004).cmd['name'] == 'add'
+    w_write(0o1004, 0o005001)  # clr r1
+    assert 0o1004 not in icache.entries
+    assert icache.fill(0o1004).cmd['name'] == 'clr'
+    assert icache.stats()['misses'] == 2
+
+
+def test_block_write_invalidates(icache):
+    icache.fill(0o1000)
+    icache.fill(0o1004)
+    icache.memory.write_bytes(0o1003, b'\x00')
+    assert 0o1000 not in icache.entries
+    assert 0o1004 in icache.entries
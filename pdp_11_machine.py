@@ -0,0 +1,565 @@
+"""
+Модуль машины PDP-11.
+
+Machine объединяет все состояние одного эмулируемого компьютера: память,
+регистры, слово состояния (PSW), разбор аргументов и кэш декодированных команд. Обработчики команд
+получают ArgsProcessor своей машины, поэтому в одном процессе можно создать
+сколько угодно независимых машин, сбрасывать и запускать их по очереди.
+
+Классы:
+- Machine: одна машина PDP-11.
+
+Профилировщик (pdp_11_profile.Profiler) подключается полем profiler,
+точки останова и наблюдения (pdp_11_debug.Debugger) - полем debugger.
+
+Снимки состояния (snapshot/restore, save_snapshot/load_snapshot, fork)
+позволяют один раз выполнить подготовительный код программы, а затем
+запускать продолжение сколько угодно раз без повторного выполнения.
+
+Переменные:
+- default_machine: машина поверх памяти и регистров по умолчанию из pdp_11_mem
+  (с ними работают модульные функции b_write, w_read и т.д.).
+
+Machine.run выполняет команды до HALT, лимита команд или адреса until_pc
+и записывает причину остановки в поле status; Machine.execute делает то же
+и возвращает словарь с итогом, не передавая исключения дальше. Число
+выполненных команд и оценка циклов шины (pdp_11_timing) накапливаются
+в полях instructions и cycles.
+
+Программу на ассемблере можно загрузить без промежуточного файла:
+load_source(текст) или load_program(pdp_11_asm.assemble(текст)).
+
+Пример:
+    machine = Machine()
+    machine.load("integral_tests/02_sob.pdp.o")
+    machine.run()
+    reg_dump(machine.reg)
+
+    result = machine.execute(max_instructions=1000)
+    print(result["status"], result["cycles"])
+"""
+
+import struct
+import zlib
+from itertools import repeat
+
+import pdp_11_mem
+from pdp_11_mem import Memory
+from pdp_11_args import ArgsProcessor, make_resolvers
+from pdp_11_psw import PSW
+from pdp_11_commands import Halted
+from pdp_11_icache import InstructionCache
+from pdp_11_specialize import Specializer
+from pdp_11_translate import BlockCache
+from pdp_11_asm import assemble, assemble_file
+from data_load import load_file
+
+START_ADDRESS = 0o1000
+ASM_SUFFIXES = ('.s', '.asm', '.mac')
+
+# Снимок состояния: заголовок, затем секции (тег, длина, данные).
+# Новое состояние (PSW, устройства) добавляется новыми секциями.
+SNAPSHOT_MAGIC = b'P11S'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sH')
+SNAPSHOT_SECTION = struct.Struct('<4sI')
+REGS_FORMAT = struct.Struct('<8H')
+DEVICE_STATE = struct.Struct('<HI')  # в секции DEVS: адрес устройства, длина состояния
+PSW_FORMAT = struct.Struct('<H')
+
+
+class Machine:
+    """
+    Одна машина PDP-11: память, регистры, PSW и состояние декодирования.
+
+    PSW не подключено к шине: чтобы программа могла читать и писать его
+    по адресу 177776, его нужно подключить как устройство
+    (machine.add_device(machine.psw)).
+    """
+
+    def __init__(self, memory=None, reg=None, translate=False):
+        """
+        Args:
+            memory (Memory): память машины (по умолчанию создается новая)
+            reg (list): список из 8 регистров (по умолчанию создается новый)
+            translate (bool): выполнять линейные участки кода транслированными
+                в функции Python (см. pdp_11_translate)
+        """
+        self.memory = memory if memory is not None else Memory()
+        self.reg = reg if reg is not None else [0] * 8
+        self.psw = PSW()
+        self.args = ArgsProcessor(self.reg, self.memory, self, self.psw)
+        self.icache = InstructionCache(self.memory, self.args.resolvers, Specializer(self.args))
+        self.translator = BlockCache(self.reg, self.memory, self.psw) if translate else None
+        self.tracer = None
+        self.profiler = None
+        self.debugger = None
+        self.halted = False
+        self.status = None  # причина последней остановки (см. run)
+        self.instructions = 0
+        self.cycles = 0
+        self._checked_cycles = 0
+        self.devices = []
+        self.memory.bind_listeners.append(self._bind_memory)
+
+    def _bind_memory(self):
+        """
+        Заново берет функции доступа к памяти после их замены
+        (Memory.count_accesses): режимы адресации, специализированные
+        обработчики и кэши команд и участков их запомнили.
+        """
+        self.args.resolvers = self.icache.resolvers = make_resolvers(self.reg, self.memory)
+        self.icache.specializer.w_read = self.memory.w_read
+        self.icache.specializer.w_write = self.memory.w_write
+        self.icache.clear()
+        if self.translator is not None:
+            self.translator.clear()
+
+    def load(self, filename, start=None):
+        """
+        Загружает образ памяти из файла (текстового или двоичного,
+        см. data_load.load_file) и ставит PC на адрес первой команды.
+        Файлы с текстом программы (ASM_SUFFIXES) ассемблируются
+        и загружаются как load_program.
+
+        Args:
+            filename (str): путь к файлу образа
+            start (int): адрес первой команды; по умолчанию - из заголовка
+                двоичного образа, адрес запуска программы на ассемблере
+                или START_ADDRESS для текстового файла
+        """
+        if filename.lower().endswith(ASM_SUFFIXES):
+            image_start = assemble_file(filename).load(self.memory)
+        else:
+            image_start = load_file(filename, self.memory)
+        if start is None:
+            start = image_start if image_start is not None else START_ADDRESS
+        self.reg[7] = start
+
+    def load_program(self, program):
+        """
+        Загружает результат ассемблирования (pdp_11_asm.Program): участки
+        копируются в память одной операцией каждый, PC - на адрес запуска.
+        """
+        self.reg[7] = program.load(self.memory)
+
+    def load_source(self, source):
+        """
+        Ассемблирует текст программы и загружает его (см. load_program).
+
+        Returns:
+            Program: результат ассемблирования (таблица символов и т.д.)
+
+        Raises:
+            AsmError: при ошибке в тексте
+        """
+        program = assemble(source)
+        self.load_program(program)
+        return program
+
+    def add_device(self, device):
+        """
+        Подключает устройство к шине по его адресам (device.base, device.size).
+
+        Returns:
+            Device: подключенное устройство
+        """
+        self.memory.map_device(device.base, device.size, device)
+        self.devices.append(device)
+        return device
+
+    def reset(self):
+        """Обнуляет память, регистры, PSW и устройства; кэш команд сбрасывается вместе с памятью."""
+        self.memory.clear()
+        self.reg[:] = [0] * 8
+        self.psw.reset()
+        self.icache.clear()
+        if self.translator is not None:
+            self.translator.clear()
+        self.halted = False
+        self.status = None
+        self.instructions = self.cycles = 0
+        for device in self.devices:
+            device.reset()
+
+    def run(self, max_instructions=None, until_pc=None):
+        """
+        Выполняет команды начиная с текущего PC до команды HALT
+        или до исчерпания лимита команд.
+
+        Команды выполняются функциями execute из кэша команд (для частых
+        сочетаний команды и режимов - специализированными, см.
+        pdp_11_specialize). При трассировке команды выполняются общим путем
+        через ArgsProcessor, чтобы приемник трассировки видел операнды.
+
+        Если включена трансляция (и нет трассировки и профилировщика),
+        переведенные участки выполняются целиком, остальные команды -
+        обычным циклом; участок, не помещающийся в остаток лимита,
+        тоже выполняется обычным циклом.
+
+        Если у подключенного отладчика (debugger) есть точки останова или
+        наблюдения, или задан until_pc, выполняется цикл с проверками:
+        остановка перед командой по точке останова (или по адресу until_pc)
+        или после команды, записавшей в наблюдаемый диапазон (событие -
+        в debugger.hit). Повторный run продолжает выполнение с команды,
+        на которой сработала точка останова. Адрес until_pc не проверяется
+        перед первой командой: run(until_pc=machine.reg[7]) выполняет
+        один проход цикла до возврата на тот же адрес.
+
+        Причина остановки записывается в поле status: 'halted' (HALT),
+        'budget' (исчерпан лимит команд), 'breakpoint' (точка останова
+        или until_pc), 'watchpoint' или 'error' (исключение при выполнении
+        команды; оно передается дальше). Число выполненных команд и оценка
+        циклов шины (см. pdp_11_timing) накапливаются в полях instructions
+        и cycles.
+
+        После HALT поле halted становится истинным. Если выполнение
+        остановлено лимитом, его можно продолжить повторным вызовом run.
+
+        Args:
+            max_instructions (int): наибольшее число команд за вызов
+                (None - без ограничения)
+            until_pc (int): адрес, перед командой по которому выполнение
+                останавливается (None - не останавливаться)
+
+        Returns:
+            int: число выполненных команд (включая HALT)
+        """
+        reg = self.reg
+        args = self.args
+        icache = self.icache
+        entries = icache.entries
+        tracer = self.tracer
+        read = self.memory.fetch
+        executed = icache.hits + icache.misses
+        translated = 0
+        cycles = 0
+        self.halted = False
+        self.status = 'budget'
+        steps = repeat(None) if max_instructions is None else range(max_instructions)
+        checked = until_pc is not None or (self.debugger is not None and self.debugger.armed)
+
+        try:
+            if checked:
+                self._run_checked(steps, until_pc)
+            elif self.translator is not None and tracer is None and self.profiler is None:
+                blocks = self.translator.blocks
+                translate = self.translator.translate
+                limit = float('inf') if max_instructions is None else max_instructions
+                done = 0
+                while done < limit:
+                    pc = reg[7]
+                    block = blocks.get(pc)
+                    if block is None:
+                        block = translate(pc)
+                    if block.run is not None and done + block.length <= limit:
+                        count = block.run()
+                        done += count
+                        translated += count
+                        cycles += block.cycles[count]
+                        continue
+
+                    decoded = entries.get(pc)
+                    if decoded is None:
+                        decoded = icache.fill(pc)
+                    else:
+                        icache.hits += 1
+                    reg[7] = pc + 2
+                    done += 1
+                    cycles += decoded.cycles
+                    decoded.execute()
+            elif self.profiler is None:
+                for _ in steps:
+                    pc = reg[7]
+                    decoded = entries.get(pc)
+                    if decoded is None:
+                        decoded = icache.fill(pc)
+                    else:
+                        icache.hits += 1
+                    cycles += decoded.cycles
+                    if tracer is None:
+                        reg[7] = pc + 2
+                        decoded.execute()
+                    else:
+                        tracer.trace(pc, read)
+                        reg[7] = pc + 2
+                        args.process_decoded(decoded)
+                        decoded.handler(args)
+            else:
+                # Тот же цикл со счетчиком по PC: без профилировщика
+                # основной цикл не делает лишней проверки
+                counts = self.profiler.counts
+                for _ in steps:
+                    pc = reg[7]
+                    counts[pc >> 1] += 1
+                    decoded = entries.get(pc)
+                    if decoded is None:
+                        decoded = icache.fill(pc)
+                    else:
+                        icache.hits += 1
+                    cycles += decoded.cycles
+                    if tracer is None:
+                        reg[7] = pc + 2
+                        decoded.execute()
+                    else:
+                        tracer.trace(pc, read)
+                        reg[7] = pc + 2
+                        args.process_decoded(decoded)
+                        decoded.handler(args)
+        except Halted:
+            self.halted = True
+            self.status = 'halted'
+        except Exception:
+            self.status = 'error'
+            raise
+        finally:
+            for device in self.devices:
+                device.stop()
+            count = icache.hits + icache.misses - executed + translated
+            self.instructions += count
+            self.cycles += self._checked_cycles if checked else cycles
+
+        return count
+
+    def execute(self, max_instructions=None, until_pc=None):
+        """
+        Выполняет команды как run, но не передает исключения дальше:
+        удобно для поочередного выполнения многих машин квантами.
+
+        Args:
+            max_instructions (int): наибольшее число команд за вызов
+            until_pc (int): адрес остановки (см. run)
+
+        Returns:
+            dict: status (см. run), instructions и cycles за этот вызов,
+                error (текст исключения или None)
+        """
+        instructions, cycles = self.instructions, self.cycles
+        error = None
+        try:
+            self.run(max_instructions, until_pc)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        return {
+            "status": self.status,
+            "instructions": self.instructions - instructions,
+            "cycles": self.cycles - cycles,
+            "error": error,
+        }
+
+    def _run_checked(self, steps, until_pc=None):
+        """
+        Цикл выполнения с проверкой точек останова и наблюдения (см. run).
+
+        Циклы шины накапливаются в поле _checked_cycles, чтобы run мог
+        учесть их и при выходе по исключению (HALT).
+        """
+        reg = self.reg
+        args = self.args
+        icache = self.icache
+        entries = icache.entries
+        tracer = self.tracer
+        read = self.memory.fetch
+        counts = self.profiler.counts if self.profiler is not None else None
+        debugger = self.debugger
+        if debugger is not None:
+            breakpoints = debugger.breakpoints
+            hit = debugger.hit
+            resume = hit is not None and hit['kind'] == 'breakpoint' and hit['pc'] == reg[7]
+            debugger.hit = None
+        else:
+            breakpoints, resume = (), False
+        first = True
+        self._checked_cycles = 0
+
+        for _ in steps:
+            pc = reg[7]
+            if pc == until_pc and not first:
+                self.status = 'breakpoint'
+                break
+            first = False
+            if pc in breakpoints and not resume:
+                debugger.hit = {'kind': 'breakpoint', 'pc': pc}
+                self.status = 'breakpoint'
+                break
+            resume = False
+            if counts is not None:
+                counts[pc >> 1] += 1
+            decoded = entries.get(pc)
+            if decoded is None:
+                decoded = icache.fill(pc)
+            else:
+                icache.hits += 1
+            self._checked_cycles += decoded.cycles
+            if debugger is not None:
+                debugger.pc = pc
+            if tracer is None:
+                reg[7] = pc + 2
+                decoded.execute()
+            else:
+                tracer.trace(pc, read)
+                reg[7] = pc + 2
+                args.process_decoded(decoded)
+                decoded.handler(args)
+            if debugger is not None and debugger.hit is not None:
+                self.status = 'watchpoint'
+                break
+
+    def state_sections(self, compress=False):
+        """
+        Возвращает секции снимка состояния машины.
+
+        Args:
+            compress (bool): сжимать ли память (zlib); память обычно почти
+                пустая, и сжатый снимок занимает несколько сотен байт
+
+        Returns:
+            list: пары (тег из 4 байт, данные)
+
+        Raises:
+            TypeError: если у подключенного устройства нельзя сохранить состояние
+        """
+        regs = REGS_FORMAT.pack(*(r & 0xFFFF for r in self.reg))
+        psw = PSW_FORMAT.pack(self.psw.value)
+        if compress:
+            sections = [(b'REGS', regs), (b'PSW ', psw), (b'MEMZ', zlib.compress(self.memory.mem, 1))]
+        else:
+            sections = [(b'REGS', regs), (b'PSW ', psw), (b'MEM ', bytes(self.memory.mem))]
+        devices = []
+        for device in self.devices:
+            if device is self.psw:
+                continue  # PSW сохраняется своей секцией
+            if not hasattr(device, 'state'):
+                raise TypeError(f"State of device {type(device).__name__} "
+                                f"at {device.base:06o} cannot be saved")
+            state = device.state()
+            devices.append(DEVICE_STATE.pack(device.base, len(state)) + state)
+        if devices:
+            sections.append((b'DEVS', b''.join(devices)))
+        return sections
+
+    def _restore_devices(self, data):
+        by_base = {device.base: device for device in self.devices}
+        pos = 0
+        while pos < len(data):
+            if pos + DEVICE_STATE.size > len(data):
+                raise ValueError("Snapshot is truncated")
+            base, size = DEVICE_STATE.unpack_from(data, pos)
+            pos += DEVICE_STATE.size
+            if pos + size > len(data):
+                raise ValueError("Snapshot is truncated")
+            device = by_base.get(base)
+            if device is None or device is self.psw:
+                raise ValueError(f"Snapshot has state of a device at {base:06o} that is not attached")
+            device.restore_state(bytes(data[pos:pos + size]))
+            pos += size
+
+    def restore_section(self, tag, data):
+        """
+        Восстанавливает одну секцию снимка.
+
+        Raises:
+            ValueError: если тег секции неизвестен
+        """
+        if tag == b'REGS':
+            self.reg[:] = REGS_FORMAT.unpack(data)
+        elif tag == b'PSW ':
+            (self.psw.value,) = PSW_FORMAT.unpack(data)
+        elif tag == b'MEM ':
+            self.memory.write_bytes(0, data)
+        elif tag == b'MEMZ':
+            self.memory.write_bytes(0, zlib.decompress(data))
+        elif tag == b'DEVS':
+            self._restore_devices(data)
+        else:
+            raise ValueError(f"Unknown snapshot section {tag}")
+
+    def snapshot(self, compress=False):
+        """
+        Сохраняет полное состояние машины (память, регистры, PSW и состояние
+        подключенных устройств) в байты. При восстановлении устройства
+        должны быть подключены по тем же адресам.
+
+        Returns:
+            bytes: снимок состояния
+
+        Raises:
+            TypeError: если у подключенного устройства нельзя сохранить состояние
+        """
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION)]
+        for tag, data in self.state_sections(compress):
+            parts.append(SNAPSHOT_SECTION.pack(tag, len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+    def restore(self, snapshot):
+        """
+        Восстанавливает состояние машины из снимка (см. snapshot).
+
+        Память копируется одной операцией; закэшированные команды
+        на измененных страницах сбрасываются.
+
+        Raises:
+            ValueError: если данные не являются снимком или повреждены
+        """
+        magic, version = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Not a PDP-11 machine snapshot")
+        view = memoryview(snapshot)
+        pos = SNAPSHOT_HEADER.size
+        while pos < len(view):
+            tag, size = SNAPSHOT_SECTION.unpack_from(view, pos)
+            pos += SNAPSHOT_SECTION.size
+            if pos + size > len(view):
+                raise ValueError("Snapshot is truncated")
+            self.restore_section(tag, view[pos:pos + size])
+            pos += size
+        self.halted = False
+
+    def save_snapshot(self, filename, compress=True):
+        """Сохраняет снимок состояния в файл (по умолчанию со сжатием памяти)."""
+        with open(filename, 'wb') as file:
+            file.write(self.snapshot(compress))
+
+    def load_snapshot(self, filename):
+        """Восстанавливает состояние из файла снимка."""
+        with open(filename, 'rb') as file:
+            self.restore(file.read())
+
+    def fork(self):
+        """
+        Создает независимую копию машины в текущем состоянии.
+
+        Копируются память (одной операцией), регистры и PSW; кэш команд
+        у копии свой и заполняется заново. Устройства копируются
+        (Device.clone) и подключаются к копии по тем же адресам.
+
+        Returns:
+            Machine: новая машина
+
+        Raises:
+            TypeError: если подключено устройство, которое нельзя скопировать
+        """
+        clone = Machine(translate=self.translator is not None)
+        clone.memory.write_bytes(0, self.memory.mem)
+        clone.reg[:] = self.reg
+        clone.psw.nzv, clone.psw.c, clone.psw.high = self.psw.nzv, self.psw.c, self.psw.high
+        clone.halted = self.halted
+        for device in self.devices:
+            if device is self.psw:
+                clone.add_device(clone.psw)
+                continue
+            if not hasattr(device, 'clone'):
+                raise TypeError(f"Device {type(device).__name__} at {device.base:06o} cannot be copied")
+            clone.add_device(device.clone())
+        return clone
+
+    def close(self):
+        """Отключает кэши команд от памяти (нужно, если память переживает машину)."""
+        self.memory.bind_listeners.remove(self._bind_memory)
+        self.icache.close()
+        if self.translator is not None:
+            self.translator.close()
+
+
+default_machine = Machine(pdp_11_mem.default_memory, pdp_11_mem.reg)
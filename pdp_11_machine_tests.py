@@ -0,0 +1,282 @@
+import pytest
+import pdp_11_mem
+from pdp_11_machine import Machine, default_machine
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+
+
+def test_run_until_halt():
+    machine = Machine()
+    machine.load(IMAGE)
+    assert machine.run() == 9
+    assert machine.reg[0] == 0
+    assert machine.reg[1] == 6
+    assert machine.reg[7] == 0o1014
+
+
+def test_machines_are_independent():
+    first, second = Machine(), Machine()
+    first.load(IMAGE)
+    second.load(IMAGE)
+    second.memory.w_write(0o1002, 5)  # mov #5, r0
+    first.run()
+    second.run()
+    assert first.reg[1] == 3 + 2 + 1
+    assert second.reg[1] == 5 + 4 + 3 + 2 + 1
+    assert first.memory.mem is not second.memory.mem
+
+
+def test_reset_and_rerun():
+    machine = Machine()
+    machine.load(IMAGE)
+    machine.run()
+    machine.reset()
+    assert machine.reg == [0] * 8
+    assert machine.memory.w_read(0o1000) == 0
+    assert not machine.icache.entries
+    machine.load(IMAGE)
+    assert machine.run() == 9
+    assert machine.reg[1] == 6
+
+
+def test_default_machine_uses_module_state():
+    assert default_machine.memory is pdp_11_mem.default_memory
+    assert default_machine.reg is pdp_11_mem.reg
+
+
+def test_snapshot_restore():
+    machine = Machine()
+    machine.load(IMAGE)
+    machine.run(max_instructions=3)  # mov, clr, add
+    data = machine.snapshot()
+    machine.run()
+    assert machine.reg[1] == 6
+
+    restored = Machine()
+    restored.restore(data)
+    assert restored.reg[7] == 0o1010
+    assert restored.run() == 6
+    assert restored.reg == machine.reg
+
+
+def test_snapshot_restore_invalidates_cached_code():
+    machine = Machine()
+    machine.load(IMAGE)
+    data = machine.snapshot()
+    machine.memory.w_write(0o1002, 5)  # mov #5, r0
+    machine.run()
+    assert machine.reg[1] == 15
+    machine.restore(data)
+    machine.run()
+    assert machine.reg[1] == 6
+
+
+def test_snapshot_file(tmp_path):
+    machine = Machine()
+    machine.load(IMAGE)
+    filename = tmp_path / "state.snap"
+    machine.save_snapshot(str(filename))
+    assert filename.stat().st_size < 1024  # память почти пустая и сжата
+
+    restored = Machine()
+    restored.load_snapshot(str(filename))
+    assert restored.memory.mem == machine.memory.mem
+    assert restored.reg == machine.reg
+
+
+def test_snapshot_saves_device_state():
+    import io
+    from pdp_11_devices import Console, Device
+
+    class Registers(Device):
+        base = 0o177700
+        size = 4
+
+    machine = Machine()
+    console = machine.add_device(Console(io.StringIO(), input_data="abc"))
+    machine.add_device(Registers()).regs[1] = 0o1234
+    machine.add_device(machine.psw)
+    machine.load_source("mov @#177562, r0\nhalt\nmov @#177560, r1\nmov @#177562, r2\nhalt\n")
+    machine.run()
+    data = machine.snapshot(compress=True)
+    console.set_input("")
+
+    restored = Machine()
+    restored.add_device(Console(io.StringIO()))
+    registers = restored.add_device(Registers())
+    restored.add_device(restored.psw)
+    restored.restore(data)
+    assert registers.regs == [0, 0o1234]
+    restored.run()
+    assert restored.reg[1] == Console.DONE and restored.reg[2] == ord("b")
+
+    with pytest.raises(ValueError):
+        Machine().restore(data)  # устройства не подключены
+
+
+COUNTED = """
+        . = 1000
+        mov #2000, r0
+        mov (r0)+, r1
+        add @#2002, r1
+        mov r1, 2004
+        mov #3, r2
+loop:   add #1, r3
+        sob r2, loop
+        halt
+        . = 2000
+        .word 5, 7
+"""
+
+
+@pytest.mark.parametrize("translate", [False, True])
+@pytest.mark.parametrize("trace", [False, True])
+def test_access_counts_on_existing_machine(translate, trace):
+    import io
+    from pdp_11_profile import Profiler
+    from pdp_11_trace import TextTracer
+
+    machine = Machine(translate=translate)
+    machine.load_source(COUNTED)
+    counts = machine.memory.count_accesses()  # после создания машины
+    if trace:
+        machine.tracer = TextTracer(io.StringIO())
+    machine.profiler = Profiler()
+    machine.run()
+    machine.profiler.report(machine.memory.fetch)
+    # Страница 001000: слова операндов #2000, @#2002, 2004, #3 и 3 раза #1;
+    # страница 002000: (r0)+ и @#2002, запись в 2004
+    assert list(counts.reads[:3]) == [0, 7, 2]
+    assert list(counts.writes[:3]) == [0, 0, 1]
+    assert sum(counts.reads) == 9 and sum(counts.writes) == 1
+
+    machine.memory.stop_counting()
+    machine.reg[7] = 0o1000
+    machine.run()
+    assert sum(counts.reads) == 9
+
+
+def test_restore_rejects_garbage():
+    with pytest.raises(ValueError):
+        Machine().restore(b"XXXX\x01\x00")
+
+
+def test_fork_is_independent():
+    machine = Machine()
+    machine.load(IMAGE)
+    child = machine.fork()
+    child.memory.w_write(0o1002, 4)
+    child.run()
+    machine.run()
+    assert child.reg[1] == 10
+    assert machine.reg[1] == 6
+
+
+def test_fork_copies_devices():
+    import io
+    from pdp_11_devices import Console
+
+    machine = Machine()
+    stream = io.StringIO()
+    console = machine.add_device(Console(stream, input_data="xy"))
+    machine.add_device(machine.psw)
+    machine.load_source("mov @#177562, r0\nmov #101, @#177566\nmov @#177776, r1\nhalt\n")
+    machine.psw.value = 0o340
+
+    child = machine.fork()
+    assert child.devices[0] is not console and child.devices[1] is child.psw
+    child.run()
+    assert stream.getvalue() == "A"
+    assert child.reg[0] == ord("x") and child.reg[1] == 0o340
+    assert console.input_pos == 0  # ввод исходной консоли не тронут
+    assert child.memory.mem[0o177566] == 0
+
+
+def test_fork_rejects_uncopyable_device():
+    class Port:
+        base, size = 0o177700, 2
+
+        def read(self, adr):
+            return 0
+
+        def write(self, adr, value, is_byte):
+            pass
+
+    machine = Machine()
+    machine.add_device(Port())
+    with pytest.raises(TypeError):
+        machine.fork()
+
+
+def test_device_registers():
+    from pdp_11_devices import Device
+
+    class Registers(Device):
+        base = 0o177700
+        size = 4
+
+    machine = Machine()
+    device = machine.add_device(Registers())
+    machine.memory.w_write(0o1000, 0o012737)  # mov #123, @#177702
+    machine.memory.w_write(0o1002, 0o123)
+    machine.memory.w_write(0o1004, 0o177702)
+    machine.reg[7] = 0o1000
+    machine.run()
+    assert device.regs == [0, 0o123]
+    assert machine.memory.mem[0o177702] == 0  # в память не попало
+
+
+@pytest.mark.parametrize("translate", [False, True])
+def test_run_status_and_cycles(translate):
+    machine = Machine(translate=translate)
+    machine.load(IMAGE)
+    assert machine.run(4) == 4
+    assert machine.status == 'budget'
+    machine.run()
+    assert machine.status == 'halted'
+    assert machine.instructions == 9
+    # mov #3, r0 (2), clr r1 (1), 3 * (add r0, r1 + sob) (6), halt (1)
+    assert machine.cycles == 10
+
+
+def test_run_until_pc():
+    machine = Machine()
+    machine.load(IMAGE)
+    machine.run(until_pc=0o1006)  # add r0, r1
+    assert machine.status == 'breakpoint'
+    assert machine.reg[7] == 0o1006
+    assert machine.run(until_pc=0o1006) == 2  # add и sob до возврата на add
+    assert machine.reg[1] == 3
+    machine.run()
+    assert machine.status == 'halted'
+    assert machine.instructions == 9
+
+
+def test_execute_reports_error():
+    machine = Machine()
+    machine.memory.w_write(0o1000, 0o005037)  # clr @#1
+    machine.memory.w_write(0o1002, 1)
+    machine.reg[7] = 0o1000
+    result = machine.execute()
+    assert result["status"] == 'error'
+    assert result["error"]
+    assert result["instructions"] == 1  # команда начата, но не завершена
+
+    machine.load(IMAGE)
+    result = machine.execute()
+    assert result == {"status": 'halted', "instructions": 9, "cycles": 10, "error": None}
+
+
+def test_fetches_in_access_counts():
+    from pdp_11_mem import Memory
+    from pdp_11_profile import Profiler
+
+    memory = Memory()
+    counts = memory.count_accesses()
+    machine = Machine(memory)
+    machine.load(IMAGE)
+    machine.profiler = Profiler()
+    machine.run()
+    counts.sample(machine.profiler.counts)
+    assert counts.fetches[0o1000 >> 9] == 9
+    assert counts.windows == [1]
@@ -8,94 +8,456 @@
 
 Основные константы:
 - MEMSIZE: размер памяти в байтах (64Kb)
+- IO_PAGE: начало страницы ввода-вывода (160000)
+
+Классы:
+- Memory: память одной машины; в одном процессе может быть сколько угодно
+  независимых экземпляров (см. Machine в pdp_11_machine). Кроме чтения и
+  записи байтов и слов умеет записывать блок одной операцией (write_bytes).
 
 Основные переменные:
-- mem: массив, представляющий основную память
-- reg: массив регистров общего назначения (R0-R7)
+- default_memory: память машины по умолчанию
+- mem: массив байт (bytearray) памяти по умолчанию
+- words: представление mem 16-битными словами (memoryview)
+- reg: массив регистров общего назначения (R0-R7) машины по умолчанию
 
-Функции:
+Функции (обертки над default_memory):
 - b_write: запись байта в память
 - b_read: чтение байта из памяти
 - w_write: запись слова в память
 - w_read: чтение слова из памяти
+- mem_clear: обнуление памяти
+- watch_page, unwatch_page: наблюдение за записью в страницы памяти
+  (используется кэшем декодированных команд)
+
+Счетчики обращений (карта горячих страниц):
+- AccessCounts: число чтений, записей и выборок команд по страницам
+  (страница - 2**shift байт, по умолчанию 512) и размер рабочего набора
+  по окнам времени.
+- Memory.count_accesses включает подсчет для одной памяти: функции
+  чтения и записи экземпляра заменяются считающими обертками. Пока подсчет
+  не включен, обращения к памяти не делают ни одной лишней операции.
+  Включать его нужно до создания Machine: машина запоминает функции
+  чтения и записи своей памяти при создании.
 
 Особенности:
 - Слово - 16 бит (2 байта)
 - Адреса слов должны быть четными
 """
 
+import sys
+from array import array
+
 MEMSIZE = 64 * 1024
 
-mem = [0] * MEMSIZE
-reg = [0] * 8
+# Представление памяти словами: words[adr >> 1] - слово по четному адресу adr.
+# cast('H') использует порядок байт хоста, поэтому на big-endian машинах
+# вместо него работает побайтовая сборка слова.
+LITTLE_ENDIAN_HOST = sys.byteorder == 'little'
 
+# Наблюдение за записью по страницам. write_watch[page] - число наблюдателей
+# страницы; запись на страницу с ненулевым счетчиком сообщается всем
+# функциям из write_listeners как listener(adr, size). Запись на остальные
+# страницы стоит одной проверки элемента массива счетчиков.
+PAGE_SHIFT = 8
+PAGE_SIZE = 1 << PAGE_SHIFT
 
-def b_write(adr, value):
+# Страница ввода-вывода (160000-177777): здесь подключаются устройства.
+# Быстрый путь чтения/записи слов работает только ниже FAST_LIMIT.
+IO_PAGE = 0o160000
+FAST_LIMIT = IO_PAGE if LITTLE_ENDIAN_HOST else 0
+
+
+class Memory:
     """
-    Записывает байт в память по указанному адресу.
+    Основная память PDP-11 (64Kb) с наблюдением за записью по страницам
+    и шиной устройств в странице ввода-вывода.
 
-    Args:
-        adr (int): Адрес для записи (0 <= adr < MEMSIZE)
-        value (int): Значение для записи (младший байт сохраняется)
+    Обращение к обычной памяти ниже IO_PAGE проходит по быстрому пути:
+    одна проверка границы и четности адреса, затем индекс в words.
+    Все остальное (нечетный адрес, страница ввода-вывода, big-endian хост)
+    уходит в медленный путь. Адреса страницы ввода-вывода, для которых
+    устройство не подключено, работают как обычная память.
     """
-    mem[adr] = value & 0xFF
 
+    def __init__(self):
+        self.mem = bytearray(MEMSIZE)
+        self.words = memoryview(self.mem).cast('H') if LITTLE_ENDIAN_HOST else None
+        self.write_watch = array('H', [0]) * (MEMSIZE >> PAGE_SHIFT)
+        self.write_listeners = []
+        # Функции bind_listener() вызываются после замены функций доступа
+        # (count_accesses, stop_counting): так их заново берут те, кто их запомнил
+        self.bind_listeners = []
+        self.io_map = [None] * ((MEMSIZE - IO_PAGE) >> 1)  # слово страницы В/В -> устройство
+        self.access_counts = None  # AccessCounts, если включен подсчет обращений
 
-def b_read(adr):
-    """
-    Читает байт из памяти по указанному адресу.
+    def b_write(self, adr, value):
+        """
+        Записывает байт в память по указанному адресу.
 
-    Args:
-        adr (int): Адрес для чтения (0 <= adr < MEMSIZE)
+        Args:
+            adr (int): Адрес для записи (0 <= adr < MEMSIZE)
+            value (int): Значение для записи (младший байт сохраняется)
+        """
+        if adr >= IO_PAGE:
+            device = self.io_map[(adr - IO_PAGE) >> 1]
+            if device is not None:
+                device.write(adr, value & 0xFF, True)
+                return
+        self.mem[adr] = value & 0xFF
+        if self.write_watch[adr >> PAGE_SHIFT]:
+            self._notify_write(adr, 1)
 
-    Returns:
-        int: Значение прочитанного байта (0-255)
-    """
-    return mem[adr]
+    def b_read(self, adr):
+        """
+        Читает байт из памяти по указанному адресу.
 
+        Args:
+            adr (int): Адрес для чтения (0 <= adr < MEMSIZE)
 
-def w_write(adr, value):
-    """
-    Записывает слово (2 байта) в память по указанному адресу.
+        Returns:
+            int: Значение прочитанного байта (0-255)
+        """
+        if adr >= IO_PAGE:
+            device = self.io_map[(adr - IO_PAGE) >> 1]
+            if device is not None:
+                return (device.read(adr & ~1) >> (8 * (adr & 1))) & 0xFF
+        return self.mem[adr]
+
+    def w_write(self, adr, value):
+        """
+        Записывает слово (2 байта) в память по указанному адресу.
+
+        Args:
+            adr (int): Адрес для записи (должен быть четным, 0 <= adr < MEMSIZE-1)
+            value (int): Значение для записи (младшее слово сохраняется)
+
+        Raises:
+            ValueError: если адрес нечетный
+            IndexError: если адрес выходит за границы памяти
+
+        Notes:
+            - Младший байт записывается по адресу adr
+            - Старший байт записывается по адресу adr+1
+        """
+        if adr < FAST_LIMIT and not adr & 1:
+            self.words[adr >> 1] = value & 0xFFFF
+            if self.write_watch[adr >> PAGE_SHIFT]:
+                self._notify_write(adr, 2)
+            return
+        self._w_write_slow(adr, value)
+
+    def _w_write_slow(self, adr, value):
+        if adr & 1:
+            raise ValueError("Word address must be even")
+        if adr >= IO_PAGE:
+            device = self.io_map[(adr - IO_PAGE) >> 1]
+            if device is not None:
+                device.write(adr, value & 0xFFFF, False)
+                return
+        if self.words is not None:
+            self.words[adr >> 1] = value & 0xFFFF
+        else:
+            self.mem[adr + 1] = (value >> 8) & 0xFF
+            self.mem[adr] = value & 0xFF
+        if self.write_watch[adr >> PAGE_SHIFT]:
+            self._notify_write(adr, 2)
+
+    def w_read(self, adr):
+        """
+        Читает слово (2 байта) из памяти по указанному адресу.
+
+        Args:
+            adr (int): Адрес для чтения (должен быть четным, 0 <= adr < MEMSIZE-1)
+
+        Returns:
+            int: Значение прочитанного слова (0-65535)
+
+        Raises:
+            ValueError: если адрес нечетный
+            IndexError: если адрес выходит за границы памяти
+
+        Notes:
+            - Младший байт читается из адреса adr
+            - Старший байт читается из адреса adr+1
+        """
+        if adr < FAST_LIMIT and not adr & 1:
+            return self.words[adr >> 1]
+        return self._w_read_slow(adr)
+
+    # Чтение слова команды, которое не является обращением к данным
+    # (декодирование, дизассемблер, трансляция): не считается count_accesses
+    fetch = w_read
+
+    def _w_read_slow(self, adr):
+        if adr & 1:
+            raise ValueError("Word address must be even")
+        if adr >= IO_PAGE:
+            device = self.io_map[(adr - IO_PAGE) >> 1]
+            if device is not None:
+                return device.read(adr) & 0xFFFF
+        if self.words is not None:
+            return self.words[adr >> 1]
+        return self.mem[adr + 1] << 8 | self.mem[adr]
+
+    def map_device(self, adr, size, device):
+        """
+        Подключает устройство к диапазону адресов [adr, adr + size) страницы В/В.
+
+        Устройство должно иметь методы read(adr) -> слово (adr четный)
+        и write(adr, value, is_byte) (для байта adr может быть нечетным).
+
+        Raises:
+            ValueError: если диапазон вне страницы В/В или уже занят
+        """
+        if adr < IO_PAGE or adr + size > MEMSIZE or adr & 1 or size <= 0:
+            raise ValueError(f"Bad device range {adr:06o}-{adr + size:06o}")
+        first, last = (adr - IO_PAGE) >> 1, (adr + size - 1 - IO_PAGE) >> 1
+        if any(d is not None for d in self.io_map[first:last + 1]):
+            raise ValueError(f"Device range {adr:06o}-{adr + size:06o} is already in use")
+        self.io_map[first:last + 1] = [device] * (last - first + 1)
+
+    def unmap_device(self, device):
+        """Отключает устройство от всех его адресов."""
+        self.io_map[:] = [None if d is device else d for d in self.io_map]
+
+    def write_bytes(self, adr, data):
+        """
+        Записывает блок байт одной операцией копирования.
+
+        Наблюдатели записи получают одно уведомление на весь блок,
+        если хотя бы одна из задетых страниц под наблюдением.
+
+        Args:
+            adr (int): Адрес начала блока
+            data (bytes | bytearray | memoryview): Данные
+
+        Raises:
+            IndexError: если блок выходит за границы памяти
+        """
+        end = adr + len(data)
+        if adr < 0 or end > MEMSIZE:
+            raise IndexError(f"Block {adr:06o}-{end:06o} is out of memory")
+        if not data:
+            return
+        self.mem[adr:end] = data
+        if any(self.write_watch[adr >> PAGE_SHIFT:((end - 1) >> PAGE_SHIFT) + 1]):
+            self._notify_write(adr, end - adr)
+
+    def clear(self):
+        """Обнуляет всю память, не пересоздавая массив mem (на него есть ссылки)."""
+        self.mem[:] = bytes(MEMSIZE)
+        for page, watched in enumerate(self.write_watch):
+            if watched:
+                self._notify_write(page << PAGE_SHIFT, PAGE_SIZE)
 
-    Args:
-        adr (int): Адрес для записи (должен быть четным, 0 <= adr < MEMSIZE-1)
-        value (int): Значение для записи (младшее слово сохраняется)
+    def _notify_write(self, adr, size):
+        for listener in self.write_listeners:
+            listener(adr, size)
 
-    Raises:
-        ValueError: если адрес нечетный
+    def watch_page(self, page):
+        """Добавляет наблюдателя записи на страницу page."""
+        self.write_watch[page] += 1
 
-    Notes:
-        - Младший байт записывается по адресу adr
-        - Старший байт записывается по адресу adr+1
+    def unwatch_page(self, page):
+        """Снимает наблюдателя записи со страницы page."""
+        if self.write_watch[page]:
+            self.write_watch[page] -= 1
+
+    def count_accesses(self, counts=None):
+        """
+        Включает подсчет обращений по страницам: b_read, b_write, w_read
+        и w_write экземпляра заменяются обертками, которые увеличивают
+        счетчик страницы и вызывают исходный метод. Машины, уже созданные
+        над этой памятью, берут обертки через bind_listeners; модульные
+        функции (w_read и т.д.) остаются без подсчета.
+
+        Args:
+            counts (AccessCounts): счетчики (None - новые со страницами по 512 байт)
+
+        Returns:
+            AccessCounts: счетчики, в которые идет подсчет
+        """
+        if counts is None:
+            counts = AccessCounts()
+        self._unwrap()
+        shift = counts.shift
+        reads, writes = counts.reads, counts.writes
+        b_read, w_read = self.b_read, self.w_read
+        b_write, w_write = self.b_write, self.w_write
+
+        def counting_b_read(adr):
+            reads[adr >> shift] += 1
+            return b_read(adr)
+
+        def counting_w_read(adr):
+            reads[adr >> shift] += 1
+            return w_read(adr)
+
+        def counting_b_write(adr, value):
+            writes[adr >> shift] += 1
+            b_write(adr, value)
+
+        def counting_w_write(adr, value):
+            writes[adr >> shift] += 1
+            w_write(adr, value)
+
+        self.b_read, self.w_read = counting_b_read, counting_w_read
+        self.b_write, self.w_write = counting_b_write, counting_w_write
+        self.access_counts = counts
+        self._notify_bind()
+        return counts
+
+    def stop_counting(self):
+        """Выключает подсчет обращений."""
+        self._unwrap()
+        self.access_counts = None
+        self._notify_bind()
+
+    def _unwrap(self):
+        for name in ('b_read', 'w_read', 'b_write', 'w_write'):
+            self.__dict__.pop(name, None)
+
+    def _notify_bind(self):
+        for listener in self.bind_listeners:
+            listener()
+
+
+class AccessCounts:
     """
-    if adr % 2 != 0:
-        raise ValueError("Word address must be even")
-    mem[adr + 1] = (value >> 8) & 0xFF
-    mem[adr] = value & 0xFF
+    Число обращений к памяти по страницам: чтения и записи данных (считает
+    Memory.count_accesses), выборки команд (переносятся из гистограммы
+    профилировщика методом count_fetches).
 
+    Чтение слов операндов из потока команд (#n, @#a, X(R)) считается
+    чтением при каждом выполнении команды: пока подсчет включен,
+    специализированные обработчики с непосредственным операндом не
+    используются, а транслированные участки читают эти слова из памяти.
+    Слова команд, прочитанные для декодирования, дизассемблера и отчетов,
+    не считаются (см. Memory.fetch).
 
-def w_read(adr):
+    Рабочий набор - число страниц, к которым было хотя бы одно обращение;
+    sample() завершает окно времени и запоминает размер рабочего набора окна.
     """
-    Читает слово (2 байта) из памяти по указанному адресу.
 
-    Args:
-        adr (int): Адрес для чтения (должен быть четным, 0 <= adr < MEMSIZE-1)
+    def __init__(self, shift=9):
+        """
+        Args:
+            shift (int): размер страницы 2**shift байт (от 1 до 16)
 
-    Returns:
-        int: Значение прочитанного слова (0-65535)
+        Raises:
+            ValueError: если shift вне диапазона
+        """
+        if not 1 <= shift <= 16:
+            raise ValueError(f"Page shift must be 1..16, got {shift}")
+        self.shift = shift
+        self.pages = MEMSIZE >> shift
+        self.reads = array('L', [0]) * self.pages
+        self.writes = array('L', [0]) * self.pages
+        self.fetches = array('L', [0]) * self.pages
+        self.windows = []  # размеры рабочего набора по окнам (см. sample)
+        self._sampled = [0] * self.pages
 
-    Raises:
-        ValueError: если адрес нечетный
-        IndexError: если адрес выходит за границы памяти
+    @property
+    def page_size(self):
+        return 1 << self.shift
 
-    Notes:
-        - Младший байт читается из адреса adr
-        - Старший байт читается из адреса adr+1
-    """
-    if adr % 2 != 0:
-        raise ValueError("Word address must be even")
-    word = mem[adr+1] << 8
-    word |= mem[adr]
+    def clear(self):
+        """Обнуляет счетчики и историю окон."""
+        empty = array('L', [0]) * self.pages
+        self.reads[:] = empty
+        self.writes[:] = empty
+        self.fetches[:] = empty
+        self.windows.clear()
+        self._sampled = [0] * self.pages
+
+    def count_fetches(self, pc_counts):
+        """
+        Переносит выборки команд из гистограммы профилировщика.
+
+        Args:
+            pc_counts (array): число выполнений команд по адресам
+                (Profiler.counts, элемент pc >> 1); учитывается слово
+                команды, дополнительные слова считаются чтениями
+        """
+        words = 1 << (self.shift - 1)
+        for page in range(self.pages):
+            self.fetches[page] = sum(pc_counts[page * words:(page + 1) * words])
+
+    def totals(self):
+        """Список: число всех обращений по каждой странице."""
+        return [r + w + f for r, w, f in zip(self.reads, self.writes, self.fetches)]
+
+    def hot_pages(self, top=None):
+        """
+        Возвращает страницы по убыванию числа обращений.
+
+        Args:
+            top (int): сколько страниц вернуть (None - все, к которым обращались)
+
+        Returns:
+            list: кортежи (адрес начала страницы, чтения, записи, выборки)
+        """
+        pages = [(page << self.shift, self.reads[page], self.writes[page], self.fetches[page])
+                 for page, total in enumerate(self.totals()) if total]
+        pages.sort(key=lambda item: (-(item[1] + item[2] + item[3]), item[0]))
+        return pages[:top] if top is not None else pages
+
+    def working_set(self):
+        """Число страниц, к которым было хотя бы одно обращение."""
+        return sum(1 for total in self.totals() if total)
+
+    def sample(self, pc_counts=None):
+        """
+        Завершает окно времени: считает страницы, к которым были обращения
+        после предыдущего вызова, и добавляет их число в windows.
+
+        Args:
+            pc_counts (array): гистограмма профилировщика для выборок
+                команд (None - выборки не обновляются)
+
+        Returns:
+            int: размер рабочего набора окна (в страницах)
+        """
+        if pc_counts is not None:
+            self.count_fetches(pc_counts)
+        totals = self.totals()
+        size = sum(1 for now, before in zip(totals, self._sampled) if now != before)
+        self._sampled = totals
+        self.windows.append(size)
+        return size
+
+    def report(self, top=10):
+        """
+        Текстовый отчет: горячие страницы и рабочий набор.
+
+        Args:
+            top (int): сколько страниц показать
+        """
+        lines = [f"pages: {self.page_size} bytes, working set {self.working_set()} "
+                 f"of {self.pages} pages"]
+        if self.windows:
+            lines.append(f"working set by window: max {max(self.windows)}, "
+                         f"mean {sum(self.windows) / len(self.windows):.1f}, "
+                         f"windows {len(self.windows)}")
+        lines.append("  page      reads     writes    fetches")
+        for adr, reads, writes, fetches in self.hot_pages(top):
+            lines.append(f"{adr:06o} {reads:10} {writes:10} {fetches:10}")
+        return "\n".join(lines)
+
+
+default_memory = Memory()
+
+mem = default_memory.mem
+words = default_memory.words
+write_watch = default_memory.write_watch
+write_listeners = default_memory.write_listeners
+reg = [0] * 8
 
-    return word & 0xFFFF
\ No newline at end of file
+b_write = default_memory.b_write
+b_read = default_memory.b_read
+w_write = default_memory.w_write
+w_read = default_memory.w_read
+mem_clear = default_memory.clear
+watch_page = default_memory.watch_page
+unwatch_page = default_memory.unwatch_page
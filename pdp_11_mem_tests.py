@@ -4,8 +4,7 @@ from pdp_11_mem import *
 # Фикстура для очистки памяти перед каждым тестом
 @pytest.fixture(autouse=True)
 def clear_memory():
-    global mem
-    mem = [0] * MEMSIZE
+    mem_clear()
     yield
 
 def test_b_write_and_b_read():
@@ -65,4 +64,108 @@ def test_write_word_as_two_bytes_and_read():
 
     # Проверяем, что запись не затронула соседние ячейки
     assert b_read(0x2F) == 0
-    assert b_read(0x32) == 0
\ No newline at end of file
+    assert b_read(0x32) == 0
+
+def test_memory_is_bytearray():
+    # Память хранится компактно и остается тем же объектом после очистки
+    memory = mem
+    assert isinstance(mem, bytearray)
+    assert len(mem) == MEMSIZE
+    mem_clear()
+    assert mem is memory
+
+def test_word_is_little_endian():
+    # Младший байт слова лежит по четному адресу
+    w_write(0x40, 0x1234)
+    assert b_read(0x40) == 0x34
+    assert b_read(0x41) == 0x12
+    assert bytes(mem[0x40:0x42]) == b'\x34\x12'
+
+def test_many_watchers_on_one_page():
+    memory = Memory()
+    writes = []
+    memory.write_listeners.append(lambda adr, size: writes.append(adr))
+    for _ in range(300):
+        memory.watch_page(2)
+    for _ in range(299):
+        memory.unwatch_page(2)
+    memory.w_write(0o1000, 1)
+    memory.unwatch_page(2)
+    memory.w_write(0o1002, 1)
+    assert writes == [0o1000]
+
+class Counter:
+    """Устройство, считающее обращения."""
+    def __init__(self):
+        self.reads = []
+        self.writes = []
+
+    def read(self, adr):
+        self.reads.append(adr)
+        return 0o123456
+
+    def write(self, adr, value, is_byte):
+        self.writes.append((adr, value, is_byte))
+
+def test_io_page_device():
+    memory = Memory()
+    device = Counter()
+    memory.map_device(0o177560, 4, device)
+
+    assert memory.w_read(0o177560) == 0o123456
+    assert memory.b_read(0o177561) == 0o123456 >> 8
+    memory.w_write(0o177562, 0o77)
+    memory.b_write(0o177563, 0o12)
+    assert device.reads == [0o177560, 0o177560]
+    assert device.writes == [(0o177562, 0o77, False), (0o177563, 0o12, True)]
+
+    # Соседние адреса страницы В/В остаются памятью
+    memory.w_write(0o177564, 0o1111)
+    assert memory.w_read(0o177564) == 0o1111
+    assert device.writes[-1] == (0o177563, 0o12, True)
+
+    memory.unmap_device(device)
+    memory.w_write(0o177560, 5)
+    assert memory.w_read(0o177560) == 5
+
+def test_map_device_checks_range():
+    memory = Memory()
+    with pytest.raises(ValueError):
+        memory.map_device(0o1000, 2, Counter())  # не страница В/В
+    memory.map_device(0o177560, 4, Counter())
+    with pytest.raises(ValueError):
+        memory.map_device(0o177562, 2, Counter())  # уже занято
+
+
+def test_access_counts_by_page():
+    memory = Memory()
+    counts = memory.count_accesses(AccessCounts(shift=6))
+    memory.w_write(0o100, 1)
+    memory.b_write(0o101, 2)
+    memory.w_read(0o100)
+    memory.w_read(0o2000)
+    assert counts.writes[1] == 2
+    assert counts.reads[1] == 1 and counts.reads[0o2000 >> 6] == 1
+    assert counts.hot_pages(1) == [(0o100, 1, 2, 0)]
+    assert counts.working_set() == 2
+
+
+def test_access_counts_windows_and_stop():
+    memory = Memory()
+    counts = memory.count_accesses()
+    memory.w_read(0o1000)
+    memory.w_read(0o3000)
+    assert counts.sample() == 2
+    memory.w_read(0o1000)
+    assert counts.sample() == 1
+    assert counts.windows == [2, 1]
+    memory.stop_counting()
+    memory.w_read(0o1000)
+    assert memory.access_counts is None
+    assert counts.reads[0o1000 >> 9] == 2
+    assert 'w_read' not in vars(memory)
+
+
+def test_access_counts_bad_shift():
+    with pytest.raises(ValueError):
+        AccessCounts(shift=0)
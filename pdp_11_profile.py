@@ -0,0 +1,110 @@
+"""
+Модуль профилирования выполнения PDP-11.
+
+Профилировщик считает, сколько раз выполнилась команда по каждому адресу:
+гистограмма по PC - массив array('L') на каждое слово памяти, и основной
+цикл делает для команды одно увеличение элемента массива. Счетчики
+по командам (имена из commands) и по режимам адресации (режимы 0-7,
+которые разбирает get_mr) получаются из гистограммы при построении отчета:
+команда по каждому адресу декодируется один раз, а не при каждом выполнении.
+
+Если профилировщик не подключен (Machine.profiler is None), основной цикл
+выполняется без единой лишней проверки.
+
+Ограничение: отчет декодирует команды из памяти в момент построения, поэтому
+для самомодифицирующегося кода имена команд относятся к последней версии кода.
+
+Классы:
+- Profiler: гистограмма выполнения по адресам и отчет о горячих местах.
+
+Пример:
+    machine.profiler = Profiler()
+    machine.run()
+    print(machine.profiler.report(machine.memory.fetch))
+"""
+
+from array import array
+from collections import Counter
+
+from pdp_11_mem import MEMSIZE, w_read
+from pdp_11_commands import decode_table, disassemble
+
+MODE_NAMES = ('R', '(R)', '(R)+', '@(R)+', '-(R)', '@-(R)', 'X(R)', '@X(R)')
+
+
+class Profiler:
+    """Гистограмма числа выполнений команд по адресам."""
+
+    def __init__(self):
+        self.counts = array('L', [0]) * (MEMSIZE >> 1)  # counts[pc >> 1]
+
+    def clear(self):
+        self.counts[:] = array('L', [0]) * (MEMSIZE >> 1)
+
+    def total(self):
+        """Общее число выполненных команд."""
+        return sum(self.counts)
+
+    def hot_pcs(self, top=None):
+        """
+        Возвращает адреса команд по убыванию числа выполнений.
+
+        Args:
+            top (int): сколько адресов вернуть (None - все выполненные)
+
+        Returns:
+            list: пары (адрес, число выполнений)
+        """
+        pcs = [(i << 1, n) for i, n in enumerate(self.counts) if n]
+        pcs.sort(key=lambda item: (-item[1], item[0]))
+        return pcs[:top] if top is not None else pcs
+
+    def opcodes(self, read=w_read):
+        """Число выполнений по именам команд (Counter)."""
+        result = Counter()
+        for pc, n in self.hot_pcs():
+            result[decode_table[read(pc)]['name']] += n
+        return result
+
+    def modes(self, read=w_read):
+        """
+        Число разборов операндов по режимам адресации (Counter).
+
+        Каждая команда учитывается один раз для каждого своего операнда ss/dd.
+        """
+        result = Counter()
+        for pc, n in self.hot_pcs():
+            word = read(pc)
+            params = decode_table[word]['params']
+            if 'ss' in params:
+                result[(word >> 9) & 7] += n
+            if 'dd' in params:
+                result[(word >> 3) & 7] += n
+        return result
+
+    def report(self, read=w_read, top=10):
+        """
+        Строит текстовый отчет: горячие адреса с дизассемблированными командами,
+        самые частые команды и режимы адресации.
+
+        Args:
+            read (callable): чтение слова из памяти машины
+            top (int): число строк в каждом разделе
+
+        Returns:
+            str: отчет
+        """
+        total = self.total()
+        if not total:
+            return "profile: no instructions executed"
+        lines = [f"profile: {total} instructions", "hot PCs:"]
+        for pc, n in self.hot_pcs(top):
+            text, _ = disassemble(pc, read)
+            lines.append(f"  {pc:06o}: {n:>10} {n / total:6.1%}  {text}")
+        lines.append("opcodes:")
+        for name, n in self.opcodes(read).most_common(top):
+            lines.append(f"  {name:<8} {n:>10} {n / total:6.1%}")
+        lines.append("addressing modes:")
+        for mode, n in sorted(self.modes(read).items(), key=lambda item: (-item[1], item[0])):
+            lines.append(f"  {mode} {MODE_NAMES[mode]:<6} {n:>10}")
+        return "\n".join(lines)
@@ -0,0 +1,52 @@
+from pdp_11_machine import Machine
+from pdp_11_profile import Profiler
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+
+
+def profiled_run():
+    machine = Machine()
+    machine.load(IMAGE)
+    machine.profiler = Profiler()
+    machine.run()
+    return machine
+
+
+def test_counts_per_pc():
+    profiler = profiled_run().profiler
+    assert profiler.total() == 9
+    assert profiler.hot_pcs(2) == [(0o1006, 3), (0o1010, 3)]
+    assert profiler.counts[0o1000 >> 1] == 1
+
+
+def test_opcodes_and_modes():
+    machine = profiled_run()
+    read = machine.memory.w_read
+    assert machine.profiler.opcodes(read) == {'add': 3, 'sob': 3, 'mov': 1, 'clr': 1, 'halt': 1}
+    # mov #3,r0: (pc)+ и r0; clr r1: r1; add r0,r1: два регистра
+    assert machine.profiler.modes(read) == {0: 1 + 1 + 2 * 3, 2: 1}
+
+
+def test_report():
+    machine = profiled_run()
+    report = machine.profiler.report(machine.memory.w_read, top=3)
+    assert "profile: 9 instructions" in report
+    assert "001006:" in report and "add r0 r1" in report
+
+
+def test_disabled_by_default():
+    machine = Machine()
+    machine.load(IMAGE)
+    assert machine.profiler is None
+    assert machine.run() == 9
+
+
+def test_clear():
+    profiler = profiled_run().profiler
+    profiler.clear()
+    assert profiler.total() == 0
+    assert profiler.report() == "profile: no instructions executed"
+
+
+def test_counts_cover_whole_memory():
+    assert len(Profiler().counts) == 0o100000
@@ -0,0 +1,123 @@
+"""
+Модуль слова состояния процессора (PSW) PDP-11.
+
+Признаки N, Z, V, C вычисляются лениво. Команда не считает их сама,
+а только запоминает, чем они определяются: вид операции и ее операнды
+(кортеж-запись). Признаки вычисляются из записи, только когда они
+действительно нужны: в команде ветвления, при чтении PSW или при
+сохранении состояния. На горячем пути команда создает один кортеж
+и присваивает одно-два поля.
+
+N, Z, V и C хранятся в разных записях (nzv и c), потому что MOV
+меняет N, Z, V, но не трогает C.
+
+Виды записей:
+- (MOV, value): N и Z по значению, V = 0
+- (ADD, src, dst): N, Z, V и C по сумме src + dst
+- (FLAGS, bits): признаки заданы явно (CLR, запись в PSW)
+
+Классы:
+- PSW: слово состояния; как устройство может быть подключено к шине
+  по адресу 177776 (Machine.add_device(machine.psw)).
+
+Константы:
+- N, Z, V, C: биты признаков в PSW.
+- CLEARED, CLR_FLAGS: записи для сброшенных признаков и для команды CLR.
+"""
+
+import struct
+
+from pdp_11_devices import Device
+
+N, Z, V, C = 0o10, 0o4, 0o2, 0o1
+
+MOV, ADD, FLAGS = 0, 1, 2
+
+CLEARED = (FLAGS, 0)
+CLR_FLAGS = (FLAGS, Z)
+
+_WORD = struct.Struct('<H')
+
+
+def nzv_bits(record):
+    """Биты N, Z, V по записи."""
+    kind = record[0]
+    if kind == MOV:
+        value = record[1] & 0xFFFF
+        return (N if value & 0x8000 else 0) | (0 if value else Z)
+    if kind == ADD:
+        src, dst = record[1] & 0xFFFF, record[2] & 0xFFFF
+        result = (src + dst) & 0xFFFF
+        overflow = (src ^ result) & (dst ^ result) & 0x8000
+        return (N if result & 0x8000 else 0) | (0 if result else Z) | (V if overflow else 0)
+    return record[1] & (N | Z | V)
+
+
+def c_bit(record):
+    """Бит C по записи."""
+    if record[0] == ADD:
+        return C if (record[1] & 0xFFFF) + (record[2] & 0xFFFF) > 0xFFFF else 0
+    return record[1] & C
+
+
+class PSW(Device):
+    """
+    Слово состояния процессора: признаки N, Z, V, C (лениво)
+    и остальные биты (приоритет, T) как есть.
+    """
+
+    base = 0o177776
+    size = 2
+
+    def __init__(self):
+        super().__init__()  # regs не используются: слово собирается из признаков
+        self.nzv = CLEARED
+        self.c = CLEARED
+        self.high = 0  # биты 4-15
+
+    def flags(self):
+        """Возвращает признаки NZVC (младшие 4 бита PSW)."""
+        return nzv_bits(self.nzv) | c_bit(self.c)
+
+    @property
+    def value(self):
+        """Слово PSW целиком."""
+        return self.high | nzv_bits(self.nzv) | c_bit(self.c)
+
+    @value.setter
+    def value(self, word):
+        self.high = word & 0xFFF0
+        self.nzv = self.c = (FLAGS, word & 0o17)
+
+    def read(self, adr):
+        return self.value
+
+    def write(self, adr, value, is_byte):
+        if is_byte:
+            if adr & 1:
+                value = (value << 8) | (self.value & 0xFF)
+            else:
+                value = (self.value & 0xFF00) | value
+        self.value = value
+
+    def reset(self):
+        self.nzv = self.c = CLEARED
+        self.high = 0
+
+    def state(self):
+        return _WORD.pack(self.value)
+
+    def restore_state(self, data):
+        if len(data) != _WORD.size:
+            raise ValueError("Bad PSW state")
+        (self.value,) = _WORD.unpack(data)
+
+    def clone(self):
+        psw = PSW()
+        psw.nzv, psw.c, psw.high = self.nzv, self.c, self.high
+        return psw
+
+    def __repr__(self):
+        flags = self.flags()
+        return "PSW(" + "".join(name if flags & bit else "-" for name, bit in
+                                (("N", N), ("Z", Z), ("V", V), ("C", C))) + ")"
@@ -0,0 +1,89 @@
+import pytest
+from pdp_11_machine import Machine
+from pdp_11_psw import PSW, N, Z, V, C, MOV, ADD, CLR_FLAGS
+from bench_suite import START, load_words
+
+
+def test_mov_flags_keep_carry():
+    psw = PSW()
+    psw.nzv = psw.c = (ADD, 0o177777, 1)
+    assert psw.flags() == Z | C
+    psw.nzv = (MOV, 0o100000)
+    assert psw.flags() == N | C
+
+
+@pytest.mark.parametrize("src, dst, flags", [
+    (1, 2, 0),
+    (0o077777, 1, N | V),
+    (0o100000, 0o100000, Z | V | C),
+    (0o177777, 0o177777, N | C),
+])
+def test_add_flags(src, dst, flags):
+    psw = PSW()
+    psw.nzv = psw.c = (ADD, src, dst)
+    assert psw.flags() == flags
+
+
+def test_value_and_bus_access():
+    psw = PSW()
+    psw.nzv = psw.c = CLR_FLAGS
+    assert psw.value == Z
+    psw.write(0o177777, 0o340 >> 8, True)  # старший байт
+    psw.write(0o177776, 0o341, True)       # приоритет 7, C
+    assert psw.read(0o177776) == 0o341
+    psw.value = 0o12
+    assert psw.flags() == N | V
+    psw.reset()
+    assert psw.value == 0
+
+
+BRANCH_LOOP = [0o012700, 5,           # 1000: mov #5, r0
+               0o062700, 0o177777,    # 1004: add #-1, r0
+               0o001375,              # 1010: bne 1004
+               0o000000]              # 1012: halt
+
+
+@pytest.mark.parametrize("translate", [False, True])
+def test_branch_loop(translate):
+    machine = Machine(translate=translate)
+    load_words(machine, START, BRANCH_LOOP)
+    machine.reg[7] = START
+    assert machine.run() == 1 + 2 * 5 + 1
+    assert machine.reg[0] == 0
+    assert machine.psw.flags() == Z | C
+
+
+@pytest.mark.parametrize("translate", [False, True])
+def test_bcs_and_br(translate):
+    machine = Machine(translate=translate)
+    load_words(machine, START, [0o005001,            # 1000: clr r1
+                                0o103401,            # 1002: bcs 1006 (C = 0 после clr)
+                                0o000402,            # 1004: br 1012
+                                0o012701, 0o000007,  # 1006: mov #7, r1
+                                0o012702, 0o000003,  # 1012: mov #3, r2
+                                0o000000])           # 1016: halt
+    machine.reg[7] = START
+    assert machine.run() == 5
+    assert machine.reg[1:3] == [0, 3]
+
+
+def test_snapshot_keeps_psw():
+    machine = Machine()
+    machine.psw.value = 0o345
+    restored = Machine()
+    restored.restore(machine.snapshot())
+    assert restored.psw.value == 0o345
+    assert machine.fork().psw.value == 0o345
+
+
+def test_psw_device_state_and_clone():
+    psw = PSW()
+    psw.value = 0o345
+    copy = psw.clone()
+    copy.value = 0
+    assert psw.value == 0o345
+    restored = PSW()
+    restored.restore_state(psw.state())
+    assert restored.value == 0o345
+    with pytest.raises(ValueError):
+        restored.restore_state(b"")
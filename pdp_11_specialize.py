@@ -0,0 +1,181 @@
+"""
+Модуль специализированных обработчиков команд PDP-11.
+
+Общий путь выполнения команды - вычисление операндов функциями режимов
+(process_decoded заполняет ss_slot и dd_slot) и вызов обработчика,
+который работает с операндами как с объектами ModeRegistrArg. Для частых
+сочетаний команды и режимов адресации источника и приемника при импорте
+модуля генерируются специализированные обработчики: они работают прямо
+с регистрами и памятью, без промежуточных объектов, а номера регистров,
+непосредственное значение и адрес следующей команды получают как
+константы замыкания.
+
+Специализированы mov и add для источников R, (R), (R)+, -(R), #n
+и приемников R, (R), (R)+, -(R); clr для тех же приемников; sob.
+Остальные команды и операнды с PC (кроме #n в источнике) выполняются
+общим путем.
+
+Специализированные обработчики не заполняют ss_slot и dd_slot, поэтому
+при трассировке основной цикл выполняет команды общим путем. Пока
+включен подсчет обращений к памяти (Memory.count_accesses), команды
+с источником #n тоже выполняются общим путем: непосредственное значение
+должно читаться из памяти при каждом выполнении.
+
+Классы:
+- Specializer: выбирает для декодированной команды функцию выполнения.
+"""
+
+from pdp_11_psw import MOV, ADD, CLR_FLAGS
+
+IMMEDIATE = 'imm'
+SOURCE_KINDS = (0, 1, 2, 4, IMMEDIATE)
+DESTINATION_KINDS = (0, 1, 2, 4)
+
+# Вычисление источника: значение в v0 (регистр - s)
+_SOURCE = {
+    0: ["v0 = reg[s]"],
+    1: ["v0 = w_read(reg[s])"],
+    2: ["a0 = reg[s]", "reg[s] = a0 + 2", "v0 = w_read(a0)"],
+    4: ["a0 = reg[s] - 2", "reg[s] = a0", "v0 = w_read(a0)"],
+    IMMEDIATE: ["reg[7] = next_pc", "v0 = x"],
+}
+
+# Вычисление адреса приемника в a1 (регистр - d)
+_DESTINATION = {
+    0: [],
+    1: ["a1 = reg[d]"],
+    2: ["a1 = reg[d]", "reg[d] = a1 + 2"],
+    4: ["a1 = reg[d] - 2", "reg[d] = a1"],
+}
+
+# Команда: (значение для записи, запись признаков, читает ли приемник)
+_OPERATIONS = {
+    'mov': ("v0", "psw.nzv = (MOV, v0)", False),
+    'add': ("v0 + v1", "psw.nzv = psw.c = (ADD, v0, v1)", True),
+    'clr': ("0", "psw.nzv = psw.c = CLR_FLAGS", False),
+}
+
+
+def _handler_source(name, source, destination):
+    """Текст фабрики обработчика для команды name и видов операндов."""
+    value, flags, reads_dd = _OPERATIONS[name]
+    lines = list(_SOURCE[source]) if source is not None else []
+    lines.extend(_DESTINATION[destination])
+    if destination == 0:
+        if reads_dd:
+            lines.append("v1 = reg[d]")
+        lines.append(f"reg[d] = ({value}) & 0xFFFF")
+    else:
+        if reads_dd:
+            lines.append("v1 = w_read(a1)")
+        lines.append(f"w_write(a1, {value})")
+    lines.append(flags)
+    return "\n".join(["def make(reg, w_read, w_write, psw, s, d, x, next_pc):",
+                      "    def execute():"]
+                     + ["        " + line for line in lines]
+                     + ["    return execute"]) + "\n"
+
+
+def _compile(name, source, destination):
+    namespace = {'MOV': MOV, 'ADD': ADD, 'CLR_FLAGS': CLR_FLAGS}
+    exec(compile(_handler_source(name, source, destination),
+                 f"<{name} {source},{destination}>", "exec"), namespace)
+    return namespace['make']
+
+
+def build_factories():
+    """
+    Генерирует фабрики специализированных обработчиков.
+
+    Returns:
+        dict: (имя команды, вид источника, вид приемника) -> фабрика
+            make(reg, w_read, w_write, psw, s, d, x, next_pc); для clr
+            вид источника - None
+    """
+    factories = {}
+    for name in ('mov', 'add'):
+        for source in SOURCE_KINDS:
+            for destination in DESTINATION_KINDS:
+                factories[name, source, destination] = _compile(name, source, destination)
+    for destination in DESTINATION_KINDS:
+        factories['clr', None, destination] = _compile('clr', None, destination)
+    return factories
+
+
+FACTORIES = build_factories()
+
+
+def _make_sob(reg, r, target):
+    def execute():
+        value = (reg[r] - 1) & 0xFFFF
+        reg[r] = value
+        if value:
+            reg[7] = target
+    return execute
+
+
+def _make_generic(args, decoded):
+    process_decoded = args.process_decoded
+    handler = decoded.handler
+
+    def execute():
+        process_decoded(decoded)
+        handler(args)
+    return execute
+
+
+class Specializer:
+    """
+    Выбор функции выполнения для декодированных команд одной машины.
+
+    Функция выполнения вызывается без аргументов после того, как основной
+    цикл установил PC на слово, следующее за словом команды.
+    """
+
+    def __init__(self, args):
+        """
+        Args:
+            args (ArgsProcessor): разбор аргументов машины (регистры, память, PSW)
+        """
+        self.args = args
+        self.memory = args.memory
+        self.reg = args.reg
+        self.w_read = args.memory.w_read
+        self.w_write = args.memory.w_write
+        self.psw = args.psw
+        self.specialized = 0
+        self.generic = 0
+
+    def _kind(self, mode, r):
+        if r == 7:
+            return IMMEDIATE if mode == 2 else None
+        return mode
+
+    def execute_for(self, decoded):
+        """
+        Возвращает функцию выполнения команды decoded: специализированную,
+        если она есть для этой команды и режимов, иначе - общий путь.
+        """
+        name = decoded.cmd['name']
+        next_pc = (decoded.pc + decoded.length) & 0xFFFF
+        if name == 'sob' and decoded.r != 7:
+            self.specialized += 1
+            return _make_sob(self.reg, decoded.r, (decoded.pc + 2 - 2 * decoded.nn) & 0xFFFF)
+
+        factory = None
+        if name in _OPERATIONS and decoded.dd_reg != 7:
+            source = None
+            if decoded.ss_mode is not None:
+                source = self._kind(decoded.ss_mode, decoded.ss_reg)
+            if source == IMMEDIATE and self.memory.access_counts is not None:
+                source = None  # чтение #n должно считаться при каждом выполнении
+            if source is not None or name == 'clr':
+                factory = FACTORIES.get((name, source, decoded.dd_mode))
+        if factory is None:
+            self.generic += 1
+            return _make_generic(self.args, decoded)
+
+        self.specialized += 1
+        x = self.w_read((decoded.pc + 2) & 0xFFFF) if decoded.ss_mode == 2 and decoded.ss_reg == 7 else None
+        return factory(self.reg, self.w_read, self.w_write, self.psw,
+                       decoded.ss_reg, decoded.dd_reg, x, next_pc)
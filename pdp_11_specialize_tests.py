@@ -0,0 +1,47 @@
+import pytest
+from pdp_11_machine import Machine
+from pdp_11_specialize import FACTORIES, IMMEDIATE, _make_generic
+
+OPCODES = {'mov': 0o010000, 'add': 0o060000, 'clr': 0o005000}
+
+
+def make_machine(word, extra):
+    machine = Machine()
+    machine.memory.w_write(0o1000, word)
+    machine.memory.w_write(0o1002, extra)
+    for adr in range(0o2000, 0o2200, 2):
+        machine.memory.w_write(adr, adr ^ 0o123456)
+    machine.reg[:] = [0o2010, 0o2040, 0o2100, 0o2060, 0o2020, 0o2150, 0o2170, 0o1002]
+    return machine
+
+
+def state(machine):
+    return list(machine.reg), bytes(machine.memory.mem), machine.psw.value
+
+
+@pytest.mark.parametrize("key", sorted(FACTORIES, key=str))
+def test_specialized_matches_generic(key):
+    name, source, destination = key
+    for s, d in ((1, 2), (2, 2), (3, 5)):
+        word = OPCODES[name] | (destination << 3) | d
+        if source == IMMEDIATE:
+            word |= (2 << 9) | (7 << 6)
+        elif source is not None:
+            word |= (source << 9) | (s << 6)
+        generic, specialized = make_machine(word, 0o100001), make_machine(word, 0o100001)
+        decoded = generic.icache.fill(0o1000)
+        _make_generic(generic.args, decoded)()
+        fast = specialized.icache.fill(0o1000)
+        assert fast.execute.__code__.co_filename == f"<{name} {source},{destination}>"
+        fast.execute()
+        assert state(specialized) == state(generic), (key, s, d)
+
+
+def test_counts_and_fallback():
+    machine = Machine()
+    machine.load("integral_tests/02_sob.pdp.o")
+    machine.run()
+    specializer = machine.icache.specializer
+    # mov #3,r0; clr r1; add r0,r1; sob - специализированы, halt - общий путь
+    assert (specializer.specialized, specializer.generic) == (4, 1)
+    assert machine.reg[1] == 6
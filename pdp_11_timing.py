@@ -0,0 +1,60 @@
+"""
+Модуль оценки времени выполнения команд PDP-11 в циклах шины.
+
+Время команды оценивается числом обращений к памяти по шине (циклов шины):
+выборка слова команды, дополнительные слова операндов (непосредственное
+значение, смещение), чтение указателей при косвенной адресации, чтение
+и запись самих операндов. Для реальной машины время цикла шины
+(и внутренние такты процессора) зависит от модели, поэтому оценка дается
+в циклах: ее можно умножить на время цикла конкретной машины.
+
+Таблицы:
+- OPCODE_CYCLES: циклы команды без учета операндов (выборка слова команды).
+- SOURCE_CYCLES: циклы вычисления источника по режиму адресации.
+- DESTINATION_CYCLES: циклы приемника, который только записывается (mov, clr).
+- MODIFY_CYCLES: циклы приемника, который читается и записывается (add).
+
+Функции:
+- instruction_cycles: циклы команды по ее слову.
+"""
+
+from pdp_11_commands import decode_table
+
+OPCODE_CYCLES = {
+    'halt': 1,
+    'mov': 1,
+    'add': 1,
+    'sob': 1,
+    'clr': 1,
+    'br': 1, 'bne': 1, 'beq': 1, 'bpl': 1, 'bmi': 1,
+    'bvc': 1, 'bvs': 1, 'bcc': 1, 'bcs': 1,
+    'unknown': 1,
+}
+
+# Режимы 0-7: R, (R), (R)+, @(R)+, -(R), @-(R), X(R), @X(R).
+# Для #n, @#a, a, @a (режимы 2, 3, 6, 7 с PC) слово операнда читается
+# из потока команд - это тот же цикл, что и чтение по (R)+.
+SOURCE_CYCLES = (0, 1, 1, 2, 1, 2, 2, 3)
+DESTINATION_CYCLES = (0, 1, 1, 2, 1, 2, 2, 3)
+MODIFY_CYCLES = (0, 2, 2, 3, 2, 3, 3, 4)
+
+
+def instruction_cycles(word):
+    """
+    Оценивает число циклов шины команды.
+
+    Args:
+        word (int): слово команды
+
+    Returns:
+        int: циклы шины
+    """
+    cmd = decode_table[word]
+    cycles = OPCODE_CYCLES.get(cmd['name'], 1)
+    params = cmd['params']
+    if 'ss' in params:
+        cycles += SOURCE_CYCLES[(word >> 9) & 7]
+    if 'dd' in params:
+        table = MODIFY_CYCLES if cmd['reads_dd'] else DESTINATION_CYCLES
+        cycles += table[(word >> 3) & 7]
+    return cycles
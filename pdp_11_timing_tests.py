@@ -0,0 +1,14 @@
+from pdp_11_timing import instruction_cycles
+
+
+def test_register_operands():
+    assert instruction_cycles(0o060001) == 1  # add r0, r1
+    assert instruction_cycles(0o077002) == 1  # sob r0, .
+    assert instruction_cycles(0o000000) == 1  # halt
+
+
+def test_memory_operands():
+    assert instruction_cycles(0o012700) == 2  # mov #n, r0
+    assert instruction_cycles(0o012737) == 4  # mov #n, @#a
+    assert instruction_cycles(0o061112) == 4  # add (r1), (r2): чтение и запись приемника
+    assert instruction_cycles(0o005012) == 2  # clr (r2): только запись
@@ -0,0 +1,268 @@
+"""
+Модуль трассировки выполнения PDP-11.
+
+Трассировка вынесена из разбора аргументов в отдельный приемник (sink),
+который подключается к основному циклу. Если приемника нет (None),
+основной цикл не форматирует ни одной строки.
+
+Классы:
+- TextTracer: печатает дизассемблированные команды в поток (по умолчанию stdout).
+- FileTracer: пишет ту же трассировку в файл через большой буфер.
+- RingTracer: хранит последние команды в кольцевом буфере двоичных записей
+  и сохраняет его в файл при закрытии (после HALT или ошибки).
+
+Функции:
+- make_tracer: создает приемник по имени режима ('off', 'text', 'file', 'ring').
+- read_ring: читает файл кольцевой трассировки.
+- decode_ring: переводит записи кольцевой трассировки в текст.
+
+Формат строки трассировки:
+    001000: mov #000003 r0
+
+Формат файла кольцевой трассировки (little-endian):
+    Заголовок RING_HEADER: сигнатура RING_MAGIC, версия, число записей
+    в файле, общее число выполненных команд. Далее - записи RING_RECORD
+    от старой к новой: PC, слово команды, два следующих слова (дополнительные
+    слова операндов, если они есть), адреса операндов ss и dd после их
+    вычисления (для регистрового режима - номер регистра).
+
+Запуск (перевод файла кольцевой трассировки в текст):
+    python pdp_11_trace.py trace.bin
+"""
+
+import struct
+import sys
+
+import pdp_11_mem
+from pdp_11_mem import MEMSIZE, w_read
+from pdp_11_commands import decode_table, disassemble
+from pdp_11_args import format_args
+
+TRACE_MODES = ('off', 'text', 'file', 'ring')
+
+RING_MAGIC = b'P11T'
+RING_VERSION = 1
+RING_HEADER = struct.Struct('<4sHIQ')
+RING_RECORD = struct.Struct('<6H')
+_PC = struct.Struct('<H')
+_OPERANDS = struct.Struct('<HH')
+
+
+class TextTracer:
+    """Приемник трассировки, печатающий дизассемблированные команды в поток."""
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def trace(self, pc, read=w_read):
+        """
+        Записывает в поток команду, расположенную по адресу pc.
+
+        Вызывается до выполнения команды, пока ее дополнительные слова
+        (непосредственные значения, смещения) еще не изменены.
+
+        Args:
+            pc (int): адрес команды
+            read (callable): чтение слова из памяти машины
+        """
+        text, _ = disassemble(pc, read)
+        self.stream.write(f"{pc:06o}: {text}\n")
+
+    def bind(self, machine):
+        """Связывает приемник с машиной (текстовой трассировке не нужно)."""
+
+    def close(self):
+        self.stream.flush()
+
+
+class FileTracer(TextTracer):
+    """Приемник трассировки, пишущий в файл через буфер размера buffer_size."""
+
+    def __init__(self, filename, buffer_size=1 << 20):
+        super().__init__(open(filename, 'w', encoding='utf-8', buffering=buffer_size))
+
+    def close(self):
+        self.stream.close()
+
+
+class RingTracer:
+    """
+    Приемник трассировки, хранящий последние capacity команд в кольцевом
+    буфере двоичных записей RING_RECORD (12 байт на команду).
+
+    Буфер выделяется один раз; запись команды - копирование 6 байт из памяти
+    машины и упаковка PC без форматирования текста. Адреса операндов
+    известны только после выполнения команды, поэтому они дописываются
+    в запись предыдущей команды при следующем вызове trace (и в close).
+
+    Без связи с машиной (bind) пишется память по умолчанию,
+    а адреса операндов остаются нулевыми.
+    """
+
+    def __init__(self, filename, capacity=1 << 20):
+        if capacity <= 0:
+            raise ValueError("Ring capacity must be positive")
+        self.filename = filename
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RING_RECORD.size)
+        self.count = 0  # всего записанных команд
+        self.offset = 0  # смещение следующей записи
+        self.last = 0  # смещение последней записи
+        self.mem = pdp_11_mem.default_memory.mem
+        self.args = None
+
+    def bind(self, machine):
+        """Берет память и разбор аргументов машины machine."""
+        self.mem = machine.memory.mem
+        self.args = machine.args
+
+    def _finish_last(self):
+        """
+        Дописывает адреса операндов последней записанной команды
+        (0 - для операндов, которых у команды нет).
+        """
+        if self.count and self.args is not None:
+            ss, dd = self.args.ss, self.args.dd
+            _OPERANDS.pack_into(self.buffer, self.last + 8,
+                                ss.address & 0xFFFF if ss is not None else 0,
+                                dd.address & 0xFFFF if dd is not None else 0)
+
+    def trace(self, pc, read=w_read):
+        """
+        Записывает в буфер команду по адресу pc (см. TextTracer.trace).
+
+        Args:
+            pc (int): адрес команды
+            read (callable): не используется - слова берутся прямо из памяти
+        """
+        self._finish_last()  # адреса операндов предыдущей команды
+        buffer = self.buffer
+        offset = self.offset
+        _PC.pack_into(buffer, offset, pc)
+        if pc <= MEMSIZE - 6:
+            buffer[offset + 2:offset + 8] = self.mem[pc:pc + 6]
+        else:
+            tail = bytes(self.mem[pc:pc + 6])
+            buffer[offset + 2:offset + 8] = tail + bytes(6 - len(tail))
+        self.last = offset
+        offset += RING_RECORD.size
+        self.offset = offset if offset < len(buffer) else 0
+        self.count += 1
+
+    def records(self):
+        """Записи буфера от старой к новой (bytes)."""
+        size = self.capacity * RING_RECORD.size
+        if self.count <= self.capacity:
+            return bytes(self.buffer[:self.count * RING_RECORD.size])
+        split = self.count % self.capacity * RING_RECORD.size
+        return bytes(self.buffer[split:size] + self.buffer[:split])
+
+    def close(self):
+        """Сохраняет буфер в файл filename."""
+        self._finish_last()
+        data = self.records()
+        with open(self.filename, 'wb') as file:
+            file.write(RING_HEADER.pack(RING_MAGIC, RING_VERSION,
+                                        len(data) // RING_RECORD.size, self.count))
+            file.write(data)
+
+
+def read_ring(filename):
+    """
+    Читает файл кольцевой трассировки.
+
+    Returns:
+        tuple: (общее число выполненных команд, список записей -
+                кортежей (pc, word, ext1, ext2, ss_address, dd_address))
+
+    Raises:
+        ValueError: если файл не является кольцевой трассировкой или обрезан
+    """
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if len(data) < RING_HEADER.size:
+        raise ValueError(f"{filename} is not a PDP-11 ring trace")
+    magic, version, count, total = RING_HEADER.unpack_from(data)
+    if magic != RING_MAGIC or version != RING_VERSION:
+        raise ValueError(f"{filename} is not a PDP-11 ring trace")
+    if RING_HEADER.size + count * RING_RECORD.size > len(data):
+        raise ValueError(f"{filename} is truncated")
+    end = RING_HEADER.size + count * RING_RECORD.size
+    return total, list(RING_RECORD.iter_unpack(data[RING_HEADER.size:end]))
+
+
+def decode_record(record):
+    """
+    Переводит одну запись кольцевой трассировки в строку.
+
+    Операнды разбираются той же format_args, что и в дизассемблере,
+    но слова после команды берутся из записи, а не из памяти.
+
+    Пример:
+        001004: add r0 r1  ; ss=r0 dd=r1
+    """
+    pc, word, ext1, ext2, ss_address, dd_address = record
+    extra = {(pc + 2) & 0xFFFF: ext1, (pc + 4) & 0xFFFF: ext2}
+    cmd = decode_table[word]
+    parts, _ = format_args(cmd['params'], word, (pc + 2) & 0xFFFF, lambda adr: extra.get(adr, 0))
+    operands = []
+    for param, mode, address in (('ss', (word >> 9) & 7, ss_address),
+                                 ('dd', (word >> 3) & 7, dd_address)):
+        if param in cmd['params']:
+            operands.append(f"{param}=r{address}" if mode == 0 else f"{param}={address:06o}")
+    text = ' '.join([cmd['name']] + parts)
+    if operands:
+        text += '  ; ' + ' '.join(operands)
+    return f"{pc:06o}: {text}"
+
+
+def decode_ring(filename):
+    """
+    Переводит файл кольцевой трассировки в строки текста.
+
+    Returns:
+        list: строки, первая - сколько команд выполнено и сколько сохранено
+    """
+    total, records = read_ring(filename)
+    lines = [f"; {total} instructions executed, last {len(records)} recorded"]
+    lines.extend(decode_record(record) for record in records)
+    return lines
+
+
+def make_tracer(mode, filename=None, capacity=1 << 20):
+    """
+    Создает приемник трассировки.
+
+    Args:
+        mode (str): 'off' - без трассировки, 'text' - в stdout, 'file' - в файл,
+            'ring' - кольцевой буфер последних команд, сохраняемый в файл
+        filename (str): имя файла для режимов 'file' и 'ring'
+        capacity (int): число команд в кольцевом буфере
+
+    Returns:
+        TextTracer | FileTracer | RingTracer | None: приемник или None,
+            если трассировка выключена
+
+    Raises:
+        ValueError: если режим неизвестен или для 'file'/'ring' не указано имя файла
+    """
+    if mode == 'off':
+        return None
+    if mode == 'text':
+        return TextTracer()
+    if mode == 'file':
+        if filename is None:
+            raise ValueError("Trace mode 'file' needs a file name")
+        return FileTracer(filename)
+    if mode == 'ring':
+        if filename is None:
+            raise ValueError("Trace mode 'ring' needs a file name")
+        return RingTracer(filename, capacity)
+    raise ValueError(f"Unknown trace mode {mode}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python pdp_11_trace.py trace.bin")
+    for line in decode_ring(sys.argv[1]):
+        print(line)
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+from pdp_11_mem import w_write, mem_clear
+from pdp_11_commands import disassemble
+from pdp_11_trace import TextTracer, FileTracer, RingTracer, make_tracer, read_ring, decode_ring
+from pdp_11_machine import Machine
+
+
+@pytest.fixture(autouse=True)
+def program():
+    mem_clear()
+    w_write(0o1000, 0o012700)  # mov #3, r0
+    w_write(0o1002, 0o000003)
+    w_write(0o1004, 0o060001)  # add r0, r1
+    w_write(0o1006, 0o077002)  # sob r0, 2
+    yield
+
+
+def test_disassemble():
+    assert disassemble(0o1000) == ("mov #000003 r0", 0o1004)
+    assert disassemble(0o1004) == ("add r0 r1", 0o1006)
+    assert disassemble(0o1006) == ("sob r0 2", 0o1010)
+
+
+def test_text_tracer():
+    stream = io.StringIO()
+    tracer = TextTracer(stream)
+    tracer.trace(0o1000)
+    tracer.trace(0o1004)
+    assert stream.getvalue() == "001000: mov #000003 r0\n001004: add r0 r1\n"
+
+
+def test_file_tracer(tmp_path):
+    filename = tmp_path / "trace.txt"
+    tracer = FileTracer(str(filename))
+    tracer.trace(0o1006)
+    tracer.close()
+    assert filename.read_text() == "001006: sob r0 2\n"
+
+
+def test_make_tracer():
+    assert make_tracer('off') is None
+    assert isinstance(make_tracer('text'), TextTracer)
+    with pytest.raises(ValueError):
+        make_tracer('file')
+    with pytest.raises(ValueError):
+        make_tracer('ring')
+    assert isinstance(make_tracer('ring', 'trace.bin', 16), RingTracer)
+    with pytest.raises(ValueError):
+        make_tracer('fast')
+
+
+def run_ring(tmp_path, capacity):
+    filename = str(tmp_path / "trace.bin")
+    machine = Machine()
+    machine.load("integral_tests/02_sob.pdp.o")
+    machine.tracer = RingTracer(filename, capacity)
+    machine.tracer.bind(machine)
+    machine.run()
+    machine.tracer.close()
+    return filename
+
+
+def test_ring_tracer_keeps_everything(tmp_path):
+    total, records = read_ring(run_ring(tmp_path, 100))
+    assert total == 9 and len(records) == 9
+    assert records[0] == (0o1000, 0o012700, 3, 0o005001, 0o1002, 0)
+    assert records[1][4:] == (0, 1)  # clr r1: источника нет
+    assert records[3][4:] == (0, 0)  # sob: операндов ss и dd нет
+    lines = decode_ring(run_ring(tmp_path, 100))
+    assert lines[1] == "001000: mov #000003 r0  ; ss=001002 dd=r0"
+    assert lines[3] == "001006: add r0 r1  ; ss=r0 dd=r1"
+    assert lines[-1] == "001012: halt"
+
+
+def test_ring_tracer_keeps_last(tmp_path):
+    total, records = read_ring(run_ring(tmp_path, 4))
+    assert total == 9
+    assert [record[0] for record in records] == [0o1010, 0o1006, 0o1010, 0o1012]
+
+
+def test_read_ring_rejects_other_files(tmp_path):
+    filename = tmp_path / "other.bin"
+    filename.write_bytes(b"not a trace at all")
+    with pytest.raises(ValueError):
+        read_ring(str(filename))
@@ -0,0 +1,442 @@
+"""
+Модуль трансляции линейных участков кода PDP-11 в функции Python.
+
+Линейный участок (basic block) - последовательность команд от адреса входа
+до первого перехода: участок заканчивается командой sob, br или условным
+ветвлением, или перед командой, которую транслятор не умеет переводить
+(halt, неизвестная команда, запись в PC и т.п. - их выполняет обычный
+цикл машины). Для участка генерируется
+текст функции Python, в которой режимы адресации операндов уже разобраны:
+номера регистров, смещения и непосредственные значения подставлены
+константами. Текст компилируется compile() один раз, и функция кэшируется
+по адресу входа. Цикл вида
+
+    add r0, r1
+    sob r0, 2
+
+выполняется одним вызовом функции на итерацию вместо выборки, декодирования
+и вызова обработчика для каждой команды.
+
+Функция участка возвращает число выполненных команд и оставляет в PC
+адрес следующей команды.
+
+Самомодифицирующийся код: страницы с транслированными участками стоят
+под наблюдением (Memory.watch_page), запись в участок удаляет его из кэша.
+Если запись в память делает сам выполняющийся участок и задевает свой же
+код, участок завершается сразу после этой команды, и следующая команда
+выполняется уже по новому коду.
+
+Ограничение: если команда внутри участка вызывает исключение (например,
+обращение по нечетному адресу), PC остается равным адресу входа в участок.
+
+Классы:
+- Block: транслированный участок.
+- BlockCache: кэш участков одной машины (см. Machine(translate=True)).
+
+Функции:
+- translate_block: текст функции участка.
+"""
+
+import pdp_11_mem
+from pdp_11_commands import decode_table
+from pdp_11_icache import _pages
+from pdp_11_psw import PSW, N, Z, V, MOV, ADD, CLR_FLAGS, nzv_bits, c_bit
+from pdp_11_timing import instruction_cycles
+
+# Наибольшее число команд в одном участке
+MAX_BLOCK = 64
+
+# Команды с операндами, которые умеет переводить транслятор
+# (кроме них переводятся sob, br и условные ветвления)
+TRANSLATED = ('mov', 'add', 'clr')
+
+
+class Untranslatable(Exception):
+    """Команду нельзя перевести: участок заканчивается перед ней."""
+    pass
+
+
+def _operand(mode, r, need_value, t, adr, read, lines):
+    """
+    Генерирует строки вычисления операнда так же, как его вычисляет
+    функция режима из make_resolvers: адрес в a<t>, значение в v<t>.
+
+    Операнды с PC (непосредственный, абсолютный, относительный) разбираются
+    статически: их дополнительное слово читается при трансляции.
+
+    Args:
+        mode (int): режим адресации
+        r (int): номер регистра
+        need_value (bool): нужно ли значение операнда
+        t (str): суффикс временных переменных ('0' - ss, '1' - dd)
+        adr (int): адрес дополнительного слова операнда в потоке команд
+        read (callable): чтение слова из памяти при трансляции
+        lines (list): список строк, в который добавляется код
+
+    Returns:
+        tuple: (регистровый ли операнд, адрес слова после операнда)
+
+    Raises:
+        Untranslatable: для режимов с PC, которые меняют поток команд
+    """
+    a, v = f"a{t}", f"v{t}"
+    if r == 7:
+        if mode == 2:
+            if not need_value:
+                raise Untranslatable()  # запись в собственный непосредственный операнд
+            if t == '1':  # add с непосредственным приемником пишет в поток команд
+                lines.append(f"{a} = 0o{adr:o}")
+            lines.append(f"{v} = 0o{read(adr):o}")
+            return False, adr + 2
+        if mode == 3:
+            lines.append(f"{a} = 0o{read(adr):o}")
+        elif mode == 6:
+            lines.append(f"{a} = 0o{(adr + 2 + read(adr)) & 0xFFFF:o}")
+        elif mode == 7:
+            lines.append(f"{a} = w_read(0o{(adr + 2 + read(adr)) & 0xFFFF:o})")
+        else:
+            raise Untranslatable()
+        if need_value:
+            lines.append(f"{v} = w_read({a})")
+        return False, adr + 2
+
+    if mode == 0:
+        if need_value:
+            lines.append(f"{v} = reg[{r}]")
+        return True, adr
+    if mode == 1:
+        lines.append(f"{a} = reg[{r}]")
+    elif mode == 2:
+        lines.append(f"{a} = reg[{r}]")
+        lines.append(f"reg[{r}] = {a} + 2")
+    elif mode == 3:
+        lines.append(f"p{t} = reg[{r}]")
+        lines.append(f"reg[{r}] = p{t} + 2")
+        lines.append(f"{a} = w_read(p{t})")
+    elif mode == 4:
+        lines.append(f"{a} = reg[{r}] - 2")
+        lines.append(f"reg[{r}] = {a}")
+    elif mode == 5:
+        lines.append(f"p{t} = reg[{r}] - 2")
+        lines.append(f"reg[{r}] = p{t}")
+        lines.append(f"{a} = w_read(p{t})")
+    elif mode == 6:
+        lines.append(f"{a} = (reg[{r}] + 0o{read(adr):o}) & 0xFFFF")
+    else:
+        lines.append(f"{a} = w_read((reg[{r}] + 0o{read(adr):o}) & 0xFFFF)")
+    if need_value:
+        lines.append(f"{v} = w_read({a})")
+    return False, adr + 2 if mode >= 6 else adr
+
+
+# Условия переходов через лениво вычисляемые признаки (см. pdp_11_psw)
+CONDITIONS = {
+    'bne': "not nzv_bits(psw.nzv) & Z",
+    'beq': "nzv_bits(psw.nzv) & Z",
+    'bpl': "not nzv_bits(psw.nzv) & N",
+    'bmi': "nzv_bits(psw.nzv) & N",
+    'bvc': "not nzv_bits(psw.nzv) & V",
+    'bvs': "nzv_bits(psw.nzv) & V",
+    'bcc': "not c_bit(psw.c)",
+    'bcs': "c_bit(psw.c)",
+}
+
+# Имена, доступные сгенерированному коду
+GLOBALS = {'MOV': MOV, 'ADD': ADD, 'CLR_FLAGS': CLR_FLAGS, 'N': N, 'Z': Z, 'V': V,
+           'nzv_bits': nzv_bits, 'c_bit': c_bit}
+
+
+class _Translated:
+    """
+    Переведенная команда.
+
+    lines - код команды; next_pc - адрес, с которого продолжается участок
+    (для br - адрес перехода); end - адрес после команды; condition и
+    target - условие и адрес перехода завершающей команды (sob, b*);
+    nzv и c - выражения записей признаков (None, если команда их не меняет);
+    reads_memory - читает ли команда память (в том числе PSW по адресу 177776).
+    """
+
+    __slots__ = ('lines', 'next_pc', 'end', 'writes_memory', 'reads_memory', 'terminator',
+                 'condition', 'target', 'nzv', 'c', 'cycles')
+
+    def __init__(self, lines, next_pc, end=None, writes_memory=False, reads_memory=False,
+                 terminator=False, condition=None, target=None, nzv=None, c=None):
+        self.lines = lines
+        self.next_pc = next_pc
+        self.end = end if end is not None else next_pc
+        self.writes_memory = writes_memory
+        self.reads_memory = reads_memory
+        self.terminator = terminator
+        self.condition = condition
+        self.target = target
+        self.nzv = nzv
+        self.c = c
+        self.cycles = 0
+
+
+def _instruction(pc, read, count_reads=False):
+    """
+    Генерирует код одной команды и оценивает ее время (см. pdp_11_timing).
+
+    Args:
+        pc (int): адрес команды
+        read (callable): чтение слова из памяти при трансляции
+        count_reads (bool): читать слова операндов из потока команд при
+            выполнении, чтобы их учел подсчет обращений (Memory.count_accesses)
+
+    Returns:
+        _Translated: переведенная команда
+
+    Raises:
+        Untranslatable: если команду выполняет обычный цикл машины
+    """
+    item = _translate_instruction(pc, read, count_reads)
+    item.cycles = instruction_cycles(read(pc))
+    return item
+
+
+def _translate_instruction(pc, read, count_reads):
+    word = read(pc)
+    cmd = decode_table[word]
+    name = cmd['name']
+    adr = pc + 2
+
+    if name == 'sob':
+        r, nn = (word >> 6) & 7, word & 0o77
+        return _Translated([f"reg[{r}] = (reg[{r}] - 1) & 0xFFFF"], adr, terminator=True,
+                           condition=f"reg[{r}] != 0", target=(adr - 2 * nn) & 0xFFFF)
+    if name == 'br' or name in CONDITIONS:
+        target = (adr + 2 * (((word & 0o377) ^ 0o200) - 0o200)) & 0xFFFF
+        if name == 'br':
+            return _Translated([], target, end=adr, terminator=True)
+        return _Translated([], adr, terminator=True, condition=CONDITIONS[name], target=target)
+    if name not in TRANSLATED:
+        raise Untranslatable()
+
+    lines = []
+    if 'ss' in cmd['params']:
+        _, adr = _operand((word >> 9) & 7, (word >> 6) & 7, True, '0', adr, read, lines)
+    dd_mode, dd_reg = (word >> 3) & 7, word & 7
+    if dd_mode == 0 and dd_reg == 7:
+        raise Untranslatable()  # запись в PC - переход
+    is_register, adr = _operand(dd_mode, dd_reg, cmd['reads_dd'], '1', adr, read, lines)
+    if count_reads:
+        # Значения уже подставлены константами; чтение только для подсчета
+        lines[:0] = [f"w_read(0o{word:o})" for word in range(pc + 2, adr, 2)]
+
+    value = {'mov': "v0", 'add': "v0 + v1", 'clr': "0"}[name]
+    if is_register:
+        lines.append(f"reg[{dd_reg}] = ({value}) & 0xFFFF" if name != 'clr' else f"reg[{dd_reg}] = 0")
+    else:
+        lines.append(f"w_write(a1, {value})")
+    record = {'mov': "(MOV, v0)", 'add': "(ADD, v0, v1)", 'clr': "CLR_FLAGS"}[name]
+    return _Translated(lines, adr, writes_memory=not is_register,
+                       reads_memory=any("w_read(" in line for line in lines),
+                       nzv=record, c=record if name != 'mov' else None)
+
+
+def translate_block(start, read, count_reads=False):
+    """
+    Переводит участок, начинающийся с адреса start, в текст функции.
+
+    Текст - функция make(reg, w_read, w_write, valid, psw), возвращающая
+    функцию участка без аргументов; valid - список из одного флага, который
+    сбрасывается при записи в код участка.
+
+    Признаки в PSW записываются только там, где их можно увидеть: перед
+    выходом из участка, перед ветвлением и перед командой, читающей память
+    (PSW, подключенное к шине, читается как память). Запись признаков команды,
+    за которой до ближайшего выхода идет другая команда с признаками,
+    не генерируется.
+
+    Args:
+        start (int): адрес входа в участок
+        read (callable): чтение слова из памяти
+        count_reads (bool): см. _instruction
+
+    Returns:
+        tuple: (текст функции, число команд, адрес конца участка, циклы шины:
+            список, где элемент k - циклы первых k команд участка)
+            или None, если первую же команду перевести нельзя
+    """
+    items = []
+    pc = end = start
+    while len(items) < MAX_BLOCK:
+        try:
+            item = _instruction(pc, read, count_reads)
+        except Untranslatable:
+            break
+        items.append(item)
+        end = max(end, item.end)
+        pc = item.next_pc
+        if item.terminator:
+            break
+    if not items:
+        return None
+
+    # После каких команд признаки могут быть прочитаны: выход из участка
+    # (проверка valid после записи в память, конец участка), ветвление
+    # или чтение памяти следующей командой
+    count = len(items)
+    exits = [item.writes_memory for item in items]
+    exits[-1] = True
+    if items[-1].terminator and count > 1:
+        exits[-2] = True
+    need_nzv, need_c = [False] * count, [False] * count
+    pending_nzv = pending_c = False
+    for i in reversed(range(count)):
+        if exits[i]:
+            pending_nzv = pending_c = True
+        if pending_nzv and items[i].nzv is not None:
+            need_nzv[i], pending_nzv = True, False
+        if pending_c and items[i].c is not None:
+            need_c[i], pending_c = True, False
+        if items[i].reads_memory:
+            # Команда может прочитать PSW: признаки предыдущих команд нужны до нее
+            pending_nzv = pending_c = True
+
+    body = []
+    for i, item in enumerate(items):
+        body.extend(item.lines)
+        if need_nzv[i] and need_c[i]:
+            body.append(f"psw.nzv = psw.c = {item.nzv}")
+        elif need_nzv[i]:
+            body.append(f"psw.nzv = {item.nzv}")
+        elif need_c[i]:
+            body.append(f"psw.c = {item.c}")
+        if item.condition is not None:
+            body.append(f"if {item.condition}:")
+            body.append(f"    reg[7] = 0o{item.target:o}")
+            body.append(f"    return {i + 1}")
+        elif item.writes_memory and i < count - 1:
+            # Команда могла изменить код самого участка
+            body.append("if not valid[0]:")
+            body.append(f"    reg[7] = 0o{item.next_pc:o}")
+            body.append(f"    return {i + 1}")
+
+    source = ["def make(reg, w_read, w_write, valid, psw):",
+              "    def block():"]
+    source.extend("        " + line for line in body)
+    source.append(f"        reg[7] = 0o{pc & 0xFFFF:o}")
+    source.append(f"        return {count}")
+    source.append("    return block")
+    cycles = [0]
+    for item in items:
+        cycles.append(cycles[-1] + item.cycles)
+    return "\n".join(source) + "\n", count, end, cycles
+
+
+class Block:
+    """
+    Транслированный участок; run - функция участка или None, если перевода нет.
+
+    cycles[k] - циклы шины первых k команд участка (run возвращает k).
+    """
+
+    __slots__ = ('start', 'end', 'length', 'run', 'valid', 'source', 'cycles')
+
+    def __init__(self, start, end, length=0, run=None, valid=None, source=None, cycles=None):
+        self.start = start
+        self.end = end
+        self.length = length
+        self.run = run
+        self.valid = valid
+        self.source = source
+        self.cycles = cycles
+
+
+class BlockCache:
+    """
+    Кэш транслированных участков, ключ - адрес входа.
+
+    Адреса, с которых перевести ничего нельзя, тоже кэшируются
+    (Block с run=None), чтобы не пытаться переводить их снова.
+    """
+
+    def __init__(self, reg, memory=None, psw=None):
+        """
+        Args:
+            reg (list): регистры машины
+            memory (Memory): память машины (по умолчанию pdp_11_mem.default_memory)
+            psw (PSW): слово состояния машины (по умолчанию создается новое)
+        """
+        self.reg = reg
+        self.memory = memory if memory is not None else pdp_11_mem.default_memory
+        self.psw = psw if psw is not None else PSW()
+        self.blocks = {}
+        self.pages = {}  # страница -> множество адресов входа участков, задевающих ее
+        self.translations = 0
+        self.invalidations = 0
+        self.memory.write_listeners.append(self.on_write)
+
+    def translate(self, pc):
+        """
+        Переводит участок с адресом входа pc и кладет его в кэш.
+
+        Returns:
+            Block: участок (run is None, если перевода нет)
+        """
+        translated = translate_block(pc, self.memory.fetch, self.memory.access_counts is not None)
+        if translated is None:
+            block = Block(pc, pc + 2)
+        else:
+            source, length, end, cycles = translated
+            namespace = dict(GLOBALS)
+            exec(compile(source, f"<block {pc:06o}>", "exec"), namespace)
+            valid = [True]
+            run = namespace['make'](self.reg, self.memory.w_read, self.memory.w_write, valid, self.psw)
+            block = Block(pc, end, length, run, valid, source, cycles)
+            self.translations += 1
+        self.blocks[pc] = block
+        for page in _pages(block.start, block.end - block.start):
+            starts = self.pages.get(page)
+            if starts is None:
+                starts = self.pages[page] = set()
+                self.memory.watch_page(page)
+            starts.add(pc)
+        return block
+
+    def on_write(self, adr, size):
+        """Удаляет из кэша участки, пересекающиеся с записанными байтами [adr, adr + size)."""
+        end = adr + size
+        for page in _pages(adr, size):
+            starts = self.pages.get(page)
+            if not starts:
+                continue
+            for start in [s for s in starts if s < end and adr < self.blocks[s].end]:
+                self.invalidate(start)
+
+    def invalidate(self, pc):
+        """Удаляет из кэша участок с адресом входа pc."""
+        block = self.blocks.pop(pc)
+        if block.valid is not None:
+            block.valid[0] = False
+        self.invalidations += 1
+        for page in _pages(block.start, block.end - block.start):
+            starts = self.pages[page]
+            starts.discard(pc)
+            if not starts:
+                del self.pages[page]
+                self.memory.unwatch_page(page)
+
+    def clear(self):
+        """Очищает кэш участков."""
+        for pc in list(self.blocks):
+            self.invalidate(pc)
+
+    def close(self):
+        """Очищает кэш и отключает его от наблюдения за записью в память."""
+        self.clear()
+        self.memory.write_listeners.remove(self.on_write)
+
+    def stats(self):
+        """
+        Returns:
+            dict: translations, invalidations и blocks (число участков в кэше)
+        """
+        return {
+            'translations': self.translations,
+            'invalidations': self.invalidations,
+            'blocks': sum(1 for block in self.blocks.values() if block.run is not None),
+        }
@@ -0,0 +1,86 @@
+import pytest
+from pdp_11_machine import Machine
+from pdp_11_translate import translate_block
+from bench_suite import BENCHMARKS, START, load_words
+
+IMAGE = "integral_tests/02_sob.pdp.o"
+
+
+def prepared(name, translate):
+    words, data = BENCHMARKS[name]()
+    machine = Machine(translate=translate)
+    load_words(machine, START, words)
+    for adr, values in data.items():
+        load_words(machine, adr, values)
+    machine.reg[7] = START
+    return machine
+
+
+def test_sob_loop_is_one_block():
+    machine = Machine(translate=True)
+    machine.load(IMAGE)
+    assert machine.run() == 9
+    assert machine.reg[1] == 6 and machine.reg[7] == 0o1014
+    loop = machine.translator.blocks[0o1006]
+    assert loop.length == 2
+    # halt выполняет обычный цикл
+    assert machine.translator.blocks[0o1012].run is None
+
+
+@pytest.mark.parametrize("name", ["modes", "copy", "op_add"])
+def test_same_state_as_interpreter(name):
+    interpreted, translated = prepared(name, False), prepared(name, True)
+    assert interpreted.run() == translated.run()
+    assert interpreted.reg == translated.reg
+    assert interpreted.memory.mem == translated.memory.mem
+    assert interpreted.psw.value == translated.psw.value
+
+
+def test_instruction_limit():
+    interpreted, translated = prepared("modes", False), prepared("modes", True)
+    for limit in (1, 7, 100, 1000):
+        assert interpreted.run(limit) == translated.run(limit) == limit
+        assert interpreted.reg == translated.reg
+
+
+def test_write_to_code_invalidates_block():
+    machine = Machine(translate=True)
+    machine.load(IMAGE)
+    machine.run()
+    machine.memory.w_write(0o1002, 5)  # mov #5, r0
+    assert 0o1000 not in machine.translator.blocks
+    machine.reg[7] = 0o1000
+    machine.run()
+    assert machine.reg[1] == 5 + 4 + 3 + 2 + 1
+
+
+@pytest.mark.parametrize("translate", [False, True])
+def test_block_modifies_itself(translate):
+    machine = Machine(translate=translate)
+    words = [0o012737, 0o000005, 0o001014,  # 1000: mov #5, @#1014
+             0o012700, 0o000003,            # 1006: mov #3, r0
+             0o012701, 0o000007,            # 1012: mov #7, r1 -> mov #5, r1
+             0o000000]                      # 1016: halt
+    load_words(machine, START, words)
+    machine.reg[7] = START
+    assert machine.run() == 4
+    assert machine.reg[:2] == [3, 5]
+    assert machine.reg[7] == 0o1020
+
+
+@pytest.mark.parametrize("translate", [False, True])
+def test_psw_read_inside_block(translate):
+    machine = Machine(translate=translate)
+    machine.add_device(machine.psw)
+    words = [0o012701, 0o177777,  # 1000: mov #177777, r1
+             0o062701, 0o000001,  # 1004: add #1, r1 -> Z, C
+             0o013700, 0o177776,  # 1010: mov @#177776, r0
+             0o000000]            # 1014: halt
+    load_words(machine, START, words)
+    machine.reg[7] = START
+    machine.run()
+    assert machine.reg[0] == 0o5
+
+
+def test_untranslatable_start():
+    assert translate_block(0o1000, lambda adr: 0) is None  # halt